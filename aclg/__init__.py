@@ -1,4 +1,4 @@
 from aclg.rules.split.split_ratio import split_by_ratio, SplitOrientation, split_by_ratio_grid
 from aclg.rules.spacing import spacing_grid, spacing_vertical, spacing_horizontal
 from aclg.post_processing.padding import add_padding
-from aclg.rules.symetric.symmetric_1 import split_symmetric_1_horizontal, split_symmetric_1_vertical
\ No newline at end of file
+from aclg.rules.symetric.symmetric_1 import split_symmetric_1_horizontal, split_symmetric_1_vertical
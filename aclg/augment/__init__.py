@@ -0,0 +1 @@
+from aclg.augment.formatted import FormattedLayoutAugmenter, augmentation_seed, load_formatted_layout
@@ -0,0 +1,295 @@
+# aclg/augment/formatted.py
+import copy
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from aclg.netlist.graph import build_graph_block
+from aclg.pipeline.manifest import derive_layout_seed
+
+
+def augmentation_seed(base_seed: int, sample_index: int, epoch: int = 0) -> int:
+    """每個樣本、每個 epoch 各自的增強種子；與生成時的佈局種子使用同一套推導方式。"""
+    return derive_layout_seed(base_seed, sample_index, epoch)
+
+
+@dataclass
+class _LayoutArrays:
+    """format_for_ml 輸出的陣列表示 (座標與尺寸皆為正規化單位)。"""
+    nodes: np.ndarray            # (N, 2) [w, h]
+    targets: np.ndarray          # (N, 2) [x, y]
+    edge_index: np.ndarray       # (E, 2) 元件索引對
+    edge_offsets: np.ndarray     # (E, 2, 2) 兩端引腳相對於各自元件中心的偏移
+    symmetry_pairs: np.ndarray   # (G, 2)
+    sub_components: List[Any]
+    pin_counts: Optional[np.ndarray] = None  # (N,)，僅在輸入含有 `graph` 區塊時存在
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_LayoutArrays":
+        edges = data.get("edges", {}).get("basic_component_edge", [])
+        return cls(
+            nodes=np.asarray(data["node"], dtype=np.float64).reshape(-1, 2),
+            targets=np.asarray(data["target"], dtype=np.float64).reshape(-1, 2),
+            edge_index=np.array([e[0] for e in edges], dtype=np.int64).reshape(-1, 2),
+            edge_offsets=np.array([e[1] for e in edges], dtype=np.float64).reshape(-1, 2, 2),
+            symmetry_pairs=np.asarray(data.get("symmetry_groups", []), dtype=np.int64).reshape(-1, 2),
+            sub_components=copy.deepcopy(data.get("sub_components", [])),
+            pin_counts=np.asarray(data["graph"]["pin_count"], dtype=np.int64) if "graph" in data else None
+        )
+
+    def to_dict(self, template: Dict[str, Any]) -> Dict[str, Any]:
+        data = {key: value for key, value in template.items()}
+        data["node"] = self.nodes.tolist()
+        data["target"] = self.targets.tolist()
+        data["edges"] = dict(template.get("edges", {}))
+        data["edges"]["basic_component_edge"] = [
+            [pair, offsets] for pair, offsets in zip(self.edge_index.tolist(), self.edge_offsets.reshape(-1, 4).tolist())
+        ]
+        data["sub_components"] = self.sub_components
+        data["symmetry_groups"] = self.symmetry_pairs.tolist()
+        if "graph" in template:
+            # 邊與元件已被重新編號，圖區塊必須依增強後的結果重建
+            data["graph"] = build_graph_block(len(self.nodes), self.edge_index, self.edge_offsets, self.pin_counts)
+        return data
+
+    def symmetry_units(self) -> np.ndarray:
+        """每個元件所屬的增強單位：對稱配對的兩個成員共用同一個單位 (較小的索引)，以便一起被捨棄或縮放。"""
+        units = np.arange(len(self.nodes))
+        if len(self.symmetry_pairs):
+            units[self.symmetry_pairs.max(axis=1)] = self.symmetry_pairs.min(axis=1)
+        return units
+
+
+def _dihedral(points: np.ndarray, quarter_turns: int, mirror: bool) -> np.ndarray:
+    """對最後一維為 (x, y) 的陣列套用鏡射 (x → -x) 與 quarter_turns 次 90° 旋轉 ((x, y) → (-y, x))。"""
+    x, y = points[..., 0], points[..., 1]
+    if mirror:
+        x = -x
+    for _ in range(quarter_turns % 4):
+        x, y = -y, x
+    return np.stack([x, y], axis=-1)
+
+
+def _connected_labels(num_nodes: int, edge_index: np.ndarray) -> np.ndarray:
+    """以向量化的最小標籤傳播求出元件層級的連通分量，回傳每個元件的分量標籤 (分量中最小的元件索引)。"""
+    labels = np.arange(num_nodes)
+    if not len(edge_index):
+        return labels
+    src, dst = edge_index[:, 0], edge_index[:, 1]
+    while True:
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, src, labels[dst])
+        np.minimum.at(new_labels, dst, labels[src])
+        new_labels = new_labels[new_labels]  # 指標跳躍，加速收斂
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+class FormattedLayoutAugmenter:
+    """
+    在載入時對 format_for_ml 的輸出做即時增強，不需重新執行 Level_0 → Netlist 的完整生成。
+
+    - 元件捨棄 (dropout)：對稱配對一起捨棄，並重新編號邊與對稱群組；若網表因此斷開，
+      以最近的引腳對重新橋接 (與 NetlistGenerator 的最終橋接規則相同)。
+    - 尺寸抖動與 Padding：縮小元件尺寸，引腳偏移依相同比例縮放以留在元件內；對稱配對使用相同的參數。
+    - 90° 旋轉與鏡射：同時轉換座標、尺寸、邊的偏移與 sub_components，對稱配對維持不變。
+
+    所有隨機性來自每個樣本各自的種子，因此相同 (樣本, 種子) 的結果可重現。
+    """
+    def __init__(self,
+                 dropout_ratio: float = 0.0,
+                 min_components: int = 2,
+                 size_jitter: float = 0.0,
+                 padding_range: Sequence[float] = (0.0, 0.0),
+                 rotate_90: bool = True,
+                 mirror: bool = True):
+        if not 0.0 <= dropout_ratio < 1.0:
+            raise ValueError("dropout_ratio 必須介於 0.0 (含) 與 1.0 之間。")
+        if not 0.0 <= size_jitter < 1.0:
+            raise ValueError("size_jitter 必須介於 0.0 (含) 與 1.0 之間。")
+        min_pad, max_pad = padding_range
+        if min_pad < 0 or max_pad < min_pad:
+            raise ValueError("無效的 padding 範圍。")
+        self.dropout_ratio = dropout_ratio
+        self.min_components = min_components
+        self.size_jitter = size_jitter
+        self.padding_range = (float(min_pad), float(max_pad))
+        self.rotate_90 = rotate_90
+        self.mirror = mirror
+
+    @classmethod
+    def from_config(cls, settings: Optional[Mapping[str, Any]]) -> "FormattedLayoutAugmenter":
+        """
+        由 config.yaml 的 `augmentation_settings` 區塊建立 (例如 `config.section('augmentation_settings')`)。
+        未知的設定項或不合法的值拋出 ValueError；未指定的設定項使用建構子的預設值。
+        """
+        settings = dict(settings or {})
+        known = ('dropout_ratio', 'min_components', 'size_jitter', 'padding_range', 'rotate_90', 'mirror')
+        unknown = sorted(set(settings) - set(known))
+        if unknown:
+            raise ValueError(f"未知的設定項 {unknown}，可用的設定項為 {list(known)}。")
+        for key in ('dropout_ratio', 'size_jitter'):
+            if key in settings and (isinstance(settings[key], bool) or not isinstance(settings[key], (int, float))):
+                raise ValueError(f"{key} 必須是數值，目前為 {settings[key]!r}。")
+        if 'min_components' in settings and (isinstance(settings['min_components'], bool) or
+                                             not isinstance(settings['min_components'], int) or settings['min_components'] < 1):
+            raise ValueError(f"min_components 必須是正整數，目前為 {settings['min_components']!r}。")
+        padding_range = settings.get('padding_range', (0.0, 0.0))
+        if (not isinstance(padding_range, (list, tuple)) or len(padding_range) != 2 or
+                any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in padding_range)):
+            raise ValueError(f"padding_range 必須是長度為 2 的 [min, max] 數值列表，目前為 {padding_range!r}。")
+        for key in ('rotate_90', 'mirror'):
+            if key in settings and not isinstance(settings[key], bool):
+                raise ValueError(f"{key} 必須是 true 或 false，目前為 {settings[key]!r}。")
+        settings['padding_range'] = tuple(padding_range)
+        return cls(**settings)
+
+    def augment(self, data: Dict[str, Any], seed: int) -> Dict[str, Any]:
+        """回傳一份增強後的新 ML 資料 (不修改輸入)。"""
+        rng = np.random.RandomState(seed)
+        layout = _LayoutArrays.from_dict(data)
+        if len(layout.nodes) == 0:
+            return copy.deepcopy(data)
+
+        if self.dropout_ratio > 0:
+            layout = self._dropout(layout, rng)
+        if self.size_jitter > 0 or self.padding_range[1] > 0:
+            layout = self._jitter_sizes(layout, rng)
+        quarter_turns = rng.randint(4) if self.rotate_90 else 0
+        mirror = bool(rng.randint(2)) if self.mirror else False
+        if quarter_turns or mirror:
+            layout = self._transform(layout, quarter_turns, mirror)
+        return layout.to_dict(data)
+
+    __call__ = augment
+
+    def _dropout(self, layout: _LayoutArrays, rng: np.random.RandomState) -> _LayoutArrays:
+        units = layout.symmetry_units()
+        unit_ids = np.unique(units)
+        num_drop = int(round(len(unit_ids) * rng.uniform(0.0, self.dropout_ratio)))
+        if num_drop == 0:
+            return layout
+        dropped_units = rng.choice(unit_ids, size=num_drop, replace=False)
+        keep = ~np.isin(units, dropped_units)
+        if keep.sum() < self.min_components:
+            return layout
+
+        new_index = np.cumsum(keep) - 1
+        # 保留元件上的所有已知引腳 (也包含只連到被捨棄元件的引腳)，作為重新橋接的候選
+        pin_nodes = layout.edge_index.reshape(-1)
+        pin_offsets = layout.edge_offsets.reshape(-1, 2)
+        pin_keep = keep[pin_nodes]
+        edge_keep = keep[layout.edge_index].all(axis=1)
+        pair_keep = keep[layout.symmetry_pairs].all(axis=1)
+        dropped = _LayoutArrays(
+            nodes=layout.nodes[keep],
+            targets=layout.targets[keep],
+            edge_index=new_index[layout.edge_index[edge_keep]],
+            edge_offsets=layout.edge_offsets[edge_keep],
+            symmetry_pairs=new_index[layout.symmetry_pairs[pair_keep]],
+            sub_components=[sub for sub, k in zip(layout.sub_components, keep) if k],
+            pin_counts=None if layout.pin_counts is None else layout.pin_counts[keep]
+        )
+        self._recenter(dropped)
+        self._repair_connectivity(dropped, new_index[pin_nodes[pin_keep]], pin_offsets[pin_keep])
+        return dropped
+
+    @staticmethod
+    def _recenter(layout: _LayoutArrays):
+        # 與 format_for_ml 相同：讓剩餘元件的內容邊界框置中於原點
+        half = layout.nodes / 2
+        center = ((layout.targets - half).min(axis=0) + (layout.targets + half).max(axis=0)) / 2
+        layout.targets -= center
+
+    @staticmethod
+    def _repair_connectivity(layout: _LayoutArrays, pin_nodes: np.ndarray, pin_offsets: np.ndarray):
+        """
+        將每個不與第 0 個元件相連的分量，以最短的引腳對橋接到主分量。
+        候選引腳只有 (pin_nodes, pin_offsets) 給定的既有引腳：橋接邊重複使用既有引腳，不會新增引腳，
+        因此每個元件的引腳數 (`pin_counts`) 維持不變；沒有任何引腳的分量無法橋接，保持原樣。
+        """
+        num_nodes = len(layout.nodes)
+        labels = _connected_labels(num_nodes, layout.edge_index)
+        group_labels = np.unique(labels)
+        if len(group_labels) <= 1:
+            return
+
+        # 同一個引腳可能是多條邊的端點，只保留一份
+        pins = np.unique(np.concatenate([pin_nodes[:, None].astype(np.float64), pin_offsets], axis=1), axis=0)
+        pin_nodes, pin_offsets = pins[:, 0].astype(np.int64), pins[:, 1:]
+        pin_coords = layout.targets[pin_nodes] + pin_offsets
+
+        in_main = labels == labels[0]
+        bridge_index, bridge_offsets = [], []
+        for label in group_labels:
+            if label == labels[0]:
+                continue
+            main_pins = np.flatnonzero(in_main[pin_nodes])
+            group_pins = np.flatnonzero(labels[pin_nodes] == label)
+            if not len(main_pins) or not len(group_pins):
+                continue
+            dist = np.linalg.norm(pin_coords[main_pins][:, None, :] - pin_coords[group_pins][None, :, :], axis=-1)
+            u, v = np.unravel_index(np.argmin(dist), dist.shape)
+            p, q = main_pins[u], group_pins[v]
+            bridge_index.append((pin_nodes[p], pin_nodes[q]))
+            bridge_offsets.append((pin_offsets[p], pin_offsets[q]))
+            in_main |= labels == label
+
+        if not bridge_index:
+            return
+        layout.edge_index = np.concatenate([layout.edge_index, np.array(bridge_index, dtype=np.int64)])
+        layout.edge_offsets = np.concatenate([layout.edge_offsets, np.array(bridge_offsets, dtype=np.float64)])
+
+    def _jitter_sizes(self, layout: _LayoutArrays, rng: np.random.RandomState) -> _LayoutArrays:
+        units = layout.symmetry_units()
+        num_nodes = len(layout.nodes)
+        # 每個元件各抽一組參數後，對稱配對的第二個成員沿用第一個成員的參數
+        scale = (1.0 - rng.uniform(0.0, self.size_jitter, size=(num_nodes, 2)))[units]
+        padding = rng.uniform(*self.padding_range, size=num_nodes)[units]
+        new_nodes = layout.nodes * scale - 2 * padding[:, None]
+        # 放不下 Padding 的元件只套用尺寸抖動 (與批次 Padding 規則相同)
+        new_nodes = np.where((new_nodes > 0).all(axis=1)[:, None], new_nodes, layout.nodes * scale)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(layout.nodes > 0, new_nodes / layout.nodes, 1.0)
+        layout.edge_offsets = layout.edge_offsets * ratio[layout.edge_index]
+        layout.nodes = new_nodes
+        for sub_list, (rx, ry) in zip(layout.sub_components, ratio.tolist()):
+            for sub in sub_list:
+                sub["dims"] = [sub["dims"][0] * rx, sub["dims"][1] * ry]
+                sub["offset"] = [sub["offset"][0] * rx, sub["offset"][1] * ry]
+        return layout
+
+    @staticmethod
+    def _transform(layout: _LayoutArrays, quarter_turns: int, mirror: bool) -> _LayoutArrays:
+        layout.targets = _dihedral(layout.targets, quarter_turns, mirror)
+        layout.edge_offsets = _dihedral(layout.edge_offsets, quarter_turns, mirror)
+        if quarter_turns % 2:
+            layout.nodes = layout.nodes[:, ::-1].copy()
+        for sub_list in layout.sub_components:
+            for sub in sub_list:
+                sub["offset"] = _dihedral(np.asarray(sub["offset"], dtype=np.float64), quarter_turns, mirror).tolist()
+                if quarter_turns % 2:
+                    sub["dims"] = sub["dims"][::-1]
+        return layout
+
+
+def load_formatted_layout(path: str,
+                          augmenter: Union[FormattedLayoutAugmenter, Mapping[str, Any], None] = None,
+                          seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    讀取一個 formatted JSON；若指定 augmenter，則以 seed 即時產生一個增強樣本。
+    augmenter 也可以直接是 `augmentation_settings` 區塊 (以 `FormattedLayoutAugmenter.from_config` 建立)。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if augmenter is None:
+        return data
+    if not isinstance(augmenter, FormattedLayoutAugmenter):
+        augmenter = FormattedLayoutAugmenter.from_config(augmenter)
+    if seed is None:
+        raise ValueError("使用資料增強時必須為每個樣本指定 seed。")
+    return augmenter.augment(data, seed)
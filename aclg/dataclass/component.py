@@ -1,5 +1,8 @@
 # component.py
 from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
 
 @dataclass
 class Component:
@@ -25,4 +28,16 @@ class Component:
     def get_bottomright(self):
         return (self.x + self.width / 2, self.y + self.height / 2)
     def w_h_ratio(self):
-        return self.width / self.height
\ No newline at end of file
+        return self.width / self.height
+
+# --- 批次規則 (*_batch) 使用的幾何陣列：每列為 [x, y, width, height] ---
+def components_to_array(components: List[Component]) -> np.ndarray:
+    """將元件列表轉成 (N, 4) 的幾何陣列 [x, y, width, height]。"""
+    if not components:
+        return np.empty((0, 4), dtype=np.float64)
+    return np.array([(c.x, c.y, c.width, c.height) for c in components], dtype=np.float64)
+
+def components_from_array(geometry: np.ndarray, generate_rule: str = "", level: int = 0) -> List[Component]:
+    """將 (N, 4) 的幾何陣列轉回 Component 物件列表。"""
+    return [Component(x=float(x), y=float(y), width=float(w), height=float(h), level=level, generate_rule=generate_rule)
+            for x, y, w, h in np.asarray(geometry, dtype=np.float64)]
@@ -0,0 +1,116 @@
+# netlist.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+@dataclass
+class Netlist:
+    """
+    以索引表示的 Netlist。
+
+    pin_coords: (P, 2) float64，所有引腳的絕對座標，依所屬元件連續排列
+    pin_to_component: (P,) int32，每個引腳所屬元件在葉元件列表中的索引
+    edges: (E, 2) int32，每條邊兩端的引腳索引
+    num_bridge_edges: edges 最後的 num_bridge_edges 條邊是連通性橋接 (`_ensure_single_connected_component`) 補上的邊
+    """
+    pin_coords: np.ndarray = field(default_factory=lambda: np.zeros((0, 2), dtype=np.float64))
+    pin_to_component: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    edges: np.ndarray = field(default_factory=lambda: np.zeros((0, 2), dtype=np.int32))
+    num_bridge_edges: int = 0
+
+    def __post_init__(self):
+        self.pin_coords = np.ascontiguousarray(self.pin_coords, dtype=np.float64).reshape(-1, 2)
+        self.pin_to_component = np.ascontiguousarray(self.pin_to_component, dtype=np.int32).reshape(-1)
+        self.edges = np.ascontiguousarray(self.edges, dtype=np.int32).reshape(-1, 2)
+        if len(self.pin_coords) != len(self.pin_to_component):
+            raise ValueError(f"引腳座標數量 ({len(self.pin_coords)}) 與 pin_to_component 長度 ({len(self.pin_to_component)}) 必須相同。")
+        if not 0 <= self.num_bridge_edges <= len(self.edges):
+            raise ValueError(f"num_bridge_edges ({self.num_bridge_edges}) 必須介於 0 與邊數 ({len(self.edges)}) 之間。")
+
+    @property
+    def num_pins(self) -> int:
+        return len(self.pin_coords)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    def nbytes(self) -> int:
+        return self.pin_coords.nbytes + self.pin_to_component.nbytes + self.edges.nbytes
+
+    def pin_offsets(self, num_components: int) -> np.ndarray:
+        """回傳 (num_components + 1,) 的 CSR 偏移陣列，元件 i 的引腳為 [offsets[i], offsets[i+1])。"""
+        counts = np.bincount(self.pin_to_component, minlength=num_components)
+        return np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+
+    def component_edges(self) -> np.ndarray:
+        """回傳 (E, 2) int32，每條邊兩端引腳所屬的元件索引。"""
+        return self.pin_to_component[self.edges]
+
+    def edge_coordinates(self) -> np.ndarray:
+        """回傳 (E, 2, 2) 的邊端點座標，供繪圖使用。"""
+        return self.pin_coords[self.edges]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pin_coords": self.pin_coords.tolist(),
+            "pin_to_component": self.pin_to_component.tolist(),
+            "edges": self.edges.tolist(),
+            "num_bridge_edges": self.num_bridge_edges
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Netlist":
+        return cls(
+            pin_coords=np.array(data.get("pin_coords", []), dtype=np.float64),
+            pin_to_component=np.array(data.get("pin_to_component", []), dtype=np.int32),
+            edges=np.array(data.get("edges", []), dtype=np.int32),
+            num_bridge_edges=int(data.get("num_bridge_edges", 0))
+        )
+
+    @classmethod
+    def from_legacy_edges(
+            cls,
+            netlist_edges: Sequence[Tuple[Sequence[float], Sequence[float]]],
+            leaf_components: List[Dict[str, Any]]
+    ) -> "Netlist":
+        """
+        將舊版 JSON 的座標對邊列表 (`netlist_edges`) 轉換為索引表示。
+        舊格式沒有記錄引腳歸屬，因此只能以幾何方式回推；找不到所屬元件的邊會被捨棄。
+        """
+        rects = np.array([[c['x'], c['y'], c['width'], c['height']] for c in leaf_components],
+                         dtype=np.float64).reshape(-1, 4)
+        left, right = rects[:, 0] - rects[:, 2] / 2 - 1e-6, rects[:, 0] + rects[:, 2] / 2 + 1e-6
+        top, bottom = rects[:, 1] - rects[:, 3] / 2 - 1e-6, rects[:, 1] + rects[:, 3] / 2 + 1e-6
+
+        pin_index: Dict[Tuple[float, float], int] = {}
+        pin_coords, pin_to_component, edges = [], [], []
+
+        def lookup(pin) -> int:
+            pin = (float(pin[0]), float(pin[1]))
+            if pin not in pin_index:
+                px, py = pin
+                hits = np.flatnonzero((left <= px) & (px <= right) & (top <= py) & (py <= bottom))
+                if not len(hits):
+                    return -1
+                pin_index[pin] = len(pin_coords)
+                pin_coords.append(pin)
+                pin_to_component.append(int(hits[0]))
+            return pin_index[pin]
+
+        for p1, p2 in netlist_edges:
+            idx1, idx2 = lookup(p1), lookup(p2)
+            if idx1 >= 0 and idx2 >= 0:
+                edges.append((idx1, idx2))
+
+        return cls(np.array(pin_coords, dtype=np.float64), np.array(pin_to_component, dtype=np.int32),
+                   np.array(edges, dtype=np.int32))
+
+    @classmethod
+    def from_layout_dict(cls, layout_data: Dict[str, Any]) -> "Netlist":
+        """從原始佈局 JSON 讀取 Netlist，同時支援新的 `netlist` 欄位與舊的 `netlist_edges` 欄位。"""
+        if "netlist" in layout_data:
+            return cls.from_dict(layout_data["netlist"])
+        return cls.from_legacy_edges(layout_data.get("netlist_edges", []),
+                                     layout_data.get("final_leaf_components", []))
@@ -0,0 +1,194 @@
+# symmetry.py
+import copy
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+
+class SymmetryAxis(str, Enum):
+    """對稱軸方向"""
+    VERTICAL = "vertical"     # 對稱軸為垂直線：兩元件左右並排，x 方向鏡射
+    HORIZONTAL = "horizontal" # 對稱軸為水平線：兩元件上下堆疊，y 方向鏡射
+
+@dataclass
+class SymmetryGroup:
+    group_id: int
+    members: Tuple[Component, Component]
+    axis: SymmetryAxis
+
+class SymmetryRegistry:
+    """
+    佈局中所有對稱配對的登錄表，隨佈局在 Level_1、Level_2、Netlist 與匯出之間傳遞。
+
+    - 群組 ID 由登錄表統一配發 (取代各層手動傳遞的計數器)。
+    - 以元件物件的 id() 為鍵，成員查詢、夥伴查詢與破壞群組皆為 O(1)。
+    - 對稱軸在登錄時由產生該配對的分割規則決定，而不是事後由中心點差值推測。
+    - 為了相容既有的繪圖與 JSON，登錄表會同步維護 `Component.symmetric_group_id`。
+    """
+    def __init__(self, start_group_id: int = 0):
+        self._groups: Dict[int, SymmetryGroup] = {}
+        self._group_of: Dict[int, int] = {}
+        self._next_group_id = start_group_id
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __iter__(self):
+        return iter(list(self._groups.values()))
+
+    def __deepcopy__(self, memo) -> "SymmetryRegistry":
+        """深拷貝時一併拷貝成員元件 (與同一次 deepcopy 中的元件共用 memo)，並以新物件的 id() 重建索引。"""
+        registry = SymmetryRegistry(start_group_id=self._next_group_id)
+        memo[id(self)] = registry
+        for group in self._groups.values():
+            members = tuple(copy.deepcopy(comp, memo) for comp in group.members)
+            registry._groups[group.group_id] = SymmetryGroup(group.group_id, members, group.axis)
+            for comp in members:
+                registry._group_of[id(comp)] = group.group_id
+        return registry
+
+    def register_pair(self, first: Component, second: Component, axis: SymmetryAxis) -> int:
+        """登錄一組對稱配對，回傳配發的群組 ID。若成員已屬於其他群組，舊群組會先被移除。"""
+        for comp in (first, second):
+            if id(comp) in self._group_of:
+                self.break_group(self._group_of[id(comp)])
+        group_id = self._next_group_id
+        self._next_group_id += 1
+        self._groups[group_id] = SymmetryGroup(group_id, (first, second), SymmetryAxis(axis))
+        for comp in (first, second):
+            self._group_of[id(comp)] = group_id
+            comp.symmetric_group_id = group_id
+        return group_id
+
+    def group_of(self, component: Component) -> Optional[SymmetryGroup]:
+        group_id = self._group_of.get(id(component))
+        return None if group_id is None else self._groups[group_id]
+
+    def partner(self, component: Component) -> Optional[Component]:
+        group = self.group_of(component)
+        if group is None:
+            return None
+        first, second = group.members
+        return second if first is component else first
+
+    def break_group(self, group_id: int, generate_rule: Optional[str] = None):
+        """移除一個群組，並清除其成員的對稱標籤；可選擇同時改寫成員的 generate_rule。"""
+        group = self._groups.pop(group_id, None)
+        if group is None:
+            return
+        for comp in group.members:
+            self._group_of.pop(id(comp), None)
+            comp.symmetric_group_id = -1
+            if generate_rule is not None:
+                comp.generate_rule = generate_rule
+
+    def break_component(self, component: Component, generate_rule: Optional[str] = None):
+        """若元件屬於某個群組，則破壞其整個群組。"""
+        group = self.group_of(component)
+        if group is not None:
+            self.break_group(group.group_id, generate_rule)
+
+    def validate(self, leaf_components: List[Component], generate_rule: str = "symmetry_invalidated_post_check") -> int:
+        """移除成員不全在最終葉元件中的群組，回傳被移除的群組數。"""
+        leaf_ids = {id(comp) for comp in leaf_components}
+        invalid = [g.group_id for g in self._groups.values()
+                   if not all(id(comp) in leaf_ids for comp in g.members)]
+        for group_id in invalid:
+            self.break_group(group_id, generate_rule)
+        return len(invalid)
+
+    def index_pairs(self, components: List[Component]) -> Tuple[np.ndarray, List[SymmetryAxis]]:
+        """
+        以元件列表中的索引表示所有配對 (兩個成員都在列表中的群組才會列出)。
+
+        Returns:
+            ((G, 2) int64 陣列，每列為 [master, slave]，master 為索引較小者；對應的對稱軸列表)。
+            配對依 master 索引排序。
+        """
+        position = {id(comp): i for i, comp in enumerate(components)}
+        entries = []
+        for group in self._groups.values():
+            first, second = (position.get(id(comp)) for comp in group.members)
+            if first is None or second is None:
+                continue
+            entries.append((min(first, second), max(first, second), group.axis))
+        entries.sort(key=lambda e: e[0])
+        pairs = np.array([(m, s) for m, s, _ in entries], dtype=np.int64).reshape(-1, 2)
+        return pairs, [axis for _, _, axis in entries]
+
+    def to_ml_symmetry_groups(self, components: List[Component]) -> List[List[int]]:
+        """直接輸出 ML 格式的 `symmetry_groups` 欄位 (葉元件索引對)。"""
+        pairs, _ = self.index_pairs(components)
+        return pairs.tolist()
+
+    def to_layout_entries(self, components: List[Component]) -> List[Dict[str, Any]]:
+        """輸出原始佈局 JSON 的 `symmetry_groups` 欄位。"""
+        pairs, axes = self.index_pairs(components)
+        return [{"members": pair, "axis": axis.value} for pair, axis in zip(pairs.tolist(), axes)]
+
+    @classmethod
+    def from_components(cls, components: List[Component]) -> "SymmetryRegistry":
+        """
+        由元件上的 `symmetric_group_id` 重建登錄表，供沒有登錄表的舊資料使用。
+        舊資料沒有記錄對稱軸，只能由兩個中心點的差值推測。
+        """
+        members_by_id: Dict[int, List[Component]] = {}
+        for comp in components:
+            if comp.symmetric_group_id != -1:
+                members_by_id.setdefault(comp.symmetric_group_id, []).append(comp)
+        registry = cls(start_group_id=max(members_by_id, default=-1) + 1)
+        for group_id, members in members_by_id.items():
+            if len(members) != 2:
+                continue
+            first, second = members
+            axis = _infer_axis(first.x, first.y, second.x, second.y)
+            registry._groups[group_id] = SymmetryGroup(group_id, (first, second), axis)
+            registry._group_of[id(first)] = group_id
+            registry._group_of[id(second)] = group_id
+        return registry
+
+    @classmethod
+    def from_layout_entries(cls, components: List[Component], entries: List[Dict[str, Any]]) -> "SymmetryRegistry":
+        """
+        由原始佈局 JSON 的 `symmetry_groups` 欄位 (葉元件索引對與對稱軸) 重建登錄表。
+        群組 ID 沿用元件上的 `symmetric_group_id`，因此重新匯出時結果不變。
+        """
+        registry = cls(start_group_id=max((c.symmetric_group_id for c in components), default=-1) + 1)
+        for entry in entries:
+            first, second = (components[i] for i in entry["members"])
+            group_id = first.symmetric_group_id
+            if group_id == -1 or group_id in registry._groups:
+                group_id = registry._next_group_id
+                registry._next_group_id += 1
+            registry._groups[group_id] = SymmetryGroup(group_id, (first, second), SymmetryAxis(entry["axis"]))
+            for comp in (first, second):
+                registry._group_of[id(comp)] = group_id
+                comp.symmetric_group_id = group_id
+        return registry
+
+    @staticmethod
+    def layout_entries_from_dict(layout_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """從原始佈局 JSON 讀取對稱群組；舊版 JSON 則由葉元件的 `symmetric_group_id` 重建。"""
+        if "symmetry_groups" in layout_data:
+            return layout_data["symmetry_groups"]
+        leaf_components = layout_data.get("final_leaf_components", [])
+        members_by_id: Dict[int, List[int]] = {}
+        for i, comp in enumerate(leaf_components):
+            group_id = comp.get("symmetric_group_id", -1)
+            if group_id != -1:
+                members_by_id.setdefault(group_id, []).append(i)
+        entries = []
+        for members in members_by_id.values():
+            if len(members) != 2:
+                continue
+            first, second = (leaf_components[i] for i in members)
+            axis = _infer_axis(first['x'], first['y'], second['x'], second['y'])
+            entries.append({"members": members, "axis": axis.value})
+        return entries
+
+def _infer_axis(x1: float, y1: float, x2: float, y2: float) -> SymmetryAxis:
+    """舊資料的對稱軸推測：左右距離較大視為垂直軸，否則為水平軸。"""
+    return SymmetryAxis.VERTICAL if abs(y1 - y2) < abs(x1 - x2) else SymmetryAxis.HORIZONTAL
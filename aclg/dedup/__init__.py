@@ -0,0 +1,2 @@
+from aclg.dedup.fingerprint import canonical_layout_fingerprint, fingerprint_from_components, fingerprint_from_layout_dict
+from aclg.dedup.hash_index import LayoutHashIndex
@@ -0,0 +1,132 @@
+# aclg/dedup/fingerprint.py
+import hashlib
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+
+# 指紋格式版本；若正規化規則改變，需同步遞增，避免新舊索引互相誤判
+FINGERPRINT_VERSION = 2
+
+
+def canonical_layout_fingerprint(
+        leaf_rects: np.ndarray,
+        component_edges: Iterable[Tuple[int, int]],
+        quantization_step: float = 0.01
+) -> str:
+    """
+    計算一個佈局的正規化指紋 (canonical fingerprint)。
+
+    1. 以所有葉元件的外接框左上角為原點進行平移正規化。
+    2. 將每個元件的 [left, top, width, height] 依 `quantization_step` 量化為整數。
+    3. 依量化後的幾何排序元件，使指紋與元件順序無關；幾何完全相同的元件再以連接結構
+       (`_refine_tied_classes` 的色彩精煉) 區分，不依賴輸入順序。
+    4. 將元件層級的連接圖 (無向、去重、去除自環) 以排序後的索引表示。
+
+    Args:
+        leaf_rects: 形狀為 (N, 4) 的陣列，每列為元件的 [x, y, width, height] (x, y 為中心點)。
+        component_edges: 元件索引對 (i, j) 的可迭代物件。
+        quantization_step: 幾何量化的步長。
+
+    Returns:
+        一個 32 字元的十六進位雜湊字串。
+    """
+    if quantization_step <= 0:
+        raise ValueError("quantization_step 必須大於 0。")
+
+    rects = np.asarray(leaf_rects, dtype=np.float64).reshape(-1, 4)
+    num_components = len(rects)
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"aclg-layout-v{FINGERPRINT_VERSION}:{num_components}:".encode())
+    if num_components == 0:
+        return hasher.hexdigest()
+
+    left = rects[:, 0] - rects[:, 2] / 2
+    top = rects[:, 1] - rects[:, 3] / 2
+    geometry = np.stack([left - left.min(), top - top.min(), rects[:, 2], rects[:, 3]], axis=1)
+    quantized = np.rint(geometry / quantization_step).astype(np.int64)
+
+    if not isinstance(component_edges, np.ndarray):
+        component_edges = list(component_edges)
+    pairs = np.asarray(component_edges, dtype=np.int64).reshape(-1, 2)
+    if len(pairs):
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+
+    # 幾何類別：np.unique 依 (left, top, width, height) 字典序排列，相同幾何的元件屬於同一類別
+    geometry_classes, classes = np.unique(quantized, axis=0, return_inverse=True)
+    classes = classes.reshape(-1)
+    if len(geometry_classes) < num_components and len(pairs):
+        classes = _refine_tied_classes(classes, pairs)
+    # 穩定排序：精煉後仍無法區分的元件 (結構上等價) 才保留輸入順序
+    order = np.argsort(classes, kind='stable')
+    rank = np.empty(num_components, dtype=np.int64)
+    rank[order] = np.arange(num_components, dtype=np.int64)
+    if len(pairs):
+        pairs = np.unique(np.sort(rank[pairs], axis=1), axis=0)
+
+    hasher.update(np.ascontiguousarray(quantized[order]).tobytes())
+    hasher.update(b"|edges|")
+    hasher.update(np.ascontiguousarray(pairs).tobytes())
+    return hasher.hexdigest()
+
+
+def _refine_tied_classes(classes: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """
+    Weisfeiler-Lehman 色彩精煉：每一輪以 (目前類別, 鄰居類別的排序多重集合) 重新編號，直到類別數量不再增加。
+    新編號依簽章排序產生，只取決於圖的結構而非元件順序，且保留原本類別的先後 (只會把同一類別再細分)。
+    精煉後仍同類別的元件在連接結構上無法以此法區分 (例如幾何相同且位於對稱子圖中)，其相對順序才會沿用輸入順序。
+
+    Args:
+        classes: 每個元件的初始類別 (幾何排序名次)。
+        pairs: 去重、去除自環後的無向邊 (元件索引)。
+    """
+    neighbours: List[List[int]] = [[] for _ in range(len(classes))]
+    for i, j in pairs.tolist():
+        neighbours[i].append(j)
+        neighbours[j].append(i)
+    colors = classes.tolist()
+    num_colors = len(set(colors))
+    for _ in range(len(colors)):
+        signatures = [(color, tuple(sorted(colors[j] for j in adjacent))) for color, adjacent in zip(colors, neighbours)]
+        palette = {signature: k for k, signature in enumerate(sorted(set(signatures)))}
+        if len(palette) == num_colors:
+            break
+        colors = [palette[signature] for signature in signatures]
+        num_colors = len(palette)
+    return np.asarray(colors, dtype=np.int64)
+
+
+def fingerprint_from_components(
+        components: List[Component],
+        netlist: Netlist,
+        quantization_step: float = 0.01
+) -> str:
+    """
+    在生成流程中直接以 Component 物件與 NetlistGenerator 的輸出計算指紋。
+
+    Args:
+        components: 最終的葉元件列表 (與傳入 NetlistGenerator 的順序相同)。
+        netlist: NetlistGenerator 產生的 Netlist。
+        quantization_step: 幾何量化的步長。
+    """
+    rects = np.array([[c.x, c.y, c.width, c.height] for c in components], dtype=np.float64)
+    return canonical_layout_fingerprint(rects, netlist.component_edges(), quantization_step)
+
+
+def fingerprint_from_layout_dict(layout_data: Dict[str, Any], quantization_step: float = 0.01) -> str:
+    """
+    以 `export_layout_to_json` 輸出的原始 JSON 資料計算指紋，供離線批次去重使用。
+
+    Args:
+        layout_data: 原始佈局 JSON 解析後的字典。
+        quantization_step: 幾何量化的步長。
+    """
+    leaf_components = layout_data.get("final_leaf_components", [])
+    rects = np.array([[c['x'], c['y'], c['width'], c['height']] for c in leaf_components],
+                     dtype=np.float64).reshape(-1, 4)
+    netlist = Netlist.from_layout_dict(layout_data)
+    return canonical_layout_fingerprint(rects, netlist.component_edges(), quantization_step)
@@ -0,0 +1,71 @@
+# aclg/dedup/hash_index.py
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class LayoutHashIndex:
+    """
+    以追加寫入 (append-only) 的文字檔保存佈局指紋，每行格式為 `<fingerprint>\\t<key>`。
+
+    - 開啟時一次載入所有已存在的指紋，之後的查詢皆為 O(1)。
+    - 新增的指紋會立即寫入並 flush，因此中斷的批次任務不會遺失已記錄的指紋。
+    - 若最後一行因中斷而不完整，載入時會直接略過。
+    """
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._entries: Dict[str, str] = {}
+
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        continue
+                    parts = line.rstrip('\n').split('\t', 1)
+                    if len(parts) == 2 and parts[0]:
+                        self._entries.setdefault(parts[0], parts[1])
+
+        self._file = open(index_path, 'a', encoding='utf-8')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._entries
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        """回傳第一個擁有此指紋的佈局鍵值；若不存在則回傳 None。"""
+        return self._entries.get(fingerprint)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """依記錄順序逐一回傳 (指紋, 鍵值)。"""
+        return iter(self._entries.items())
+
+    def add(self, fingerprint: str, key: str) -> bool:
+        """
+        記錄一個新的指紋。
+
+        Returns:
+            若指紋為新增則回傳 True；若已存在 (重複) 則不寫入並回傳 False。
+        """
+        if fingerprint in self._entries:
+            return False
+        if '\t' in key or '\n' in key:
+            raise ValueError(f"索引鍵值不能包含 tab 或換行字元: {key!r}")
+        self._entries[fingerprint] = key
+        self._file.write(f"{fingerprint}\t{key}\n")
+        self._file.flush()
+        return True
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,4 @@
+from aclg.generators.level_0 import Level_0
+from aclg.generators.level_1 import Level_1
+from aclg.generators.level_2 import Level_2
+from aclg.generators.gap_filler import GapFiller
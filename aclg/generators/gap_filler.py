@@ -0,0 +1,143 @@
+# aclg/generators/gap_filler.py
+import random
+from typing import List
+
+from aclg.dataclass.component import Component
+
+class GapFiller:
+    """
+    Finds the longest available edge in a layout and places a row of 
+    small, aligned components along it.
+    """
+    def __init__(self,
+                 small_comp_w_range: tuple[float, float] = (6, 14),
+                 small_comp_h_range: tuple[float, float] = (6, 14),
+                 spacing: float = 0.5):
+        """
+        Initializes the GapFiller.
+        Args:
+            small_comp_w_range (tuple): Width range for new components.
+            small_comp_h_range (tuple): Height range for new components.
+            spacing (float): The gap to leave between newly placed components.
+        """
+        self.w_range = small_comp_w_range
+        self.h_range = small_comp_h_range
+        self.spacing = spacing
+        self.level = 4
+
+    def _check_collision(self, new_comp: Component, all_components: List[Component], root_component: Component) -> bool:
+        # (此輔助函式與前一版完全相同)
+        root_left, root_top = root_component.get_topleft()
+        root_right, root_bottom = root_component.get_bottomright()
+        new_left, new_top = new_comp.get_topleft()
+        new_right, new_bottom = new_comp.get_bottomright()
+
+        if not (new_left >= root_left and new_right <= root_right and new_top >= root_top and new_bottom <= root_bottom):
+            return True
+
+        for comp in all_components:
+            comp_left, comp_top = comp.get_topleft()
+            comp_right, comp_bottom = comp.get_bottomright()
+            if (new_left < comp_right and new_right > comp_left and
+                new_top < comp_bottom and new_bottom > comp_top):
+                return True
+        return False
+
+    def fill(self, existing_leaf_components: List[Component], root_component: Component, num_to_place: int) -> List[Component]:
+        """
+        [主要方法] 實現尋找最佳邊緣並沿其線性排列的邏輯。
+        """
+        if not existing_leaf_components or num_to_place == 0:
+            return []
+
+        # 1. 尋找擁有最長邊的 host 元件
+        best_host = None
+        best_edge_type = ''
+        max_edge_len = -1.0
+        
+        for comp in existing_leaf_components:
+            if comp.width > max_edge_len:
+                max_edge_len = comp.width
+                best_host = comp
+                best_edge_type = random.choice(['top', 'bottom'])
+            if comp.height > max_edge_len:
+                max_edge_len = comp.height
+                best_host = comp
+                best_edge_type = random.choice(['left', 'right'])
+
+        if not best_host:
+            return []
+
+        # 2. 沿著找到的最佳邊緣，線性排列新元件
+        return self._place_along_edge(best_host, best_edge_type, existing_leaf_components.copy(), root_component, num_to_place)
+
+    def refill(self, hosts: List[Component], root_component: Component, num_to_place: int,
+               obstacles: List[Component]) -> List[Component]:
+        """
+        [局部重新填補] 在 hosts 周圍的空隙放回最多 num_to_place 個小元件 (增量重生時使用)。
+        與 `fill` 只嘗試最長邊的一側不同，這裡依邊長由長到短嘗試每個 host 的四個邊 (順序隨機)，
+        新元件不能與 hosts、obstacles 或彼此重疊。
+        """
+        placed: List[Component] = []
+        all_components = hosts + obstacles
+        for host in sorted(hosts, key=lambda c: max(c.width, c.height), reverse=True):
+            edge_types = ['top', 'bottom', 'left', 'right']
+            random.shuffle(edge_types)
+            for edge_type in edge_types:
+                if len(placed) >= num_to_place:
+                    return placed
+                placed.extend(self._place_along_edge(host, edge_type, all_components, root_component,
+                                                     num_to_place - len(placed)))
+        return placed
+
+    def _place_along_edge(self, host: Component, edge_type: str, all_components: List[Component],
+                          root_component: Component, num_to_place: int) -> List[Component]:
+        """沿 host 的指定邊緣線性排列新元件，遇到邊緣盡頭或碰撞即停止。all_components 會被附加新元件。"""
+        gap_components = []
+        h_left, h_top = host.get_topleft()
+        h_right, h_bottom = host.get_bottomright()
+
+        # 根據邊緣類型，初始化起始游標 (cursor)
+        cursor = 0
+        if edge_type in ['bottom', 'top']:
+            cursor = h_left
+        elif edge_type in ['left', 'right']:
+            cursor = h_top
+
+        for _ in range(num_to_place):
+            new_w = random.uniform(*self.w_range)
+            new_h = random.uniform(*self.h_range)
+            new_comp = Component(x=0, y=0, width=new_w, height=new_h, level=self.level, relation_id=-1)
+            
+            # 根據邊緣類型，設定新元件位置並檢查邊界
+            if edge_type == 'bottom':
+                if cursor + new_w > h_right: break # 超出邊緣長度
+                new_comp.x = cursor + new_w / 2
+                new_comp.y = h_bottom + new_h / 2
+            elif edge_type == 'top':
+                if cursor + new_w > h_right: break
+                new_comp.x = cursor + new_w / 2
+                new_comp.y = h_top - new_h / 2
+            elif edge_type == 'right':
+                if cursor + new_h > h_bottom: break
+                new_comp.x = h_right + new_w / 2
+                new_comp.y = cursor + new_h / 2
+            elif edge_type == 'left':
+                if cursor + new_h > h_bottom: break
+                new_comp.x = h_left - new_w / 2
+                new_comp.y = cursor + new_h / 2
+
+            # 進行碰撞檢測
+            if not self._check_collision(new_comp, all_components, root_component):
+                gap_components.append(new_comp)
+                all_components.append(new_comp)
+                # 移動游標，準備放下一塊
+                if edge_type in ['top', 'bottom']:
+                    cursor += new_w + self.spacing
+                else:
+                    cursor += new_h + self.spacing
+            else:
+                # 如果路徑被阻擋，就停止放置
+                break
+        
+        return gap_components
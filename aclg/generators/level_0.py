@@ -0,0 +1,26 @@
+# aclg/generators/level_0.py
+import random
+from typing import List
+
+from aclg.dataclass.component import Component
+
+class Level_0:
+    def __init__(self, w_range=(100, 120), h_range=(100, 120)):
+        self.x = 0
+        self.y = 0
+        self.w_range = tuple(w_range) # 從 config 讀取的是 list，轉為 tuple
+        self.h_range = tuple(h_range)
+        self.generate_rule = 'root'
+        self.level = 0
+        self.relation_id = 0
+    
+    def generate(self) -> List[Component]:
+        return [Component(
+            x=self.x,
+            y=self.y,
+            width=random.randint(*self.w_range),
+            height=random.randint(*self.h_range),
+            relation_id=self.relation_id,
+            generate_rule=self.generate_rule,
+            level=self.level
+        )]
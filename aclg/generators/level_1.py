@@ -0,0 +1,259 @@
+# aclg/generators/level_1.py
+import random
+from typing import List, Tuple
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.symmetry import SymmetryAxis, SymmetryRegistry
+from aclg.rules.align import align_components, AlignmentMode
+from aclg.rules.split.split_hold import split_hold
+from aclg.rules.split.split_ratio import split_by_ratio, SplitOrientation
+from aclg.rules.symetric.symmetric_1 import split_symmetric_1_horizontal, split_symmetric_1_vertical
+
+class Level_1:
+    """
+    進階版的 Level_1 處理器，修正了對齊邏輯，嚴格遵守分割方向與對齊模式的綁定關係。
+    """
+    def __init__(
+        self,
+        w_h_ratio_bound: tuple[float, float] = (1/6, 6/1),
+        max_tries_per_orientation: int = 50,
+        num_splits_range: tuple[int, int] = (2, 5),
+        ratio_range: tuple[float, float] = (0.3, 1.0),
+        split_only_probability: float = 0.5,
+        align_scale_factor_range: tuple[float, float] = (0.2, 1.0),
+        force_align_threshold: int = 3,
+        symmetric_split_probability: float = 0.3,  # 新增：產生對稱結構的機率
+        adaptive_symmetric_target_ratio: float = 1.5
+    ):
+        # 儲存所有超參數
+        self.w_h_ratio_bound = w_h_ratio_bound
+        self.max_tries_per_orientation = max_tries_per_orientation
+        self.num_splits_range = num_splits_range
+        self.ratio_range = ratio_range
+        self.split_only_probability = split_only_probability
+        self.align_scale_factor_range = align_scale_factor_range
+        self.force_align_threshold = force_align_threshold
+        self.symmetric_split_probability = symmetric_split_probability # 儲存新參數
+        self.adaptive_symmetric_target_ratio = adaptive_symmetric_target_ratio
+        self.level = 1
+
+    # --- << 請用這個新方法取代舊的 _apply_symmetric_split >> ---
+    def _apply_adaptive_symmetric_split(self, parent_component: Component) -> Tuple[List[Component], SymmetryAxis]:
+        """
+        [新版] 執行三明治切割，並保留中間元件，形成三元對稱結構。
+        同時回傳此次分割的對稱軸，供 SymmetryRegistry 登錄。
+        """
+        parent_w = parent_component.width
+        parent_h = parent_component.height
+        target_ratio = self.adaptive_symmetric_target_ratio
+
+         # 情況 1：寬元件
+        if parent_component.w_h_ratio() > 1:
+            ideal_child_w = parent_h * target_ratio
+            if (parent_w / 2) > ideal_child_w and (1 - 2 * (ideal_child_w / parent_w)) > 0:
+                ratio = ideal_child_w / parent_w
+                sub_components = split_by_ratio(parent_component, [ratio, 1 - 2 * ratio, ratio], SplitOrientation.VERTICAL)
+                axis = SymmetryAxis.VERTICAL # 左右並排
+                if len(sub_components) == 3:
+                    # --- << 新增：檢查中間元件的長寬比 >> ---
+                    center_comp = sub_components[1]
+                    # 使用 max/min 來確保長寬比總是 >= 1
+                    aspect_ratio = max(center_comp.width, center_comp.height) / min(center_comp.width, center_comp.height)
+                    
+                    if aspect_ratio > 3:
+                        # 長寬比 > 3，捨棄中間的，只回傳兩側
+                        sub_components[0].generate_rule = "symmetric_adaptive_side"
+                        sub_components[2].generate_rule = "symmetric_adaptive_side"
+                        return [sub_components[0], sub_components[2]], axis
+                    else:
+                        # 長寬比 <= 3，保留中間的
+                        sub_components[0].generate_rule = "symmetric_adaptive_side"
+                        sub_components[2].generate_rule = "symmetric_adaptive_side"
+                        sub_components[1].generate_rule = "symmetric_adaptive_center"
+                        return sub_components, axis
+            
+        # 情況 2：高元件
+        elif parent_component.w_h_ratio() < 1:
+            ideal_child_h = parent_w * target_ratio
+            if (parent_h / 2) > ideal_child_h and (1 - 2 * (ideal_child_h / parent_h)) > 0:
+                ratio = ideal_child_h / parent_h
+                sub_components = split_by_ratio(parent_component, [ratio, 1 - 2 * ratio, ratio], SplitOrientation.HORIZONTAL)
+                axis = SymmetryAxis.HORIZONTAL # 上下堆疊
+                if len(sub_components) == 3:
+                    # --- << 新增：檢查中間元件的長寬比 >> ---
+                    center_comp = sub_components[1]
+                    aspect_ratio = max(center_comp.width, center_comp.height) / min(center_comp.width, center_comp.height)
+
+                    if aspect_ratio > 3:
+                        # 長寬比 > 3，捨棄中間的
+                        sub_components[0].generate_rule = "symmetric_adaptive_side"
+                        sub_components[2].generate_rule = "symmetric_adaptive_side"
+                        return [sub_components[0], sub_components[2]], axis
+                    else:
+                        # 長寬比 <= 3，保留中間的
+                        sub_components[0].generate_rule = "symmetric_adaptive_side"
+                        sub_components[2].generate_rule = "symmetric_adaptive_side"
+                        sub_components[1].generate_rule = "symmetric_adaptive_center"
+                        return sub_components, axis
+
+        # Fallback: 如果不適用上述情況，則使用原始的對半切邏輯
+        if parent_component.w_h_ratio() > 1:
+            return split_symmetric_1_horizontal(parent_component), SymmetryAxis.VERTICAL
+        else:
+            return split_symmetric_1_vertical(parent_component), SymmetryAxis.HORIZONTAL
+
+    # _find_valid_ratios 輔助函式維持不變
+    def _find_valid_ratios(self, parent_component: Component, orientation: SplitOrientation, num_splits: int):
+        parent_w_h_ratio = parent_component.w_h_ratio()
+        min_ratio, max_ratio = self.w_h_ratio_bound
+        for _ in range(self.max_tries_per_orientation):
+            ratios = [random.uniform(*self.ratio_range) for _ in range(num_splits)]
+            total_ratio = sum(ratios)
+            all_valid = True
+            for r in ratios:
+                sub_w_h_ratio = 0
+                if orientation == SplitOrientation.HORIZONTAL:
+                    sub_w_h_ratio = parent_w_h_ratio * (total_ratio / r)
+                else:
+                    sub_w_h_ratio = parent_w_h_ratio * (r / total_ratio)
+                if not (min_ratio <= sub_w_h_ratio <= max_ratio):
+                    all_valid = False
+                    break
+            if all_valid:
+                return ratios
+        return None
+
+    def _apply_split(self, parent_component: Component, num_splits: int) -> List[Component]:
+        """[行為1] 執行純分割操作"""
+        if parent_component.w_h_ratio() > 1:
+            orientations_to_try = [SplitOrientation.VERTICAL, SplitOrientation.HORIZONTAL]
+        else:
+            orientations_to_try = [SplitOrientation.HORIZONTAL, SplitOrientation.VERTICAL]
+
+        for orientation in orientations_to_try:
+            valid_ratios = self._find_valid_ratios(parent_component, orientation, num_splits)
+            if valid_ratios:
+                return split_by_ratio(parent_component, valid_ratios, orientation)
+
+        return split_hold(parent_component)
+
+    def _apply_align(self, parent_component: Component, num_splits: int) -> List[Component]:
+        """[行為2] 執行分割後對齊操作 (策略二：使用數學限制法確保縮放合規)"""
+        # 1. 隨機選擇對齊模式
+        align_mode = random.choice(list(AlignmentMode))
+        
+        # 2. 根據您修正後的規則，決定分割方向
+        if align_mode in [AlignmentMode.TOP, AlignmentMode.BOTTOM, AlignmentMode.CENTER_H]:
+            required_orientation = SplitOrientation.VERTICAL
+        else:
+            required_orientation = SplitOrientation.HORIZONTAL
+
+        # 3. 初始分割
+        valid_ratios = self._find_valid_ratios(parent_component, required_orientation, num_splits)
+        if not valid_ratios:
+            return split_hold(parent_component)
+        
+        sub_components = split_by_ratio(parent_component, valid_ratios, required_orientation)
+
+        # 4. 為每個子元件計算有效的縮放範圍，並從中生成縮放因子
+        scale_factors = []
+        min_ratio_bound, max_ratio_bound = self.w_h_ratio_bound
+        min_scale_bound, max_scale_bound = self.align_scale_factor_range
+
+        for comp in sub_components:
+            original_ratio = comp.w_h_ratio()
+            
+            if align_mode in [AlignmentMode.TOP, AlignmentMode.BOTTOM, AlignmentMode.CENTER_H]:
+                # 改變 height，計算 scale 的有效數學邊界
+                valid_min_s = original_ratio / max_ratio_bound
+                valid_max_s = original_ratio / min_ratio_bound
+            else:
+                # 改變 width，計算 scale 的有效數學邊界
+                valid_min_s = min_ratio_bound / original_ratio
+                valid_max_s = max_ratio_bound / original_ratio
+
+            # 取【數學邊界】和【超參數邊界】的交集，確保縮放不會太誇張
+            final_min_s = max(valid_min_s, min_scale_bound)
+            final_max_s = min(valid_max_s, max_scale_bound)
+            
+            # 如果有效範圍不存在，則使用一個安全的預設值
+            if final_min_s > final_max_s:
+                scale = 1.0 
+            else:
+                scale = random.uniform(final_min_s, final_max_s)
+            
+            scale_factors.append(scale)
+
+        # 5. 執行對齊
+        return align_components(sub_components, scale_factors, align_mode)
+
+    def _process_single_component(self, parent_component: Component) -> Tuple[List[Component], SymmetryAxis]:
+        """
+        [調度中心] 根據規則決策，並呼叫對應的處理函式。
+        回傳子元件與對稱軸 (非對稱分割時為 None)。
+        """
+        # --- << 新增的對稱決策 >> ---
+        # 1. 最高優先級：根據機率決定是否執行對稱分割
+        if random.random() < self.symmetric_split_probability:
+            return self._apply_adaptive_symmetric_split(parent_component)
+        
+        # --- 原有的邏輯 ---
+        # 2. 如果未觸發對稱分割，則執行原有的分割或對齊邏輯
+        num_splits = random.randint(*self.num_splits_range)
+        
+        if num_splits > self.force_align_threshold:
+            return self._apply_align(parent_component, num_splits), None
+        else:
+            if random.random() < self.split_only_probability:
+                return self._apply_split(parent_component, num_splits), None
+            else:
+                return self._apply_align(parent_component, num_splits), None
+
+    def generate(self, components: List[Component], symmetry: SymmetryRegistry) -> List[Component]:
+        """
+        [新版] 處理元件列表，並能為三元對稱結構中的側邊元件正確配對。
+        對稱配對會登錄到傳入的 SymmetryRegistry (由登錄表統一配發群組 ID)。
+        """
+        all_results = []
+        relation_id = 0
+
+        for component in components:
+            processed_sub_components, symmetry_axis = self._process_single_component(component)
+            
+            # --- << 新增：後驗證邏輯 >> ---
+            is_valid = True
+            min_r, max_r = self.w_h_ratio_bound
+            for sub_comp in processed_sub_components:
+                # 檢查每個子元件的長寬比
+                if not (min_r <= sub_comp.w_h_ratio() <= max_r):
+                    # print(f"⚠️  - 撤銷操作：子元件長寬比 ({sub_comp.w_h_ratio():.2f}) 超出範圍。")
+                    is_valid = False
+                    break
+            
+            if not is_valid:
+                # 如果任何一個子元件不合格，則撤銷整個操作，改為 hold
+                processed_sub_components = split_hold(component)
+
+            # --- << 後驗證結束 >> ---
+
+            # --- << 優化後的對稱標記邏輯 >> ---
+            # 情況 A: 任何情況下，只要產生了成對的對稱元件
+            is_symmetric_pair = (symmetry_axis is not None and len(processed_sub_components) == 2 and 
+                                processed_sub_components[0].generate_rule in ["symmetric_1", "symmetric_adaptive_side"])
+            
+            # 情況 B: 三明治分割且保留了中間元件
+            is_adaptive_trio = (symmetry_axis is not None and len(processed_sub_components) == 3 and 
+                                processed_sub_components[0].generate_rule == "symmetric_adaptive_side")
+
+            if is_symmetric_pair or is_adaptive_trio:
+                symmetry.register_pair(processed_sub_components[0], processed_sub_components[-1], symmetry_axis)
+            
+            # (其餘邏輯不變)
+            for sub_comp in processed_sub_components:
+                sub_comp.level = self.level
+                sub_comp.relation_id = relation_id
+            all_results.extend(processed_sub_components)
+            relation_id += 1
+            component.sub_components = processed_sub_components
+            
+        return all_results
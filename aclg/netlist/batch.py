@@ -0,0 +1,288 @@
+# aclg/netlist/batch.py
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+from aclg.dataclass.symmetry import SymmetryRegistry
+from aclg.netlist.generator import NetlistGenerator, _PAIR_BLOCK_SIZE
+
+# 單一佈局的亂數狀態：(random.getstate(), np.random.get_state())，或是一個種子 (等同先呼叫 random.seed / np.random.seed)
+RngState = Union[int, Tuple[Any, Any]]
+
+
+def capture_rng_state() -> Tuple[Any, Any]:
+    """擷取目前 `random` 與 `np.random` 的全域狀態 (例如在 GapFiller 之後、Netlist 之前)。"""
+    return random.getstate(), np.random.get_state()
+
+
+def _layout_streams(rng_state: RngState) -> Tuple[np.random.RandomState, np.random.RandomState]:
+    """
+    將單一佈局的亂數狀態轉成兩個獨立的 RandomState：
+    一個重現 `random.random()` 的序列 (兩者皆以 MT19937 的兩個 32-bit 輸出組成同一個 53-bit 浮點數)，
+    一個重現 `np.random` 的序列 (引腳抽樣)。
+    """
+    if isinstance(rng_state, tuple):
+        python_state, numpy_state = rng_state
+    else:
+        python_state = random.Random(rng_state).getstate()
+        numpy_state = np.random.RandomState(rng_state).get_state()
+    python_stream = np.random.RandomState()
+    python_stream.set_state(('MT19937', np.array(python_state[1][:-1], dtype=np.uint32), python_state[1][-1]))
+    numpy_stream = np.random.RandomState()
+    numpy_stream.set_state(numpy_state)
+    return python_stream, numpy_stream
+
+
+class BatchedNetlistEngine:
+    """
+    跨佈局的批次 Netlist 產生器，適用於大量的小佈局 (每個 20–80 個葉元件)。
+
+    所有佈局的引腳打包成連續的扁平陣列 (以 CSR 偏移區分佈局)，機率邊抽樣、K-近鄰補連與最終橋接
+    都以整批的向量化運算完成，取代 `NetlistGenerator.generate` 中逐對、逐引腳的 Python 迴圈。
+
+    每個佈局的結果與在相同亂數狀態下呼叫 `NetlistGenerator.generate` 完全相同：
+    `random.random()` / `random.choices` 的序列以載入相同 MT19937 狀態的 RandomState 重現，
+    K-近鄰補連的先後相依性則以「每輪處理每個佈局的下一個未連接引腳」的方式保留。
+    """
+    def __init__(self, generator: NetlistGenerator):
+        self.generator = generator
+        self._pair_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _upper_pairs(self, num_pins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(i < j) 的引腳對，依 i 再依 j 排序 (與逐對迴圈的抽樣順序相同)。"""
+        if num_pins not in self._pair_cache:
+            self._pair_cache[num_pins] = np.triu_indices(num_pins, 1)
+        return self._pair_cache[num_pins]
+
+    def generate(self, layouts: Sequence[Tuple[List[Component], Optional[SymmetryRegistry]]],
+                 rng_states: Sequence[RngState]) -> List[Netlist]:
+        """
+        Args:
+            layouts: 每個佈局的 (葉元件列表, 對稱登錄表)。
+            rng_states: 每個佈局的種子，或以 `capture_rng_state` 擷取的亂數狀態。
+
+        Returns:
+            每個佈局的 Netlist，與 `random.seed(s); np.random.seed(s); generator.generate(...)` (或還原擷取的狀態後呼叫) 的結果相同。
+        """
+        if len(layouts) != len(rng_states):
+            raise ValueError(f"佈局數量 ({len(layouts)}) 與亂數狀態數量 ({len(rng_states)}) 必須相同。")
+        num_layouts = len(layouts)
+        if num_layouts == 0:
+            return []
+        streams = [_layout_streams(state) for state in rng_states]
+        python_streams = [s[0] for s in streams]
+
+        # 1. 各佈局的引腳 (佈局內已向量化)，打包成扁平陣列
+        pin_coords_list, pin_owner_list = [], []
+        for (components, symmetry), (_, numpy_stream) in zip(layouts, streams):
+            if components:
+                coords, owner = self.generator.pin_synthesizer.synthesize(components, symmetry, rng=numpy_stream)
+            else:
+                coords, owner = np.zeros((0, 2), dtype=np.float64), np.zeros(0, dtype=np.int32)
+            pin_coords_list.append(coords)
+            pin_owner_list.append(owner)
+        num_components = np.array([len(components) for components, _ in layouts], dtype=np.int64)
+        num_pins = np.array([len(c) for c in pin_coords_list], dtype=np.int64)
+        component_offsets = np.concatenate([[0], np.cumsum(num_components)])
+        pin_offsets = np.concatenate([[0], np.cumsum(num_pins)])
+        pin_coords = np.concatenate(pin_coords_list)
+        pin_layout = np.repeat(np.arange(num_layouts), num_pins)
+        pin_owner = np.concatenate(pin_owner_list).astype(np.int64) + component_offsets[pin_layout]
+
+        # 2~4. 三個階段的邊 (全域引腳索引)，各自依佈局排列
+        prob_edges = self._probabilistic_edges(pin_coords, pin_owner, pin_layout, num_pins, pin_offsets, python_streams)
+        knn_edges = self._connect_unconnected_pins(pin_coords, pin_owner, pin_layout, num_pins, pin_offsets,
+                                                   prob_edges, python_streams)
+        bridge_edges = self._bridge_components(pin_coords, pin_owner, pin_layout, num_components, component_offsets,
+                                               np.concatenate([prob_edges, knn_edges]))
+        print(f"[*] 批次產生 {num_layouts} 個佈局的 Netlist：機率邊 {len(prob_edges)} 條、"
+              f"補連 {len(knn_edges)} 條、橋接 {len(bridge_edges)} 條。")
+
+        # 5. 依 (佈局, 階段) 穩定排序後拆回各佈局的區域索引
+        all_edges = np.concatenate([prob_edges, knn_edges, bridge_edges])
+        stage = np.repeat([0, 1, 2], [len(prob_edges), len(knn_edges), len(bridge_edges)])
+        edge_layout = pin_layout[all_edges[:, 0]] if len(all_edges) else np.zeros(0, dtype=np.int64)
+        order = np.lexsort((stage, edge_layout))
+        all_edges, edge_layout = all_edges[order], edge_layout[order]
+        edge_offsets = np.concatenate([[0], np.cumsum(np.bincount(edge_layout, minlength=num_layouts))])
+        bridge_layout = pin_layout[bridge_edges[:, 0]] if len(bridge_edges) else np.zeros(0, dtype=np.int64)
+        num_bridges = np.bincount(bridge_layout, minlength=num_layouts)
+
+        netlists = []
+        for b in range(num_layouts):
+            if num_components[b] == 0:
+                netlists.append(Netlist())
+                continue
+            p0, p1 = pin_offsets[b], pin_offsets[b + 1]
+            netlists.append(Netlist(
+                pin_coords=pin_coords[p0:p1],
+                pin_to_component=pin_owner[p0:p1] - component_offsets[b],
+                edges=all_edges[edge_offsets[b]:edge_offsets[b + 1]] - p0,
+                num_bridge_edges=int(num_bridges[b])
+            ))
+        return netlists
+
+    def _probabilistic_edges(self, pin_coords: np.ndarray, pin_owner: np.ndarray, pin_layout: np.ndarray, num_pins: np.ndarray,
+                             pin_offsets: np.ndarray, python_streams: List[np.random.RandomState]) -> np.ndarray:
+        """整批佈局的機率邊：佈局內所有 (i < j) 的跨元件引腳對，依序從各佈局自己的序列抽樣。"""
+        gen = self.generator
+        kept_blocks = []
+        num_layouts = len(num_pins)
+        start = 0
+        while start < num_layouts:
+            # 以累計配對數量切分批次，限制暫存陣列大小
+            end, total_pairs = start, 0
+            while end < num_layouts and (end == start or total_pairs + num_pins[end] ** 2 // 2 <= _PAIR_BLOCK_SIZE):
+                total_pairs += num_pins[end] ** 2 // 2
+                end += 1
+            i_parts, j_parts = [], []
+            for b in range(start, end):
+                i_loc, j_loc = self._upper_pairs(int(num_pins[b]))
+                i_parts.append(i_loc + pin_offsets[b])
+                j_parts.append(j_loc + pin_offsets[b])
+            i_idx, j_idx = np.concatenate(i_parts), np.concatenate(j_parts)
+            cross = pin_owner[i_idx] != pin_owner[j_idx]
+            i_idx, j_idx = i_idx[cross], j_idx[cross]
+
+            # 各佈局的抽樣數量 = 其跨元件引腳對數量
+            counts = np.bincount(pin_layout[i_idx] - start, minlength=end - start)
+            draws = np.concatenate([python_streams[b].random_sample(counts[b - start]) for b in range(start, end)])
+            delta = np.abs(pin_coords[i_idx] - pin_coords[j_idx])
+            prob = np.minimum(gen.gamma * np.exp(-(delta[:, 0] + delta[:, 1]) / gen.s), gen.max_p)
+            keep = draws < prob
+            kept_blocks.append(np.stack([i_idx[keep], j_idx[keep]], axis=1))
+            start = end
+        return np.concatenate(kept_blocks).astype(np.int64)
+
+    def _connect_unconnected_pins(self, pin_coords: np.ndarray, pin_owner: np.ndarray, pin_layout: np.ndarray,
+                                  num_pins: np.ndarray, pin_offsets: np.ndarray, edges: np.ndarray,
+                                  python_streams: List[np.random.RandomState]) -> np.ndarray:
+        """
+        整批佈局的 K-近鄰補連。每個未連接引腳的候選者與累積權重先一次算好 (與先前的選擇無關)；
+        之後每一輪為每個佈局處理其下一個未連接引腳，保留逐引腳迴圈的跳過規則與抽樣順序。
+        """
+        k_nearest = self.generator.k_nearest
+        connected = np.zeros(len(pin_coords), dtype=bool)
+        connected[edges.ravel()] = True
+        unconnected = np.flatnonzero(~connected)
+        if not len(unconnected):
+            return np.zeros((0, 2), dtype=np.int64)
+
+        # 1. 候選者：同一佈局中其他元件的引腳 (以佈局最大引腳數補齊)
+        u_layout = pin_layout[unconnected]
+        max_pins = int(num_pins[u_layout].max())
+        cols = pin_offsets[u_layout][:, None] + np.arange(max_pins)[None, :]
+        in_layout = np.arange(max_pins)[None, :] < num_pins[u_layout][:, None]
+        cols = np.where(in_layout, cols, 0)
+        valid = in_layout & (pin_owner[cols] != pin_owner[unconnected][:, None])
+        dx = pin_coords[cols, 0] - pin_coords[unconnected, 0][:, None]
+        dy = pin_coords[cols, 1] - pin_coords[unconnected, 1][:, None]
+        dist = np.where(valid, np.sqrt(dx ** 2 + dy ** 2), np.inf)
+        top_k = np.argsort(dist, axis=1, kind='stable')[:, :k_nearest]
+        num_candidates = np.minimum(valid.sum(axis=1), k_nearest)
+        top_cols = np.take_along_axis(cols, top_k, axis=1)
+        in_top = np.arange(top_k.shape[1])[None, :] < num_candidates[:, None]
+        weights = np.where(in_top, 1.0 / (np.take_along_axis(dist, top_k, axis=1) + 1e-9), 0.0)
+        cum_weights = np.where(in_top, np.cumsum(weights, axis=1), np.inf)
+        totals = cum_weights[np.arange(len(unconnected)), np.maximum(num_candidates - 1, 0)]
+
+        # 2. 每個佈局預先抽出最多「未連接引腳數」個亂數 (實際只使用前面需要的部分)
+        layout_ids, u_start, u_count = np.unique(u_layout, return_index=True, return_counts=True)
+        draws = [python_streams[b].random_sample(n) for b, n in zip(layout_ids, u_count)]
+        used = np.zeros(len(layout_ids), dtype=np.int64)
+
+        # 3. 逐輪處理：第 t 輪處理每個佈局的第 t 個未連接引腳
+        new_edges = []
+        for t in range(int(u_count.max())):
+            active = np.flatnonzero(u_count > t)
+            rows = u_start[active] + t
+            pins = unconnected[rows]
+            take = ~connected[pins] & (num_candidates[rows] > 0)
+            active, rows, pins = active[take], rows[take], pins[take]
+            if not len(rows):
+                continue
+            x = np.array([draws[a][used[a]] for a in active]) * totals[rows]
+            used[active] += 1
+            choice = np.minimum((cum_weights[rows] <= x[:, None]).sum(axis=1), num_candidates[rows] - 1)
+            partners = top_cols[rows, choice]
+            connected[pins] = True
+            connected[partners] = True
+            new_edges.append(np.stack([pins, partners], axis=1))
+        if not new_edges:
+            return np.zeros((0, 2), dtype=np.int64)
+        # 每輪內依佈局排列；跨輪依佈局穩定排序後即為各佈局的處理順序
+        new_edges = np.concatenate(new_edges)
+        return new_edges[np.argsort(pin_layout[new_edges[:, 0]], kind='stable')]
+
+    def _bridge_components(self, pin_coords: np.ndarray, pin_owner: np.ndarray, pin_layout: np.ndarray,
+                           num_components: np.ndarray, component_offsets: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """
+        整批佈局的最終橋接。以最小標籤傳播找出元件群 (群的順序 = 最小元件索引的順序，與 BFS 相同)，
+        第 k 群以與前 k 群所有引腳之間最短的引腳對橋接 (同距離時取前 k 群的引腳索引最小者，再取第 k 群的引腳索引最小者)。
+        """
+        total_components = int(component_offsets[-1])
+        labels = np.arange(total_components)
+        if len(edges):
+            comp_edges = pin_owner[edges]
+            while True:
+                smaller = np.minimum(labels[comp_edges[:, 0]], labels[comp_edges[:, 1]])
+                updated = labels.copy()
+                np.minimum.at(updated, comp_edges[:, 0], smaller)
+                np.minimum.at(updated, comp_edges[:, 1], smaller)
+                updated = updated[updated]
+                if np.array_equal(updated, labels):
+                    break
+                labels = updated
+
+        # 每個元件所屬群在其佈局中的順位
+        component_layout = np.repeat(np.arange(len(num_components)), num_components)
+        group_labels = np.unique(labels)
+        group_rank = np.arange(len(group_labels)) - np.searchsorted(group_labels, component_offsets[component_layout[group_labels]])
+        rank = group_rank[np.searchsorted(group_labels, labels)]
+        pin_rank = rank[pin_owner]
+
+        needs_bridge = np.zeros(len(num_components), dtype=bool)
+        needs_bridge[component_layout[rank > 0]] = True
+        layouts_to_bridge = np.flatnonzero(needs_bridge)
+        if not len(layouts_to_bridge):
+            return np.zeros((0, 2), dtype=np.int64)
+
+        pin_offsets = np.concatenate([[0], np.cumsum(np.bincount(pin_layout, minlength=len(num_components)))])
+        layout_pins = np.diff(pin_offsets)
+        bridges = []
+        start = 0
+        while start < len(layouts_to_bridge):
+            # 以 (佈局數 × 最大引腳數²) 切分批次
+            end = start + 1
+            while (end < len(layouts_to_bridge) and
+                   (end + 1 - start) * int(layout_pins[layouts_to_bridge[start:end + 1]].max()) ** 2 <= _PAIR_BLOCK_SIZE):
+                end += 1
+            chunk = layouts_to_bridge[start:end]
+            max_pins = int(layout_pins[chunk].max())
+            local = np.arange(max_pins)
+            valid_pin = local[None, :] < layout_pins[chunk][:, None]
+            idx = np.where(valid_pin, pin_offsets[chunk][:, None] + local[None, :], 0)
+            ranks = np.where(valid_pin, pin_rank[idx], -1)
+            x, y = pin_coords[idx, 0], pin_coords[idx, 1]
+            # dist[b, p, q]：p 屬於較前的群、q 屬於第 rank[q] 群
+            dx = x[:, :, None] - x[:, None, :]
+            dy = y[:, :, None] - y[:, None, :]
+            dist = np.sqrt(dx ** 2 + dy ** 2)
+            allowed = (ranks[:, :, None] >= 0) & (ranks[:, :, None] < ranks[:, None, :])
+            dist = np.where(allowed, dist, np.inf)
+            best_p = np.argmin(dist, axis=1)
+            best_d = np.take_along_axis(dist, best_p[:, None, :], axis=1)[:, 0, :]
+
+            b_idx, q_idx = np.nonzero((ranks > 0) & np.isfinite(best_d))
+            p_idx = best_p[b_idx, q_idx]
+            q_rank = ranks[b_idx, q_idx]
+            order = np.lexsort((q_idx, p_idx, best_d[b_idx, q_idx], q_rank, b_idx))
+            b_idx, q_idx, p_idx, q_rank = b_idx[order], q_idx[order], p_idx[order], q_rank[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (b_idx[1:] != b_idx[:-1]) | (q_rank[1:] != q_rank[:-1])
+            bridges.append(np.stack([idx[b_idx[first], p_idx[first]], idx[b_idx[first], q_idx[first]]], axis=1))
+            start = end
+        return np.concatenate(bridges).astype(np.int64)
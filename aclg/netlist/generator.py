@@ -0,0 +1,299 @@
+# aclg/netlist/generator.py
+import math
+import random
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+from aclg.dataclass.symmetry import SymmetryRegistry
+from aclg.netlist.pins import BatchedPinSynthesizer
+
+# 機率邊的 O(P^2) 配對以列區塊處理，限制單次配置的暫存陣列大小
+_PAIR_BLOCK_SIZE = 1 << 20
+
+# 遠距離門檻的連線機率：局部修補時，連線機率高於此值的引腳對逐對抽樣，其餘 (遠距離) 引腳對以稀疏抽樣處理
+EDGE_PROBABILITY_EPSILON = 1e-2
+
+def edge_distance_threshold(scale: float, gamma: float, probability: float) -> float:
+    """回傳連線機率 gamma * exp(-d / scale) 降到 probability 時的 L1 距離 d (gamma <= probability 時為 0)。"""
+    return scale * math.log(gamma / probability) if gamma > probability > 0 else 0.0
+
+class NetlistGenerator:
+    """
+    (最終版) 產生 Netlist，採用三階段策略確保：
+    1. 連接優先考慮距離近的 Pin (使用 K-近鄰權重隨機選擇增加多樣性)。
+    2. 所有 Pin 都有連接。
+    3. 所有元件最終形成一個單一連通圖。
+    4. [新增] 大元件的 Pin 數量不超過總元件數的 1.5 倍。
+
+    所有階段都直接操作 `Netlist` 的索引陣列 (引腳座標、引腳所屬元件、邊的引腳索引對)，
+    不再以座標作為字典鍵值，因此重合的引腳也會被視為不同的引腳。
+    """
+    def __init__(self,
+                 pin_distribution_rules: Dict[str, Any] = None,
+                 edge_scale_param: float = 15.0,
+                 edge_gamma_multiplier: float = 0.05,
+                 max_edge_prob: float = 0.9,
+                 k_nearest_neighbors: int = 5,
+                 pin_count_tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                 edge_cutoff_distance: float = None):
+        
+        # Pin 數量分佈規則只由 BatchedPinSynthesizer 使用
+        rules = pin_distribution_rules or {}
+        base_probs = rules.get('base_probabilities', {})
+        self.pin_synthesizer = BatchedPinSynthesizer(
+            prob_2_pin=base_probs.get('2_pin', 0.55),
+            prob_3_pin=base_probs.get('3_pin', 0.10),
+            prob_4_pin=base_probs.get('4_pin', 0.30),
+            large_comp_area_threshold=rules.get('large_comp_area_threshold', 1000.0),
+            large_comp_high_pin_prob=rules.get('large_comp_high_pin_prob', 0.80),
+            large_pin_count_range=tuple(rules.get('large_pin_count_range', [5, 10]))
+        )
+        if pin_count_tables:
+            self.pin_synthesizer.load_tables(pin_count_tables)
+
+        self.s = edge_scale_param
+        self.gamma = edge_gamma_multiplier
+        self.max_p = max_edge_prob
+        self.k_nearest = k_nearest_neighbors
+        # 超過此 L1 距離的引腳對連線機率不超過 EDGE_PROBABILITY_EPSILON (編譯好的設定會直接傳入)
+        if edge_cutoff_distance is None:
+            edge_cutoff_distance = edge_distance_threshold(self.s, self.gamma, EDGE_PROBABILITY_EPSILON)
+        self.edge_cutoff_distance = edge_cutoff_distance
+    
+    def _generate_pins_for_components(self, components: List[Component], symmetry: SymmetryRegistry = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        為所有元件產生引腳座標 (批次抽樣，見 `BatchedPinSynthesizer`)。
+
+        Returns:
+            (pin_coords, pin_to_component)：引腳依元件順序連續排列的 (P, 2) 座標陣列，
+            以及 (P,) int32 的引腳所屬元件索引。
+        """
+        return self.pin_synthesizer.synthesize(components, symmetry)
+
+    def _generate_probabilistic_edges(self, pin_coords: np.ndarray, pin_to_component: np.ndarray) -> np.ndarray:
+        """
+        對所有不同元件之間的引腳對 (i < j) 依 L1 距離計算連線機率並抽樣。
+        隨機數的抽取順序與逐對迴圈相同 (依 i 再依 j)，因此同一個種子會得到相同的結果。
+        """
+        num_pins = len(pin_coords)
+        kept_blocks = []
+        rows_per_block = max(1, _PAIR_BLOCK_SIZE // max(num_pins, 1))
+        for row_start in range(0, num_pins - 1, rows_per_block):
+            row_end = min(num_pins - 1, row_start + rows_per_block)
+            rows = np.arange(row_start, row_end)
+            i_idx = np.repeat(rows, num_pins - 1 - rows)
+            j_idx = np.concatenate([np.arange(r + 1, num_pins) for r in rows])
+            kept_blocks.append(self._sample_pair_edges(pin_coords, pin_to_component, i_idx, j_idx))
+
+        if not kept_blocks:
+            return np.zeros((0, 2), dtype=np.int32)
+        return np.concatenate(kept_blocks).astype(np.int32)
+
+    def _sample_pair_edges(self, pin_coords: np.ndarray, pin_to_component: np.ndarray, i_idx: np.ndarray, j_idx: np.ndarray) -> np.ndarray:
+        """捨棄同元件的引腳對後，依 L1 距離計算連線機率，並依候選順序逐一以 random.random() 抽樣。"""
+        cross = pin_to_component[i_idx] != pin_to_component[j_idx]
+        i_idx, j_idx = i_idx[cross], j_idx[cross]
+
+        delta = np.abs(pin_coords[i_idx] - pin_coords[j_idx])
+        prob = np.minimum(self.gamma * np.exp(-(delta[:, 0] + delta[:, 1]) / self.s), self.max_p)
+        draws = np.fromiter((random.random() for _ in range(len(prob))), dtype=np.float64, count=len(prob))
+        keep = draws < prob
+        return np.stack([i_idx[keep], j_idx[keep]], axis=1)
+
+    def _generate_local_probabilistic_edges(self, pin_coords: np.ndarray, pin_to_component: np.ndarray, new_pins: np.ndarray) -> np.ndarray:
+        """
+        只對至少一端是新引腳的引腳對抽樣機率邊 (局部修補用)，每一對的連線機率與 `generate` 相同：
+
+        - 近距離 (L1 <= edge_cutoff_distance) 的引腳對：以邊長為門檻的網格分桶，只檢查新引腳周圍 3x3 格內的引腳，
+          逐對以 random.random() 抽樣。
+        - 遠距離的引腳對 (連線機率不超過 EDGE_PROBABILITY_EPSILON = ε)：以幾何分佈的間隔跳躍，
+          每一對以機率 ε 被提出，再以 p / ε 接受 (thinning)，因此仍是機率 p 的獨立抽樣，
+          但只需要約 ε × 遠距離配對數的亂數。
+
+        成本為新引腳數 × 鄰近引腳數，加上 ε × 新引腳數 × 總引腳數；邊的分佈與完整重新抽樣相同，
+        但亂數的抽取順序不同，因此與以相同種子呼叫 `generate` 的結果不會逐位元相同。
+        """
+        num_pins = len(pin_coords)
+        if not len(new_pins):
+            return np.zeros((0, 2), dtype=np.int32)
+        is_new = np.zeros(num_pins, dtype=bool)
+        is_new[new_pins] = True
+        cutoff = self.edge_cutoff_distance
+        # gamma <= ε 時所有引腳對都屬於遠距離 (門檻設為負值，使近距離集合為空)
+        if cutoff <= 0:
+            cutoff = -1.0
+
+        # --- 近距離：網格分桶後逐對抽樣 ---
+        i_blocks, j_blocks = [], []
+        if cutoff > 0:
+            cells = np.floor(pin_coords / cutoff).astype(np.int64)
+            keys, bucket_of = np.unique(cells, axis=0, return_inverse=True)
+            bucket_of = bucket_of.reshape(-1)
+            by_bucket = np.argsort(bucket_of, kind='stable')
+            bounds = np.searchsorted(bucket_of[by_bucket], np.arange(len(keys) + 1))
+            buckets = {tuple(key): by_bucket[bounds[b]:bounds[b + 1]] for b, key in enumerate(keys.tolist())}
+            empty = np.zeros(0, dtype=np.int64)
+            for i in new_pins:
+                cx, cy = cells[i]
+                candidates = np.sort(np.concatenate([buckets.get((cx + dx, cy + dy), empty)
+                                                     for dx in (-1, 0, 1) for dy in (-1, 0, 1)]))
+                # 新引腳之間的配對只由索引較小的一端提出
+                candidates = candidates[~is_new[candidates] | (candidates > i)]
+                candidates = candidates[np.abs(pin_coords[candidates] - pin_coords[i]).sum(axis=1) <= cutoff]
+                i_blocks.append(np.full(len(candidates), i, dtype=np.int64))
+                j_blocks.append(candidates)
+        near_edges = self._sample_pair_edges(pin_coords, pin_to_component,
+                                             np.concatenate(i_blocks or [np.zeros(0, dtype=np.int64)]),
+                                             np.concatenate(j_blocks or [np.zeros(0, dtype=np.int64)]))
+
+        # --- 遠距離：在 (新引腳, 任一引腳) 的索引空間中以機率 ε 提出候選，再以 p / ε 接受 ---
+        epsilon = EDGE_PROBABILITY_EPSILON
+        num_slots = len(new_pins) * num_pins
+        log_skip = math.log1p(-epsilon)
+        proposals, slot = [], -1
+        while True:
+            slot += 1 + int(math.log(1.0 - random.random()) / log_skip)
+            if slot >= num_slots:
+                break
+            proposals.append(slot)
+        proposals = np.asarray(proposals, dtype=np.int64)
+        i_idx, j_idx = new_pins[proposals // num_pins], proposals % num_pins
+        distance = np.abs(pin_coords[i_idx] - pin_coords[j_idx]).sum(axis=1)
+        valid = ((pin_to_component[i_idx] != pin_to_component[j_idx]) & (distance > cutoff) &
+                 (~is_new[j_idx] | (j_idx > i_idx)))
+        i_idx, j_idx, distance = i_idx[valid], j_idx[valid], distance[valid]
+        prob = np.minimum(self.gamma * np.exp(-distance / self.s), self.max_p)
+        draws = np.fromiter((random.random() for _ in range(len(prob))), dtype=np.float64, count=len(prob))
+        keep = draws < prob / epsilon
+        far_edges = np.stack([i_idx[keep], j_idx[keep]], axis=1)
+        return np.concatenate([near_edges, far_edges]).astype(np.int32)
+
+    def _ensure_all_pins_connected(self, pin_coords: np.ndarray, pin_to_component: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """為每個尚未連接的引腳，從 K 個最近的他元件引腳中依距離倒數加權選一個連接。"""
+        num_pins = len(pin_coords)
+        if num_pins == 0: return edges
+        connected = np.zeros(num_pins, dtype=bool)
+        connected[edges.ravel()] = True
+        unconnected_pins = np.flatnonzero(~connected)
+        if not len(unconnected_pins): return edges
+        print(f"[*] 發現 {len(unconnected_pins)} 個未連接的 Pin，進行多樣化局部連接...")
+        new_edges = []
+        for p1 in unconnected_pins:
+            if connected[p1]: continue
+            candidates = np.flatnonzero(pin_to_component != pin_to_component[p1])
+            if not len(candidates): continue
+            delta = pin_coords[candidates] - pin_coords[p1]
+            dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+            top_k = np.argsort(dist, kind='stable')[:self.k_nearest]
+            weights = (1.0 / (dist[top_k] + 1e-9)).tolist()
+            chosen_p2 = random.choices(candidates[top_k].tolist(), weights=weights, k=1)[0]
+            new_edges.append((p1, chosen_p2))
+            connected[p1] = True; connected[chosen_p2] = True
+        if not new_edges: return edges
+        return np.concatenate([edges, np.array(new_edges, dtype=np.int32)])
+
+    def _ensure_single_connected_component(self, num_components: int, pin_coords: np.ndarray, pin_to_component: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """找出元件層級的連通分量，並以最短的引腳對逐一橋接到第一個分量。"""
+        if num_components < 2: return edges
+        comp_edges = pin_to_component[edges]
+        comp_edges = np.unique(np.concatenate([comp_edges, comp_edges[:, ::-1]]), axis=0)
+        starts = np.searchsorted(comp_edges[:, 0], np.arange(num_components + 1))
+        visited = np.zeros(num_components, dtype=bool)
+        components_groups = []
+        for i in range(num_components):
+            if visited[i]: continue
+            group, q = [], [i]
+            visited[i] = True
+            while q:
+                u = q.pop(0)
+                group.append(u)
+                for v in comp_edges[starts[u]:starts[u + 1], 1]:
+                    if not visited[v]: visited[v] = True; q.append(v)
+            components_groups.append(group)
+        if len(components_groups) <= 1:
+            print("[*] 所有元件已連通，無需橋接。")
+            return edges
+        print(f"[*] 發現 {len(components_groups)} 個獨立的元件群，開始最終橋接...")
+        in_main_group = np.zeros(num_components, dtype=bool)
+        in_main_group[components_groups[0]] = True
+        bridge_edges = []
+        for group_to_bridge in components_groups[1:]:
+            main_pins = np.flatnonzero(in_main_group[pin_to_component])
+            group_pins = np.flatnonzero(np.isin(pin_to_component, group_to_bridge))
+            if not len(main_pins) or not len(group_pins): continue
+            delta = pin_coords[main_pins][:, None, :] - pin_coords[group_pins][None, :, :]
+            dist = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+            u, v = np.unravel_index(np.argmin(dist), dist.shape)
+            bridge_edges.append((main_pins[u], group_pins[v]))
+            in_main_group[group_to_bridge] = True
+        if not bridge_edges: return edges
+        return np.concatenate([edges, np.array(bridge_edges, dtype=np.int32)])
+
+    def generate(self, components: List[Component], symmetry: SymmetryRegistry = None) -> Netlist:
+        if not components: return Netlist()
+        print(f"[*] 開始為 {len(components)} 個元件產生 Netlist...")
+        pin_coords, pin_to_component = self._generate_pins_for_components(components, symmetry)
+        edges = self._generate_probabilistic_edges(pin_coords, pin_to_component)
+        print(f"[*] 初始機率性產生了 {len(edges)} 條邊。")
+        edges = self._ensure_all_pins_connected(pin_coords, pin_to_component, edges)
+        num_unbridged = len(edges)
+        edges = self._ensure_single_connected_component(len(components), pin_coords, pin_to_component, edges)
+        print(f"[*] Netlist 產生完畢，最終總共有 {len(edges)} 條邊。")
+        return Netlist(pin_coords=pin_coords, pin_to_component=pin_to_component, edges=edges,
+                       num_bridge_edges=len(edges) - num_unbridged)
+
+    def patch(self, netlist: Netlist, old_components: List[Component], new_components: List[Component],
+              symmetry: SymmetryRegistry = None) -> Netlist:
+        """
+        局部修補 Netlist (例如只重新產生一個 L1 區塊的 L2 分解之後)。新舊葉元件以物件身分比對：
+
+        1. 只存在於舊列表的元件：移除其引腳與所有關聯的邊；其餘引腳與邊保留並依新的元件順序重新編號。
+        2. 只存在於新列表的元件：產生新的引腳 (Pin 數量上限依新的總元件數)。
+        3. 只對至少一端是新引腳的引腳對重新抽樣機率邊：近距離的引腳對逐對抽樣，遠距離的引腳對以稀疏抽樣處理
+           (見 `_generate_local_probabilistic_edges`；每一對的連線機率不變)。
+        4. 以與 `generate` 相同的兩個修復階段補上未連接的引腳，並橋接斷開的元件群。
+
+        逐對抽樣只涵蓋新引腳附近的引腳 (其餘只需約 EDGE_PROBABILITY_EPSILON 比例的亂數)；
+        修復階段仍會在全部引腳中搜尋最近鄰。
+        """
+        old_index = {id(c): i for i, c in enumerate(old_components)}
+        new_to_old = np.array([old_index.get(id(c), -1) for c in new_components], dtype=np.int64)
+        is_kept = new_to_old >= 0
+        added = np.flatnonzero(~is_kept)
+        old_to_new = np.full(len(old_components), -1, dtype=np.int64)
+        old_to_new[new_to_old[is_kept]] = np.flatnonzero(is_kept)
+        print(f"[*] 局部修補 Netlist：移除 {len(old_components) - int(is_kept.sum())} 個元件、新增 {len(added)} 個元件...")
+
+        # 1. 保留仍存在的元件的引腳，並為新增的元件產生引腳
+        kept_pins = np.flatnonzero(old_to_new[netlist.pin_to_component] >= 0)
+        added_coords, added_local = self.pin_synthesizer.synthesize(
+            [new_components[i] for i in added], symmetry, total_num_components=len(new_components))
+        owners = np.concatenate([old_to_new[netlist.pin_to_component[kept_pins]], added[added_local]])
+        coords = np.concatenate([netlist.pin_coords[kept_pins], added_coords])
+
+        # 2. 依新的元件順序重新排列 (引腳依所屬元件連續排列)，並建立舊引腳 → 新引腳的對照
+        order = np.argsort(owners, kind='stable')
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        pin_coords, pin_to_component = coords[order], owners[order].astype(np.int32)
+        old_pin_map = np.full(netlist.num_pins, -1, dtype=np.int64)
+        old_pin_map[kept_pins] = position[:len(kept_pins)]
+        new_pins = np.sort(position[len(kept_pins):])
+
+        # 3. 保留兩端都仍存在的邊，並只在變動區域附近補抽機率邊
+        mapped = old_pin_map[netlist.edges]
+        edges = mapped[(mapped >= 0).all(axis=1)].astype(np.int32)
+        local_edges = self._generate_local_probabilistic_edges(pin_coords, pin_to_component, new_pins)
+        print(f"[*] 保留 {len(edges)} 條既有的邊，局部機率性產生了 {len(local_edges)} 條邊。")
+        edges = np.concatenate([edges, local_edges])
+
+        # 4. 修復連通性
+        edges = self._ensure_all_pins_connected(pin_coords, pin_to_component, edges)
+        num_unbridged = len(edges)
+        edges = self._ensure_single_connected_component(len(new_components), pin_coords, pin_to_component, edges)
+        print(f"[*] Netlist 修補完畢，最終總共有 {len(edges)} 條邊。")
+        return Netlist(pin_coords=pin_coords, pin_to_component=pin_to_component, edges=edges,
+                       num_bridge_edges=len(edges) - num_unbridged)
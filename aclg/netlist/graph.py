@@ -0,0 +1,63 @@
+# aclg/netlist/graph.py
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+GRAPH_BLOCK_VERSION = 1
+
+
+def build_graph_block(
+        num_components: int,
+        edge_index: np.ndarray,
+        edge_offsets: np.ndarray,
+        pin_counts: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    建立 ML 輸出中的精簡圖區塊 (`graph`)，讓訓練端不必在每個 epoch 由 `basic_component_edge` 重建鄰接結構。
+
+    - `edge_src` / `edge_dst` / `edge_offset`: 與 `basic_component_edge` 同順序的邊陣列，偏移攤平為 (E*4,)。
+    - `csr_row_ptr` / `csr_col_index` / `csr_edge_id`: 無向鄰接的 CSR 表示 (每條邊在兩端各出現一次)，
+      元件 i 的鄰居為 `csr_col_index[csr_row_ptr[i]:csr_row_ptr[i+1]]`，對應的邊編號在 `csr_edge_id`。
+    - `degree`: 每個元件的關聯邊數 (= CSR 每列長度)；`pin_count`: 每個元件的引腳數。
+
+    Args:
+        num_components: 元件數量 N。
+        edge_index: (E, 2) 元件索引對。
+        edge_offsets: (E, 2, 2) 或 (E, 4) 兩端引腳的偏移。
+        pin_counts: (N,) 每個元件的引腳數；未提供時以關聯的邊端點數代替。
+    """
+    edge_index = np.asarray(edge_index, dtype=np.int64).reshape(-1, 2)
+    edge_offsets = np.asarray(edge_offsets, dtype=np.float64).reshape(-1, 4)
+    num_edges = len(edge_index)
+
+    # 每條邊在兩端各出現一次，穩定排序後同一列內依邊編號排列
+    rows = np.concatenate([edge_index[:, 0], edge_index[:, 1]])
+    cols = np.concatenate([edge_index[:, 1], edge_index[:, 0]])
+    edge_ids = np.concatenate([np.arange(num_edges), np.arange(num_edges)])
+    order = np.argsort(rows, kind='stable')
+    degree = np.bincount(rows, minlength=num_components)
+    row_ptr = np.concatenate([[0], np.cumsum(degree)])
+    if pin_counts is None:
+        pin_counts = degree
+
+    return {
+        "version": GRAPH_BLOCK_VERSION,
+        "num_nodes": int(num_components),
+        "num_edges": int(num_edges),
+        "edge_src": edge_index[:, 0].tolist(),
+        "edge_dst": edge_index[:, 1].tolist(),
+        "edge_offset": edge_offsets.reshape(-1).tolist(),
+        "csr_row_ptr": row_ptr.tolist(),
+        "csr_col_index": cols[order].tolist(),
+        "csr_edge_id": edge_ids[order].tolist(),
+        "degree": degree.tolist(),
+        "pin_count": np.asarray(pin_counts, dtype=np.int64).tolist()
+    }
+
+
+def graph_block_arrays(graph_block: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """將 JSON 中的圖區塊轉回 NumPy 陣列 (整數欄位為 int64，`edge_offset` 還原為 (E, 4) float32)。"""
+    arrays = {key: np.asarray(graph_block[key], dtype=np.int64)
+              for key in ("edge_src", "edge_dst", "csr_row_ptr", "csr_col_index", "csr_edge_id", "degree", "pin_count")}
+    arrays["edge_offset"] = np.asarray(graph_block["edge_offset"], dtype=np.float32).reshape(-1, 4)
+    return arrays
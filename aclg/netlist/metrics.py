@@ -0,0 +1,148 @@
+# aclg/netlist/metrics.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from aclg.dataclass.netlist import Netlist
+
+NETLIST_METRICS_VERSION = 1
+
+# 可用於生成時篩選 (netlist_metrics_settings.filters) 的純量指標
+NETLIST_METRICS = (
+    "num_pins",
+    "num_edges",
+    "hpwl",
+    "mean_edge_length",
+    "mean_edge_length_ratio",
+    "mean_degree",
+    "min_degree",
+    "max_degree",
+    "num_bridge_edges",
+    "bridge_edge_fraction",
+)
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def batch_netlist_metrics(netlists: Sequence[Netlist], num_components: Sequence[int],
+                          edge_scale_param: float) -> List[Dict[str, Any]]:
+    """
+    一次計算整批佈局的 Netlist 品質指標。所有佈局的邊先打包成扁平陣列，再以 bincount / reduceat 依佈局彙總，
+    不需要逐邊的 Python 迴圈。
+
+    每條邊都是 2-pin net，其 HPWL 即為兩端引腳的 L1 距離 (與連線機率所用的距離相同)：
+    - `hpwl`: 所有邊的 HPWL 總和；`mean_edge_length`: 平均每條邊的 HPWL；
+      `mean_edge_length_ratio`: mean_edge_length / edge_scale_param (連線機率的距離尺度)。
+    - `component_degree`: 每個元件的關聯邊數 (每條邊在兩端各計一次，與 ML 圖區塊的 degree 相同)，
+      以及其平均、最小與最大值。
+    - `num_bridge_edges` / `bridge_edge_fraction`: 連通性橋接補上的邊數及其佔全部邊的比例。
+
+    Args:
+        netlists: 每個佈局的 Netlist。
+        num_components: 每個佈局的葉元件數量 (沒有引腳的元件度數為 0)。
+        edge_scale_param: NetlistGenerator 的 edge_scale_param。
+    """
+    num_layouts = len(netlists)
+    if len(num_components) != num_layouts:
+        raise ValueError(f"Netlist 數量 ({num_layouts}) 與元件數量列表長度 ({len(num_components)}) 必須相同。")
+    if num_layouts == 0:
+        return []
+    num_components = np.asarray(num_components, dtype=np.int64)
+    num_pins = np.array([netlist.num_pins for netlist in netlists], dtype=np.int64)
+    num_edges = np.array([netlist.num_edges for netlist in netlists], dtype=np.int64)
+    num_bridges = np.array([netlist.num_bridge_edges for netlist in netlists], dtype=np.int64)
+    component_offsets = np.concatenate([[0], np.cumsum(num_components)])
+    edge_layout = np.repeat(np.arange(num_layouts), num_edges)
+
+    # --- 逐邊的 HPWL (L1 長度)，依佈局加總 ---
+    edge_coords = np.concatenate([netlist.edge_coordinates() for netlist in netlists]).reshape(-1, 2, 2)
+    edge_lengths = np.abs(edge_coords[:, 0] - edge_coords[:, 1]).sum(axis=1)
+    hpwl = np.bincount(edge_layout, weights=edge_lengths, minlength=num_layouts)
+    mean_edge_length = _safe_ratio(hpwl, num_edges)
+
+    # --- 元件度數：邊的兩端換成全域元件索引後一次 bincount ---
+    component_ends = np.concatenate([netlist.component_edges() for netlist in netlists]).reshape(-1, 2).astype(np.int64)
+    component_ends += component_offsets[edge_layout][:, None]
+    degree = np.bincount(component_ends.ravel(), minlength=int(component_offsets[-1]))
+    has_components = num_components > 0
+    min_degree = np.zeros(num_layouts, dtype=np.int64)
+    max_degree = np.zeros(num_layouts, dtype=np.int64)
+    if has_components.any():
+        starts = component_offsets[:-1][has_components]
+        min_degree[has_components] = np.minimum.reduceat(degree, starts)
+        max_degree[has_components] = np.maximum.reduceat(degree, starts)
+    mean_degree = _safe_ratio(2 * num_edges, num_components)
+    bridge_fraction = _safe_ratio(num_bridges, num_edges)
+
+    return [
+        {
+            "version": NETLIST_METRICS_VERSION,
+            "num_components": int(num_components[b]),
+            "num_pins": int(num_pins[b]),
+            "num_edges": int(num_edges[b]),
+            "hpwl": float(hpwl[b]),
+            "mean_edge_length": float(mean_edge_length[b]),
+            "mean_edge_length_ratio": float(mean_edge_length[b] / edge_scale_param),
+            "mean_degree": float(mean_degree[b]),
+            "min_degree": int(min_degree[b]),
+            "max_degree": int(max_degree[b]),
+            "num_bridge_edges": int(num_bridges[b]),
+            "bridge_edge_fraction": float(bridge_fraction[b]),
+            "component_degree": degree[component_offsets[b]:component_offsets[b + 1]].tolist()
+        }
+        for b in range(num_layouts)
+    ]
+
+
+def netlist_metrics(netlist: Netlist, num_components: int, edge_scale_param: float) -> Dict[str, Any]:
+    """單一佈局的 Netlist 品質指標 (欄位見 `batch_netlist_metrics`)。"""
+    return batch_netlist_metrics([netlist], [num_components], edge_scale_param)[0]
+
+
+def layout_dict_metrics(layout_data: Dict[str, Any], edge_scale_param: float) -> Dict[str, Any]:
+    """
+    由原始佈局 JSON 計算指標 (用於沒有附上 `netlist_metrics` 區塊的舊檔案)。
+    舊版的座標對邊格式沒有記錄橋接邊，其 bridge 相關指標一律為 0。
+    """
+    return netlist_metrics(Netlist.from_layout_dict(layout_data),
+                           len(layout_data.get("final_leaf_components", [])), edge_scale_param)
+
+
+class NetlistMetricsFilter:
+    """
+    生成時的 Netlist 品質篩選：每個指定的指標必須落在 [最小值, 最大值] 內 (None 表示該側不限，兩端皆包含)。
+    可直接以 `filter(layout["netlist_metrics"])` 判斷是否保留佈局。
+    """
+    def __init__(self, bounds: Dict[str, Tuple[Optional[float], Optional[float]]]):
+        unknown = sorted(set(bounds) - set(NETLIST_METRICS))
+        if unknown:
+            raise ValueError(f"未知的 Netlist 指標 {unknown}，可用的指標為 {list(NETLIST_METRICS)}。")
+        self.bounds = dict(bounds)
+
+    @classmethod
+    def from_config(cls, metrics_config) -> "NetlistMetricsFilter":
+        """由已編譯的 NetlistMetricsConfig (`aclg.pipeline.config`) 建立。"""
+        return cls({f.name: (f.minimum, f.maximum) for f in metrics_config.filters})
+
+    def _range_text(self, name: str) -> str:
+        minimum, maximum = self.bounds[name]
+        return f"[{'-inf' if minimum is None else f'{minimum:g}'}, {'inf' if maximum is None else f'{maximum:g}'}]"
+
+    def describe(self) -> List[str]:
+        return [f"{name} ∈ {self._range_text(name)}" for name in self.bounds]
+
+    def violations(self, metrics: Dict[str, Any]) -> List[str]:
+        """回傳不符合範圍的指標說明 (全部符合時為空列表)。"""
+        problems = []
+        for name, (minimum, maximum) in self.bounds.items():
+            value = metrics[name]
+            if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                problems.append(f"{name}={value:.4g} 不在 {self._range_text(name)} 內")
+        return problems
+
+    def __call__(self, metrics: Dict[str, Any]) -> bool:
+        return not self.violations(metrics)
@@ -0,0 +1,160 @@
+# aclg/netlist/pins.py
+import math
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.symmetry import SymmetryAxis, SymmetryRegistry
+
+class BatchedPinSynthesizer:
+    """
+    一次為整批元件產生引腳。
+
+    1. Pin 數量：將「2/3/4 pin + 多 pin 範圍」的規則展開成完整的類別分佈表，
+       分為「普通」與「大元件」兩類，並依總元件數 N 套用 `floor(1.5 × N)` 上限；
+       表格依 N 快取，所有元件的 Pin 數量以一次均勻亂數 + searchsorted 抽出。
+    2. Pin 座標：以一次 NumPy 呼叫抽出所有 (u, v) ∈ [0, 1)²，再依所屬元件的邊界縮放。
+    3. 對稱元件：slave 的引腳由 master 的引腳依登錄表記錄的對稱軸，以向量化的鏡射轉換得到。
+    """
+    def __init__(self,
+                 prob_2_pin: float = 0.55,
+                 prob_3_pin: float = 0.10,
+                 prob_4_pin: float = 0.30,
+                 large_comp_area_threshold: float = 1000.0,
+                 large_comp_high_pin_prob: float = 0.80,
+                 large_pin_count_range: Tuple[int, int] = (5, 10)):
+        self.base_probs = np.array([prob_2_pin, prob_3_pin, prob_4_pin], dtype=np.float64)
+        self.prob_large_pin = max(0.0, 1.0 - float(self.base_probs.sum()))
+        self.large_comp_area_threshold = large_comp_area_threshold
+        self.large_comp_high_pin_prob = large_comp_high_pin_prob
+        self.large_pin_count_range = tuple(large_pin_count_range)
+        self._table_cache: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def _large_pin_distribution(self, total_num_components: int) -> Dict[int, float]:
+        """多 Pin 數量的分佈：在 [min, min(max, 上限)] 間均勻；若上限比下限還小，則固定為上限。"""
+        max_allowed_pins = max(2, math.floor(total_num_components * 1.5))
+        min_pins_cfg, max_pins_cfg = self.large_pin_count_range
+        effective_max = min(max_pins_cfg, max_allowed_pins)
+        if effective_max < min_pins_cfg:
+            return {effective_max: 1.0}
+        span = effective_max - min_pins_cfg + 1
+        return {k: 1.0 / span for k in range(min_pins_cfg, effective_max + 1)}
+
+    @property
+    def table_saturation_count(self) -> int:
+        """總元件數達到此值後 `1.5 × N` 上限不再起作用，之後的 N 都共用同一張分佈表。"""
+        return max(1, math.ceil(self.large_pin_count_range[1] / 1.5))
+
+    def precompute_tables(self) -> Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """預先建好所有可能用到的分佈表 (N = 1 … table_saturation_count)，回傳 {N: tables}。"""
+        for total_num_components in range(1, self.table_saturation_count + 1):
+            self.pin_count_tables(total_num_components)
+        return dict(self._table_cache)
+
+    def load_tables(self, tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        """載入 precompute_tables 建好的分佈表 (例如由已編譯的設定檔提供)，之後不需再建表。"""
+        self._table_cache.update(tables)
+
+    def pin_count_tables(self, total_num_components: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        回傳 (values, normal_cdf, large_cdf)，供 searchsorted 抽樣。
+        同一個總元件數只會建表一次；超過 table_saturation_count 的 N 共用同一張表。
+        """
+        total_num_components = min(total_num_components, self.table_saturation_count)
+        if total_num_components in self._table_cache:
+            return self._table_cache[total_num_components]
+
+        large_dist = self._large_pin_distribution(total_num_components)
+        base_total = float(self.base_probs.sum())
+        normal_pmf, large_pmf = defaultdict(float), defaultdict(float)
+        for k, p in zip((2, 3, 4), self.base_probs):
+            normal_pmf[k] += p
+            large_pmf[k] += (1.0 - self.large_comp_high_pin_prob) * p / base_total
+        for k, p in large_dist.items():
+            normal_pmf[k] += self.prob_large_pin * p
+            large_pmf[k] += self.large_comp_high_pin_prob * p
+
+        values = np.array(sorted(set(normal_pmf) | set(large_pmf)), dtype=np.int64)
+        normal_cdf = np.cumsum([normal_pmf[k] for k in values])
+        large_cdf = np.cumsum([large_pmf[k] for k in values])
+        # 正規化，避免浮點誤差使最後一格小於 1 而抽不到
+        tables = (values, normal_cdf / normal_cdf[-1], large_cdf / large_cdf[-1])
+        self._table_cache[total_num_components] = tables
+        return tables
+
+    def sample_pin_counts(self, areas: np.ndarray, total_num_components: int, rng=np.random) -> np.ndarray:
+        """依元件面積分類，一次抽出所有元件的 Pin 數量。"""
+        values, normal_cdf, large_cdf = self.pin_count_tables(total_num_components)
+        draws = rng.random(len(areas))
+        is_large = np.asarray(areas) > self.large_comp_area_threshold
+        idx = np.where(is_large,
+                       np.searchsorted(large_cdf, draws, side='right'),
+                       np.searchsorted(normal_cdf, draws, side='right'))
+        return values[np.minimum(idx, len(values) - 1)]
+
+    def synthesize(self, components: List[Component], symmetry: SymmetryRegistry = None, rng=np.random,
+                   total_num_components: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        為所有元件產生引腳。
+
+        Args:
+            components: 葉元件列表。
+            symmetry: 佈局的對稱登錄表；若為 None，則由元件的 `symmetric_group_id` 重建。
+            rng: 具有 `random(size)` 方法的亂數來源 (`np.random`、`RandomState` 或 `Generator`)。
+            total_num_components: 佈局的總元件數 (決定 Pin 數量上限)；只為部分元件產生引腳時 (局部修補) 需指定，預設為 len(components)。
+
+        Returns:
+            (pin_coords, pin_to_component)：依元件順序連續排列的 (P, 2) float64 座標，
+            以及 (P,) int32 的引腳所屬元件索引。
+        """
+        num_components = len(components)
+        if num_components == 0:
+            return np.zeros((0, 2), dtype=np.float64), np.zeros(0, dtype=np.int32)
+
+        rects = np.array([[c.x, c.y, c.width, c.height] for c in components], dtype=np.float64)
+
+        # 對稱配對 (master 為索引較小者) 與登錄時記錄的對稱軸
+        if symmetry is None:
+            symmetry = SymmetryRegistry.from_components(components)
+        pairs, axes = symmetry.index_pairs(components)
+        source_of = np.arange(num_components)
+        source_of[pairs[:, 1]] = pairs[:, 0]
+        is_slave = source_of != np.arange(num_components)
+        sources = np.flatnonzero(~is_slave)
+
+        # 1. Pin 數量 (slave 沿用 master 的數量)
+        counts = np.zeros(num_components, dtype=np.int64)
+        counts[sources] = self.sample_pin_counts(rects[sources, 2] * rects[sources, 3],
+                                                 total_num_components or num_components, rng)
+        counts[is_slave] = counts[source_of[is_slave]]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        pin_to_component = np.repeat(np.arange(num_components, dtype=np.int32), counts)
+
+        # 2. 來源元件的座標一次抽出
+        source_pin_mask = ~is_slave[pin_to_component]
+        source_owner = pin_to_component[source_pin_mask]
+        uv = rng.random((len(source_owner), 2))
+        pin_coords = np.empty((len(pin_to_component), 2), dtype=np.float64)
+        owner_rects = rects[source_owner]
+        pin_coords[source_pin_mask, 0] = owner_rects[:, 0] - owner_rects[:, 2] / 2 + uv[:, 0] * owner_rects[:, 2]
+        pin_coords[source_pin_mask, 1] = owner_rects[:, 1] - owner_rects[:, 3] / 2 + uv[:, 1] * owner_rects[:, 3]
+
+        # 3. 依對稱軸向量化鏡射 slave 的引腳
+        if len(pairs):
+            masters, slaves = pairs[:, 0], pairs[:, 1]
+            pair_counts = counts[masters]
+            master_pins = np.concatenate([np.arange(offsets[m], offsets[m + 1]) for m in masters])
+            slave_pins = np.concatenate([np.arange(offsets[s], offsets[s + 1]) for s in slaves])
+            m_rect = np.repeat(rects[masters], pair_counts, axis=0)
+            s_rect = np.repeat(rects[slaves], pair_counts, axis=0)
+            mirror_x = np.repeat([axis == SymmetryAxis.VERTICAL for axis in axes], pair_counts)
+
+            mx, my = pin_coords[master_pins, 0], pin_coords[master_pins, 1]
+            pin_coords[slave_pins, 0] = np.where(mirror_x, s_rect[:, 0] - (mx - m_rect[:, 0]),
+                                                 mx + (s_rect[:, 0] - m_rect[:, 0]))
+            pin_coords[slave_pins, 1] = np.where(mirror_x, my + (s_rect[:, 1] - m_rect[:, 1]),
+                                                 s_rect[:, 1] - (my - m_rect[:, 1]))
+
+        return pin_coords, pin_to_component
@@ -0,0 +1,681 @@
+# aclg/pipeline/config.py
+import difflib
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from aclg.augment.formatted import FormattedLayoutAugmenter
+from aclg.netlist.generator import EDGE_PROBABILITY_EPSILON, edge_distance_threshold
+from aclg.netlist.metrics import NETLIST_METRICS
+from aclg.netlist.pins import BatchedPinSynthesizer
+from aclg.pipeline.manifest import config_hash
+from aclg.pipeline.quota import GEOMETRY_FEATURES
+
+# 批次生成的儲存方式：完整輸出 JSON + PNG，或只記錄種子 (讀取時重新產生)
+STORAGE_MODES = ('full', 'seed_only')
+
+# 只做型別檢查、不編譯成型別物件的區塊 (不影響生成流程)：{區塊: {設定項: 型別}}
+# augmentation_settings 由 FormattedLayoutAugmenter.from_config 驗證
+_PASSTHROUGH_SECTIONS = {
+    'path_settings': {
+        'raw_output_directory': 'string', 'ml_ready_output_directory': 'string',
+        'visualization_output_directory': 'string', 'image_subdirectory': 'string', 'json_subdirectory': 'string'
+    },
+    'format_settings': {'include_graph_block': 'boolean'},
+    'augmentation_settings': None,
+    'visualization_settings': {
+        'figure_size': 'size', 'dpi': 'positive', 'canvas_size': 'size', 'incremental': 'boolean',
+        'cache_filename': 'string', 'num_workers': 'count',
+        'contact_sheet': {'filename': 'string', 'columns': 'count', 'tile_size': 'positive', 'dpi': 'positive'}
+    },
+    'serving_settings': {
+        'socket_path': 'string', 'num_workers': 'count', 'prefetch_size': 'count', 'master_seed': 'seed',
+        'max_samples_per_request': 'positive_count', 'stats_interval_seconds': 'non_negative'
+    },
+}
+# 編譯成型別物件的區塊
+_COMPILED_SECTIONS = ('Level_0', 'Level_1', 'Level_2', 'GapFiller', 'NetlistGenerator', 'main_execution',
+                      'dedup_settings', 'gif_settings', 'quota_settings', 'netlist_metrics_settings')
+
+
+class ConfigError(ValueError):
+    """設定檔驗證失敗；訊息中列出所有發現的問題。"""
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("設定檔驗證失敗：\n" + "\n".join(f"  - {p}" for p in problems))
+
+
+@dataclass(frozen=True)
+class Level0Config:
+    w_range: Tuple[int, int] = (100, 120)
+    h_range: Tuple[int, int] = (100, 120)
+
+
+@dataclass(frozen=True)
+class Level1Config:
+    w_h_ratio_bound: Tuple[float, float] = (1/6, 6/1)
+    max_tries_per_orientation: int = 50
+    num_splits_range: Tuple[int, int] = (2, 5)
+    ratio_range: Tuple[float, float] = (0.3, 1.0)
+    split_only_probability: float = 0.5
+    align_scale_factor_range: Tuple[float, float] = (0.2, 1.0)
+    force_align_threshold: int = 3
+    symmetric_split_probability: float = 0.3
+    adaptive_symmetric_target_ratio: float = 1.5
+
+
+@dataclass(frozen=True)
+class GridPolicy:
+    rows_range: Tuple[int, int]
+    cols_range: Tuple[int, int]
+    h_ratios_num_range: Tuple[int, int]
+    v_ratios_num_range: Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Level2Config:
+    large_component_align_probability: float = 1.0
+    wide_threshold: float = 2.0
+    tall_threshold: float = 0.5
+    size_thresholds: Tuple[float, float] = (0.1, 0.4)
+    small_component_hold_probability: float = 0.8
+    policy_wide: Optional[GridPolicy] = None
+    policy_tall: Optional[GridPolicy] = None
+    policy_square: Optional[GridPolicy] = None
+    w_h_ratio_bound: Tuple[float, float] = (1/6, 6/1)
+    max_tries: int = 50
+    ratio_grid_probability: float = 0.5
+    ratio_range: Tuple[float, float] = (0.3, 0.6)
+    large_component_hold_probability: float = 0.7
+    simple_split_probability: float = 0.9
+    num_splits_range: Tuple[int, int] = (2, 4)
+    symmetric_split_probability: float = 0.0
+    adaptive_symmetric_target_ratio: float = 1.5
+
+
+@dataclass(frozen=True)
+class GapFillerConfig:
+    small_comp_w_range: Tuple[float, float] = (6, 14)
+    small_comp_h_range: Tuple[float, float] = (6, 14)
+    spacing: float = 0.5
+
+
+@dataclass(frozen=True)
+class NetlistConfig:
+    prob_2_pin: float = 0.55
+    prob_3_pin: float = 0.10
+    prob_4_pin: float = 0.30
+    large_comp_area_threshold: float = 1000.0
+    large_comp_high_pin_prob: float = 0.80
+    large_pin_count_range: Tuple[int, int] = (5, 10)
+    edge_scale_param: float = 15.0
+    edge_gamma_multiplier: float = 0.05
+    max_edge_prob: float = 0.9
+    k_nearest_neighbors: int = 5
+    # --- 編譯時預先計算的衍生資料 ---
+    # {總元件數 N: (values, normal_cdf, large_cdf)}，N 超過表格上限時共用最後一張表
+    pin_count_tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = field(default_factory=dict, compare=False, repr=False)
+    # L1 距離超過此值時連線機率不超過 EDGE_PROBABILITY_EPSILON (None 時由 NetlistGenerator 自行計算)
+    edge_cutoff_distance: Optional[float] = None
+
+    def generator_kwargs(self) -> Dict[str, Any]:
+        """轉成 NetlistGenerator 的建構子參數 (含預先建好的 Pin 數量分佈表與遠距離門檻)。"""
+        return {
+            'pin_distribution_rules': {
+                'base_probabilities': {'2_pin': self.prob_2_pin, '3_pin': self.prob_3_pin, '4_pin': self.prob_4_pin},
+                'large_comp_area_threshold': self.large_comp_area_threshold,
+                'large_comp_high_pin_prob': self.large_comp_high_pin_prob,
+                'large_pin_count_range': self.large_pin_count_range
+            },
+            'edge_scale_param': self.edge_scale_param,
+            'edge_gamma_multiplier': self.edge_gamma_multiplier,
+            'max_edge_prob': self.max_edge_prob,
+            'k_nearest_neighbors': self.k_nearest_neighbors,
+            'pin_count_tables': self.pin_count_tables or None,
+            'edge_cutoff_distance': self.edge_cutoff_distance
+        }
+
+
+@dataclass(frozen=True)
+class MainExecutionConfig:
+    num_layouts_to_generate: int = 1
+    output_file_basename: str = "raw_layout"
+    num_gaps_to_fill: int = 0
+    gap_filler_activation_threshold: float = 0.2
+    output_title: str = "Layout"
+    master_seed: Optional[int] = None  # None 代表 "random"
+    resume: bool = False
+    manifest_filename: str = "run_manifest.json"
+    shard_index: int = 0
+    shard_count: int = 1
+    storage_mode: str = "full"
+    seed_store_filename: str = "seed_store.jsonl"
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    enabled: bool = False
+    index_filename: str = "layout_hash_index.tsv"
+    quantization_step: float = 0.01
+    max_consecutive_duplicates: int = 100
+
+
+@dataclass(frozen=True)
+class GifConfig:
+    enabled: bool = False
+    output_directory: str = "generation_visualizations"
+    gif_filename: str = "generation_process.gif"
+    frame_duration_seconds: float = 1.0
+    cleanup_frames: bool = True
+    seed: Optional[int] = None  # None 代表 "random"
+
+
+@dataclass(frozen=True)
+class FeatureQuotaConfig:
+    name: str
+    bins: Tuple[float, ...]
+    targets: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class QuotaConfig:
+    enabled: bool = False
+    features: Tuple[FeatureQuotaConfig, ...] = ()
+    max_attempts_per_layout: int = 1000
+
+    @property
+    def total_target(self) -> int:
+        return sum(self.features[0].targets) if self.features else 0
+
+
+@dataclass(frozen=True)
+class MetricFilterConfig:
+    name: str
+    minimum: Optional[float] = None  # None 代表不限
+    maximum: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class NetlistMetricsConfig:
+    attach_to_export: bool = True
+    filters: Tuple[MetricFilterConfig, ...] = ()
+    max_attempts_per_layout: int = 100
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    """
+    驗證過的設定檔。各產生器的參數皆為不可變的型別物件，衍生表格 (Pin 數量分佈、連線距離門檻) 已預先計算
+    並設為唯讀；`raw` 為原始設定的唯讀複本 (巢狀的 MappingProxyType / tuple，不受呼叫端之後的修改影響)，
+    `config_hash` 與 manifest 使用的雜湊相同。需要可修改或可序列化的字典時使用 `to_raw()` / `section()`。
+    """
+    raw: Mapping[str, Any]
+    config_hash: str
+    level_0: Level0Config
+    level_1: Level1Config
+    level_2: Level2Config
+    gap_filler: GapFillerConfig
+    netlist: NetlistConfig
+    main_execution: MainExecutionConfig
+    dedup: DedupConfig
+    gif: GifConfig
+    quota: QuotaConfig = QuotaConfig()
+    netlist_metrics: NetlistMetricsConfig = NetlistMetricsConfig()
+
+    def section(self, name: str) -> Dict[str, Any]:
+        """取得未編譯區塊 (如 path_settings) 的原始字典 (新的複本，修改它不會影響設定)。"""
+        return _thaw(self.raw.get(name) or {})
+
+    def to_raw(self) -> Dict[str, Any]:
+        """原始設定的可修改複本 (一般的 dict / list)，可序列化成 JSON 或傳給其他行程。"""
+        return _thaw(self.raw)
+
+
+def _freeze(value: Any) -> Any:
+    """遞迴地把 dict / list 轉成唯讀的 MappingProxyType / tuple (同時與輸入脫離關聯)。"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """`_freeze` 的反向操作。"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _read_only_tables(tables: Dict[int, Tuple[np.ndarray, ...]]) -> Mapping[int, Tuple[np.ndarray, ...]]:
+    """把衍生表格的陣列設為唯讀，並以唯讀對應表保存。"""
+    for arrays in tables.values():
+        for array in arrays:
+            array.setflags(write=False)
+    return MappingProxyType(dict(tables))
+
+
+def generator_kwargs(section_config) -> Dict[str, Any]:
+    """將已編譯的產生器設定轉成建構子參數 (網格策略轉回字典)。"""
+    kwargs = {}
+    for f in fields(section_config):
+        value = getattr(section_config, f.name)
+        if isinstance(value, GridPolicy):
+            value = {g.name: getattr(value, g.name) for g in fields(value)}
+        kwargs[f.name] = value
+    return kwargs
+
+
+class _SectionReader:
+    """讀取單一區塊的欄位，並把所有問題收集到同一個列表中 (一次回報全部錯誤)。"""
+    def __init__(self, name: str, data: Any, problems: List[str], allowed_extra: Tuple[str, ...] = ()):
+        self.name = name
+        self.problems = problems
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            problems.append(f"{name}: 必須是一個對應表 (mapping)。")
+            data = {}
+        self.data = data
+        self.allowed_extra = allowed_extra
+
+    def fail(self, key: str, message: str):
+        self.problems.append(f"{self.name}.{key}: {message}")
+
+    def check_unknown(self, config_cls):
+        known = {f.name for f in fields(config_cls)} | set(self.allowed_extra)
+        for key in self.data:
+            if key not in known:
+                self.fail(key, "未知的設定項 (可能是拼字錯誤)。")
+
+    def number(self, key: str, default, minimum=None, maximum=None, integer=False, exclusive_minimum=False):
+        value = self.data.get(key, default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (integer and not isinstance(value, int)):
+            self.fail(key, f"必須是{'整數' if integer else '數值'}，目前為 {value!r}。")
+            return default
+        if minimum is not None and (value <= minimum if exclusive_minimum else value < minimum):
+            self.fail(key, f"必須{'大於' if exclusive_minimum else '至少為'} {minimum}，目前為 {value}。")
+        if maximum is not None and value > maximum:
+            self.fail(key, f"不能大於 {maximum}，目前為 {value}。")
+        return value
+
+    def probability(self, key: str, default):
+        return self.number(key, default, minimum=0.0, maximum=1.0)
+
+    def value_range(self, key: str, default, minimum=None, integer=False, exclusive_minimum=False):
+        value = self.data.get(key, default)
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            self.fail(key, f"必須是長度為 2 的 [min, max] 列表，目前為 {value!r}。")
+            return tuple(default)
+        low, high = value
+        for v in (low, high):
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or (integer and not isinstance(v, int)):
+                self.fail(key, f"必須只包含{'整數' if integer else '數值'}，目前為 {value!r}。")
+                return tuple(default)
+        if low > high:
+            self.fail(key, f"最小值不能大於最大值，目前為 {value!r}。")
+        if minimum is not None and (low <= minimum if exclusive_minimum else low < minimum):
+            self.fail(key, f"最小值必須{'大於' if exclusive_minimum else '至少為'} {minimum}，目前為 {value!r}。")
+        return (low, high)
+
+    def boolean(self, key: str, default):
+        value = self.data.get(key, default)
+        if not isinstance(value, bool):
+            self.fail(key, f"必須是 true 或 false，目前為 {value!r}。")
+            return default
+        return value
+
+    def string(self, key: str, default):
+        value = self.data.get(key, default)
+        if not isinstance(value, str) or not value:
+            self.fail(key, f"必須是非空字串，目前為 {value!r}。")
+            return default
+        return value
+
+    def seed(self, key: str, default="random") -> Optional[int]:
+        value = self.data.get(key, default)
+        if value == "random":
+            return None
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            self.fail(key, f"必須是 \"random\" 或非負整數，目前為 {value!r}。")
+            return None
+        return value
+
+
+def _compile_level_0(reader: _SectionReader) -> Level0Config:
+    reader.check_unknown(Level0Config)
+    return Level0Config(
+        w_range=reader.value_range('w_range', Level0Config.w_range, minimum=0, integer=True, exclusive_minimum=True),
+        h_range=reader.value_range('h_range', Level0Config.h_range, minimum=0, integer=True, exclusive_minimum=True)
+    )
+
+
+def _compile_level_1(reader: _SectionReader) -> Level1Config:
+    reader.check_unknown(Level1Config)
+    d = Level1Config
+    return Level1Config(
+        w_h_ratio_bound=reader.value_range('w_h_ratio_bound', d.w_h_ratio_bound, minimum=0, exclusive_minimum=True),
+        max_tries_per_orientation=reader.number('max_tries_per_orientation', d.max_tries_per_orientation, minimum=1, integer=True),
+        num_splits_range=reader.value_range('num_splits_range', d.num_splits_range, minimum=1, integer=True),
+        ratio_range=reader.value_range('ratio_range', d.ratio_range, minimum=0, exclusive_minimum=True),
+        split_only_probability=reader.probability('split_only_probability', d.split_only_probability),
+        align_scale_factor_range=reader.value_range('align_scale_factor_range', d.align_scale_factor_range, minimum=0),
+        force_align_threshold=reader.number('force_align_threshold', d.force_align_threshold, integer=True),
+        symmetric_split_probability=reader.probability('symmetric_split_probability', d.symmetric_split_probability),
+        adaptive_symmetric_target_ratio=reader.number('adaptive_symmetric_target_ratio', d.adaptive_symmetric_target_ratio,
+                                                      minimum=0, exclusive_minimum=True)
+    )
+
+
+def _compile_grid_policy(reader: _SectionReader, key: str) -> Optional[GridPolicy]:
+    if reader.data.get(key) is None:
+        return None
+    policy = _SectionReader(f"{reader.name}.{key}", reader.data[key], reader.problems)
+    policy.check_unknown(GridPolicy)
+    return GridPolicy(**{f.name: policy.value_range(f.name, (1, 1), minimum=1, integer=True) for f in fields(GridPolicy)})
+
+
+def _compile_level_2(reader: _SectionReader) -> Level2Config:
+    reader.check_unknown(Level2Config)
+    d = Level2Config
+    return Level2Config(
+        large_component_align_probability=reader.probability('large_component_align_probability', d.large_component_align_probability),
+        wide_threshold=reader.number('wide_threshold', d.wide_threshold, minimum=0, exclusive_minimum=True),
+        tall_threshold=reader.number('tall_threshold', d.tall_threshold, minimum=0, exclusive_minimum=True),
+        size_thresholds=reader.value_range('size_thresholds', d.size_thresholds, minimum=0),
+        small_component_hold_probability=reader.probability('small_component_hold_probability', d.small_component_hold_probability),
+        policy_wide=_compile_grid_policy(reader, 'policy_wide'),
+        policy_tall=_compile_grid_policy(reader, 'policy_tall'),
+        policy_square=_compile_grid_policy(reader, 'policy_square'),
+        w_h_ratio_bound=reader.value_range('w_h_ratio_bound', d.w_h_ratio_bound, minimum=0, exclusive_minimum=True),
+        max_tries=reader.number('max_tries', d.max_tries, minimum=1, integer=True),
+        ratio_grid_probability=reader.probability('ratio_grid_probability', d.ratio_grid_probability),
+        ratio_range=reader.value_range('ratio_range', d.ratio_range, minimum=0, exclusive_minimum=True),
+        large_component_hold_probability=reader.probability('large_component_hold_probability', d.large_component_hold_probability),
+        simple_split_probability=reader.probability('simple_split_probability', d.simple_split_probability),
+        num_splits_range=reader.value_range('num_splits_range', d.num_splits_range, minimum=1, integer=True),
+        symmetric_split_probability=reader.probability('symmetric_split_probability', d.symmetric_split_probability),
+        adaptive_symmetric_target_ratio=reader.number('adaptive_symmetric_target_ratio', d.adaptive_symmetric_target_ratio,
+                                                      minimum=0, exclusive_minimum=True)
+    )
+
+
+def _compile_gap_filler(reader: _SectionReader) -> GapFillerConfig:
+    reader.check_unknown(GapFillerConfig)
+    d = GapFillerConfig
+    return GapFillerConfig(
+        small_comp_w_range=reader.value_range('small_comp_w_range', d.small_comp_w_range, minimum=0, exclusive_minimum=True),
+        small_comp_h_range=reader.value_range('small_comp_h_range', d.small_comp_h_range, minimum=0, exclusive_minimum=True),
+        spacing=reader.number('spacing', d.spacing, minimum=0)
+    )
+
+
+def _compile_netlist(reader: _SectionReader) -> NetlistConfig:
+    d = NetlistConfig
+    # pin_dist_alpha / min_pins_per_comp / max_pins_per_comp 為舊版參數：仍接受以相容舊設定檔，但不再使用
+    known = {'pin_distribution_rules', 'pin_dist_alpha', 'min_pins_per_comp', 'max_pins_per_comp', 'edge_scale_param',
+             'edge_gamma_multiplier', 'max_edge_prob', 'k_nearest_neighbors'}
+    for key in reader.data:
+        if key not in known:
+            reader.fail(key, "未知的設定項 (可能是拼字錯誤)。")
+
+    rules = _SectionReader(f"{reader.name}.pin_distribution_rules", reader.data.get('pin_distribution_rules'), reader.problems)
+    for key in rules.data:
+        if key not in ('base_probabilities', 'large_comp_area_threshold', 'large_comp_high_pin_prob', 'large_pin_count_range'):
+            rules.fail(key, "未知的設定項 (可能是拼字錯誤)。")
+    base = _SectionReader(f"{rules.name}.base_probabilities", rules.data.get('base_probabilities'), reader.problems)
+    for key in base.data:
+        if key not in ('2_pin', '3_pin', '4_pin'):
+            base.fail(key, "未知的設定項 (只支援 2_pin、3_pin、4_pin)。")
+    prob_2_pin = base.probability('2_pin', d.prob_2_pin)
+    prob_3_pin = base.probability('3_pin', d.prob_3_pin)
+    prob_4_pin = base.probability('4_pin', d.prob_4_pin)
+    if prob_2_pin + prob_3_pin + prob_4_pin > 1.0 + 1e-9:
+        base.fail('*', f"2/3/4-pin 機率總和不能超過 1，目前為 {prob_2_pin + prob_3_pin + prob_4_pin:.4f}。")
+    if prob_2_pin + prob_3_pin + prob_4_pin <= 0:
+        base.fail('*', "2/3/4-pin 機率總和必須大於 0。")
+
+    large_comp_area_threshold = rules.number('large_comp_area_threshold', d.large_comp_area_threshold, minimum=0)
+    large_comp_high_pin_prob = rules.probability('large_comp_high_pin_prob', d.large_comp_high_pin_prob)
+    large_pin_count_range = rules.value_range('large_pin_count_range', d.large_pin_count_range, minimum=2, integer=True)
+
+    edge_scale_param = reader.number('edge_scale_param', d.edge_scale_param, minimum=0, exclusive_minimum=True)
+    edge_gamma_multiplier = reader.number('edge_gamma_multiplier', d.edge_gamma_multiplier, minimum=0)
+    max_edge_prob = reader.probability('max_edge_prob', d.max_edge_prob)
+    problems_before = len(reader.problems)
+    compiled = dict(
+        prob_2_pin=prob_2_pin, prob_3_pin=prob_3_pin, prob_4_pin=prob_4_pin,
+        large_comp_area_threshold=large_comp_area_threshold,
+        large_comp_high_pin_prob=large_comp_high_pin_prob,
+        large_pin_count_range=large_pin_count_range,
+        edge_scale_param=edge_scale_param,
+        edge_gamma_multiplier=edge_gamma_multiplier,
+        max_edge_prob=max_edge_prob,
+        k_nearest_neighbors=reader.number('k_nearest_neighbors', d.k_nearest_neighbors, minimum=1, integer=True)
+    )
+    if len(reader.problems) > problems_before:
+        return NetlistConfig(**compiled)
+
+    # --- 衍生表格 ---
+    synthesizer = BatchedPinSynthesizer(prob_2_pin, prob_3_pin, prob_4_pin, large_comp_area_threshold,
+                                        large_comp_high_pin_prob, large_pin_count_range)
+    cutoff = edge_distance_threshold(edge_scale_param, edge_gamma_multiplier, EDGE_PROBABILITY_EPSILON)
+    return NetlistConfig(**compiled, pin_count_tables=_read_only_tables(synthesizer.precompute_tables()),
+                         edge_cutoff_distance=cutoff)
+
+
+def _compile_main_execution(reader: _SectionReader) -> MainExecutionConfig:
+    reader.check_unknown(MainExecutionConfig)
+    d = MainExecutionConfig
+    shard_count = reader.number('shard_count', d.shard_count, minimum=1, integer=True)
+    shard_index = reader.number('shard_index', d.shard_index, minimum=0, integer=True)
+    if isinstance(shard_index, int) and isinstance(shard_count, int) and shard_index >= shard_count:
+        reader.fail('shard_index', f"必須小於 shard_count ({shard_count})，目前為 {shard_index}。")
+    storage_mode = reader.string('storage_mode', d.storage_mode)
+    if storage_mode not in STORAGE_MODES:
+        reader.fail('storage_mode', f"必須是 {' / '.join(STORAGE_MODES)} 之一，目前為 {storage_mode!r}。")
+        storage_mode = d.storage_mode
+    return MainExecutionConfig(
+        num_layouts_to_generate=reader.number('num_layouts_to_generate', d.num_layouts_to_generate, minimum=0, integer=True),
+        output_file_basename=reader.string('output_file_basename', d.output_file_basename),
+        num_gaps_to_fill=reader.number('num_gaps_to_fill', d.num_gaps_to_fill, minimum=0, integer=True),
+        gap_filler_activation_threshold=reader.probability('gap_filler_activation_threshold', d.gap_filler_activation_threshold),
+        output_title=reader.string('output_title', d.output_title),
+        master_seed=reader.seed('master_seed'),
+        resume=reader.boolean('resume', d.resume),
+        manifest_filename=reader.string('manifest_filename', d.manifest_filename),
+        shard_index=shard_index,
+        shard_count=shard_count,
+        storage_mode=storage_mode,
+        seed_store_filename=reader.string('seed_store_filename', d.seed_store_filename)
+    )
+
+
+def _compile_dedup(reader: _SectionReader) -> DedupConfig:
+    reader.check_unknown(DedupConfig)
+    d = DedupConfig
+    return DedupConfig(
+        enabled=reader.boolean('enabled', d.enabled),
+        index_filename=reader.string('index_filename', d.index_filename),
+        quantization_step=reader.number('quantization_step', d.quantization_step, minimum=0, exclusive_minimum=True),
+        max_consecutive_duplicates=reader.number('max_consecutive_duplicates', d.max_consecutive_duplicates, minimum=1, integer=True)
+    )
+
+
+def _compile_gif(reader: _SectionReader) -> GifConfig:
+    reader.check_unknown(GifConfig)
+    d = GifConfig
+    return GifConfig(
+        enabled=reader.boolean('enabled', d.enabled),
+        output_directory=reader.string('output_directory', d.output_directory),
+        gif_filename=reader.string('gif_filename', d.gif_filename),
+        frame_duration_seconds=reader.number('frame_duration_seconds', d.frame_duration_seconds, minimum=0, exclusive_minimum=True),
+        cleanup_frames=reader.boolean('cleanup_frames', d.cleanup_frames),
+        seed=reader.seed('seed')
+    )
+
+
+def _compile_quota(reader: _SectionReader) -> QuotaConfig:
+    reader.check_unknown(QuotaConfig)
+    d = QuotaConfig
+    enabled = reader.boolean('enabled', d.enabled)
+    features_data = reader.data.get('features') or {}
+    if not isinstance(features_data, dict):
+        reader.fail('features', "必須是 {特徵名稱: {bins, target}} 的對應表。")
+        features_data = {}
+
+    features = []
+    for name, spec in features_data.items():
+        feature = _SectionReader(f"{reader.name}.features.{name}", spec, reader.problems)
+        if name not in GEOMETRY_FEATURES:
+            reader.fail(f'features.{name}', f"未知的幾何特徵，可用的特徵為 {sorted(GEOMETRY_FEATURES)}。")
+            continue
+        for key in feature.data:
+            if key not in ('bins', 'target'):
+                feature.fail(key, "未知的設定項 (只支援 bins 與 target)。")
+        bins = feature.data.get('bins')
+        if (not isinstance(bins, list) or len(bins) < 2 or
+                any(isinstance(b, bool) or not isinstance(b, (int, float)) for b in bins)):
+            feature.fail('bins', f"必須是至少兩個數值的分箱邊界列表，目前為 {bins!r}。")
+            continue
+        if any(lo >= hi for lo, hi in zip(bins[:-1], bins[1:])):
+            feature.fail('bins', f"分箱邊界必須嚴格遞增，目前為 {bins!r}。")
+            continue
+        target = feature.data.get('target')
+        if isinstance(target, int) and not isinstance(target, bool):
+            target = [target] * (len(bins) - 1)
+        if (not isinstance(target, list) or len(target) != len(bins) - 1 or
+                any(isinstance(t, bool) or not isinstance(t, int) or t < 0 for t in target)):
+            feature.fail('target', f"必須是非負整數，或長度為 {len(bins) - 1} 的非負整數列表，目前為 {feature.data.get('target')!r}。")
+            continue
+        features.append(FeatureQuotaConfig(name, tuple(float(b) for b in bins), tuple(target)))
+
+    if enabled:
+        totals = sorted({sum(f.targets) for f in features})
+        if not features_data:
+            reader.fail('features', "啟用配額模式時至少需要一個特徵。")
+        elif len(totals) > 1:
+            reader.fail('features', f"所有特徵的目標總數必須相同 (接受的佈局同時計入每個直方圖)，目前為 {totals}。")
+        elif totals and totals[0] == 0:
+            reader.fail('features', "目標總數必須大於 0。")
+    return QuotaConfig(
+        enabled=enabled,
+        features=tuple(features),
+        max_attempts_per_layout=reader.number('max_attempts_per_layout', d.max_attempts_per_layout, minimum=1, integer=True)
+    )
+
+
+def _compile_netlist_metrics(reader: _SectionReader) -> NetlistMetricsConfig:
+    reader.check_unknown(NetlistMetricsConfig)
+    d = NetlistMetricsConfig
+    filters_data = reader.data.get('filters') or {}
+    if not isinstance(filters_data, dict):
+        reader.fail('filters', "必須是 {指標名稱: [最小值, 最大值]} 的對應表。")
+        filters_data = {}
+
+    filters = []
+    for name, bounds in filters_data.items():
+        if name not in NETLIST_METRICS:
+            reader.fail(f'filters.{name}', f"未知的 Netlist 指標，可用的指標為 {list(NETLIST_METRICS)}。")
+            continue
+        if (not isinstance(bounds, list) or len(bounds) != 2 or
+                any(b is not None and (isinstance(b, bool) or not isinstance(b, (int, float))) for b in bounds)):
+            reader.fail(f'filters.{name}', f"必須是 [最小值, 最大值] (null 表示不限)，目前為 {bounds!r}。")
+            continue
+        low, high = bounds
+        if low is not None and high is not None and low > high:
+            reader.fail(f'filters.{name}', f"最小值不能大於最大值，目前為 {bounds!r}。")
+            continue
+        filters.append(MetricFilterConfig(name, None if low is None else float(low), None if high is None else float(high)))
+    return NetlistMetricsConfig(
+        attach_to_export=reader.boolean('attach_to_export', d.attach_to_export),
+        filters=tuple(filters),
+        max_attempts_per_layout=reader.number('max_attempts_per_layout', d.max_attempts_per_layout, minimum=1, integer=True)
+    )
+
+
+def _check_passthrough(reader: _SectionReader, schema: Dict[str, Any]):
+    """只檢查未編譯區塊的設定項名稱與型別 (值由使用它的腳本解讀)。"""
+    for key, value in reader.data.items():
+        kind = schema.get(key)
+        if kind is None:
+            reader.fail(key, "未知的設定項 (可能是拼字錯誤)。")
+        elif isinstance(kind, dict):
+            _check_passthrough(_SectionReader(f"{reader.name}.{key}", value, reader.problems), kind)
+        elif kind == 'string':
+            reader.string(key, None)
+        elif kind == 'boolean':
+            reader.boolean(key, None)
+        elif kind == 'count':
+            reader.number(key, None, minimum=0, integer=True)
+        elif kind == 'positive_count':
+            reader.number(key, None, minimum=0, integer=True, exclusive_minimum=True)
+        elif kind == 'positive':
+            reader.number(key, None, minimum=0, exclusive_minimum=True)
+        elif kind == 'non_negative':
+            reader.number(key, None, minimum=0)
+        elif kind == 'seed':
+            reader.seed(key)
+        elif kind == 'size':
+            if (not isinstance(value, list) or len(value) != 2 or
+                    any(isinstance(v, bool) or not isinstance(v, (int, float)) or v <= 0 for v in value)):
+                reader.fail(key, f"必須是兩個正數的 [寬, 高] 列表，目前為 {value!r}。")
+
+
+def compile_config(raw: Dict[str, Any]) -> CompiledConfig:
+    """
+    驗證整份設定檔並編譯成 CompiledConfig。
+    所有問題會一次收集後以 ConfigError 拋出，讓無效的設定在長時間批次任務開始前就失敗。
+    """
+    if not isinstance(raw, dict):
+        raise ConfigError(["設定檔的最上層必須是一個對應表 (mapping)。"])
+    problems: List[str] = []
+    known_sections = _COMPILED_SECTIONS + tuple(_PASSTHROUGH_SECTIONS)
+    for name in raw:
+        if name not in known_sections:
+            suggestion = difflib.get_close_matches(str(name), known_sections, n=1)
+            hint = f"，是否為 '{suggestion[0]}'？" if suggestion else "。"
+            problems.append(f"{name}: 未知的設定區塊 (可能是拼字錯誤){hint}")
+    for name, schema in _PASSTHROUGH_SECTIONS.items():
+        reader = _SectionReader(name, raw.get(name), problems)
+        if schema is not None:
+            _check_passthrough(reader, schema)
+    if isinstance(raw.get('augmentation_settings'), dict):
+        # 載入時才使用，但與生成參數一樣在任務開始前驗證
+        try:
+            FormattedLayoutAugmenter.from_config(raw['augmentation_settings'])
+        except (ValueError, TypeError) as e:
+            problems.append(f"augmentation_settings: {e}")
+
+    compiled = dict(
+        level_0=_compile_level_0(_SectionReader('Level_0', raw.get('Level_0'), problems)),
+        level_1=_compile_level_1(_SectionReader('Level_1', raw.get('Level_1'), problems)),
+        level_2=_compile_level_2(_SectionReader('Level_2', raw.get('Level_2'), problems)),
+        gap_filler=_compile_gap_filler(_SectionReader('GapFiller', raw.get('GapFiller'), problems)),
+        netlist=_compile_netlist(_SectionReader('NetlistGenerator', raw.get('NetlistGenerator'), problems)),
+        main_execution=_compile_main_execution(_SectionReader('main_execution', raw.get('main_execution'), problems)),
+        dedup=_compile_dedup(_SectionReader('dedup_settings', raw.get('dedup_settings'), problems)),
+        gif=_compile_gif(_SectionReader('gif_settings', raw.get('gif_settings'), problems)),
+        quota=_compile_quota(_SectionReader('quota_settings', raw.get('quota_settings'), problems)),
+        netlist_metrics=_compile_netlist_metrics(_SectionReader('netlist_metrics_settings', raw.get('netlist_metrics_settings'), problems))
+    )
+    if problems:
+        raise ConfigError(problems)
+    return CompiledConfig(raw=_freeze(raw), config_hash=config_hash(raw), **compiled)
+
+
+def load_compiled_config(path: str = 'config.yaml') -> CompiledConfig:
+    """讀取並編譯 YAML 設定檔；檔案不存在、無法解析或驗證失敗時皆拋出 ConfigError。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = yaml.safe_load(f)
+    except FileNotFoundError:
+        raise ConfigError([f"找不到設定檔 '{path}'。"])
+    except yaml.YAMLError as e:
+        raise ConfigError([f"解析 YAML 檔案 '{path}' 失敗: {e}"])
+    return compile_config(raw)
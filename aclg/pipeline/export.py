@@ -0,0 +1,112 @@
+# aclg/pipeline/export.py
+import json
+from typing import Any, Dict, List, Optional
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+from aclg.dataclass.symmetry import SymmetryRegistry
+
+def component_to_dict(component: Component) -> Dict[str, Any]:
+    """
+    遞迴地將一個 Component 物件及其所有子元件轉換成字典格式。
+    """
+    if component is None:
+        return None
+    
+    sub_components_list = []
+    if component.sub_components:
+        sub_components_list = [component_to_dict(sub) for sub in component.sub_components]
+
+    return {
+        "x": component.x,
+        "y": component.y,
+        "width": component.width,
+        "height": component.height,
+        "level": component.level,
+        "relation_id": component.relation_id,
+        "generate_rule": component.generate_rule,
+        "symmetric_group_id": component.symmetric_group_id,
+        "sub_components": sub_components_list
+    }
+
+def layout_to_dict(
+    layout_id: int,
+    seed_used: int,
+    root_component: Component,
+    gap_components: List[Component],
+    final_leaf_components: List[Component],
+    netlist: Netlist,
+    symmetry: SymmetryRegistry,
+    netlist_metrics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """將完整的佈局資料轉成與 JSON 檔案相同結構的字典；提供 netlist_metrics 時附在 "netlist_metrics" 欄位。"""
+    layout_data = {
+        "layout_id": layout_id,
+        "seed_used": seed_used,
+        "root_component": component_to_dict(root_component),
+        "gap_components": [component_to_dict(comp) for comp in gap_components],
+        "final_leaf_components": [component_to_dict(comp) for comp in final_leaf_components],
+        "netlist": netlist.to_dict(),
+        "symmetry_groups": symmetry.to_layout_entries(final_leaf_components)
+    }
+    if netlist_metrics is not None:
+        layout_data["netlist_metrics"] = netlist_metrics
+    return layout_data
+
+def component_from_dict(data: Dict[str, Any]) -> Component:
+    """component_to_dict 的反向操作：遞迴地由字典重建 Component 及其所有子元件。"""
+    return Component(
+        x=data["x"], y=data["y"], width=data["width"], height=data["height"],
+        level=data.get("level", 0),
+        relation_id=data.get("relation_id", 0),
+        generate_rule=data.get("generate_rule", ""),
+        symmetric_group_id=data.get("symmetric_group_id", -1),
+        sub_components=[component_from_dict(sub) for sub in data.get("sub_components", [])]
+    )
+
+def layout_from_dict(layout_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    layout_to_dict 的反向操作，回傳與 `LayoutPipeline.generate` 相同結構的字典。
+    最終葉元件直接取自重建的元件樹 (L1 區塊的子元件依序排列，再接上 GapFiller 元件)，
+    因此可以直接交給 `LayoutPipeline.regenerate_subtree` 做增量修改。
+    """
+    root_component = component_from_dict(layout_data["root_component"])
+    gap_components = [component_from_dict(comp) for comp in layout_data.get("gap_components", [])]
+    level_2_components = [leaf for block in root_component.sub_components for leaf in block.sub_components]
+    final_leaf_components = level_2_components + gap_components
+    if len(final_leaf_components) != len(layout_data.get("final_leaf_components", [])):
+        raise ValueError("元件樹與 final_leaf_components 的數量不一致，無法重建佈局。")
+    return {
+        "root_components": [root_component],
+        "root_component": root_component,
+        "gap_components": gap_components,
+        "final_leaf_components": final_leaf_components,
+        "netlist": Netlist.from_layout_dict(layout_data),
+        "netlist_metrics": layout_data.get("netlist_metrics"),
+        "symmetry": SymmetryRegistry.from_layout_entries(
+            final_leaf_components, SymmetryRegistry.layout_entries_from_dict(layout_data))
+    }
+
+def export_layout_to_json(
+    layout_id: int,
+    seed_used: int,
+    root_component: Component,
+    gap_components: List[Component],
+    final_leaf_components: List[Component],
+    netlist: Netlist,
+    symmetry: SymmetryRegistry,
+    output_path: str,
+    netlist_metrics: Optional[Dict[str, Any]] = None
+):
+    """
+    將完整的佈局資料（包含使用的種子）匯出成一個 JSON 檔案。
+    """
+    layout_data = layout_to_dict(layout_id, seed_used, root_component, gap_components,
+                                 final_leaf_components, netlist, symmetry, netlist_metrics)
+
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(layout_data, f, indent=4)
+        print(f"📄 佈局資料已成功儲存至 {output_path}")
+    except Exception as e:
+        print(f"❌ 儲存 JSON 檔案至 {output_path} 時發生錯誤: {e}")
@@ -0,0 +1,215 @@
+# aclg/pipeline/layout.py
+import copy
+import random
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+from aclg.dataclass.symmetry import SymmetryRegistry
+from aclg.generators import GapFiller, Level_0, Level_1, Level_2
+from aclg.netlist.batch import BatchedNetlistEngine, capture_rng_state
+from aclg.netlist.generator import NetlistGenerator
+from aclg.netlist.metrics import batch_netlist_metrics, netlist_metrics
+from aclg.pipeline.config import CompiledConfig, generator_kwargs
+
+StageCallback = Callable[[str, List[Component], Optional[Netlist]], None]
+# geometry_filter(root_component, level_2_components, gap_components, symmetry) -> 是否繼續產生 Netlist
+GeometryFilter = Callable[[Component, List[Component], List[Component], SymmetryRegistry], bool]
+
+# 佈局生成程式的版本：相同 (設定, 種子) 的輸出因程式修改而改變時遞增 (記錄於 seed-only 儲存檔)
+GENERATOR_VERSION = 2
+
+
+@contextmanager
+def preserved_global_rng() -> Iterator[None]:
+    """
+    區塊結束後還原 `random` / `np.random` 的全域狀態。
+    生成流程以種子重設全域亂數；在呼叫端 (例如訓練迴圈) 的行程中產生佈局時，用它避免改動呼叫端自己的亂數序列。
+    """
+    python_state, numpy_state = random.getstate(), np.random.get_state()
+    try:
+        yield
+    finally:
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+
+
+class LayoutPipeline:
+    """
+    完整的佈局生成流程 (Level_0 → Level_1 → Level_2 → GapFiller → Netlist)。
+
+    所有產生器只在建構時由 CompiledConfig 建立一次 (每個 worker 一份)，之後每個種子只需呼叫 `generate`；
+    產生器本身不保存跨佈局的狀態，因此結果只取決於 (設定, 種子)。
+    """
+    def __init__(self, config: CompiledConfig):
+        self.config = config
+        self.level_0 = Level_0(**generator_kwargs(config.level_0))
+        self.level_1 = Level_1(**generator_kwargs(config.level_1))
+        self.level_2 = Level_2(**generator_kwargs(config.level_2))
+        self.gap_filler = GapFiller(**generator_kwargs(config.gap_filler))
+        self.netlist_generator = NetlistGenerator(**config.netlist.generator_kwargs())
+        self.batch_netlist_engine = BatchedNetlistEngine(self.netlist_generator)
+        self.edge_scale_param = config.netlist.edge_scale_param
+        self.attach_metrics_to_export = config.netlist_metrics.attach_to_export
+        self.num_gaps_to_fill = config.main_execution.num_gaps_to_fill
+        self.gap_filler_threshold = config.main_execution.gap_filler_activation_threshold
+
+    def generate(self, seed: int, stage_callback: StageCallback = None,
+                 geometry_filter: GeometryFilter = None) -> Optional[Dict[str, Any]]:
+        """
+        以指定的種子產生一組完整的佈局。
+        stage_callback(stage_name, components_to_plot, netlist) 會在每個階段完成後立即被呼叫
+        (元件會在後續階段被原地修改，因此必須當下處理，例如渲染成 GIF 幀)。
+        geometry_filter 會在 GapFiller 之後、Netlist 之前被呼叫；回傳 False 時立即放棄此佈局並回傳 None，
+        省下 Netlist、繪圖與匯出的成本 (用於配額驅動的生成)。
+        回傳的佈局中 "netlist_metrics" 為 Netlist 品質指標 (`aclg.netlist.metrics`)。
+        """
+        layout = self._generate_geometry(seed, stage_callback, geometry_filter)
+        if layout is None:
+            return None
+        layout["netlist"] = self.netlist_generator.generate(layout["final_leaf_components"], layout["symmetry"])
+        layout["netlist_metrics"] = netlist_metrics(layout["netlist"], len(layout["final_leaf_components"]),
+                                                    self.edge_scale_param)
+        if stage_callback:
+            stage_callback("Netlist", layout["root_components"] + layout["gap_components"], layout["netlist"])
+        return layout
+
+    def generate_batch(self, seeds: List[int], geometry_filter: GeometryFilter = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        批次版本：逐一產生每個種子的幾何 (並在 Netlist 之前擷取亂數狀態)，再以 `BatchedNetlistEngine`
+        一次產生所有 Netlist (品質指標也整批計算)。每個結果與 `generate(seed)` 完全相同；被 geometry_filter 拒絕的種子對應 None。
+        """
+        layouts, rng_states = [], []
+        for seed in seeds:
+            layout = self._generate_geometry(seed, None, geometry_filter)
+            if layout is not None:
+                rng_states.append(capture_rng_state())
+            layouts.append(layout)
+        accepted = [layout for layout in layouts if layout is not None]
+        netlists = self.batch_netlist_engine.generate(
+            [(layout["final_leaf_components"], layout["symmetry"]) for layout in accepted], rng_states)
+        metrics = batch_netlist_metrics(netlists, [len(layout["final_leaf_components"]) for layout in accepted],
+                                        self.edge_scale_param)
+        for layout, netlist, layout_metrics in zip(accepted, netlists, metrics):
+            layout["netlist"] = netlist
+            layout["netlist_metrics"] = layout_metrics
+        return layouts
+
+    def exported_metrics(self, layout: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """要附在匯出資料中的指標 (netlist_metrics_settings.attach_to_export 為 false 時為 None)。"""
+        return layout.get("netlist_metrics") if self.attach_metrics_to_export else None
+
+    def _generate_geometry(self, seed: int, stage_callback: Optional[StageCallback],
+                           geometry_filter: Optional[GeometryFilter]) -> Optional[Dict[str, Any]]:
+        """Level_0 → Level_1 → Level_2 → GapFiller；回傳的佈局字典中 netlist 尚未產生 (None)。"""
+        random.seed(seed)
+        np.random.seed(seed)
+
+        # --- 以 SymmetryRegistry 管理跨層級的對稱群組 ---
+        symmetry = SymmetryRegistry()
+
+        root_components = self.level_0.generate()
+        root_component = root_components[0]
+        if stage_callback:
+            stage_callback("Level_0", root_components, None)
+
+        level_1_components = self.level_1.generate(root_components, symmetry)
+        if stage_callback:
+            stage_callback("Level_1", root_components, None)
+        level_2_components = self.level_2.generate(level_1_components, root_component, symmetry)
+
+        # --- 最終對稱性驗證 (成員必須都是 L2 葉節點) ---
+        symmetry.validate(level_2_components)
+        if stage_callback:
+            stage_callback("Level_2", root_components, None)
+
+        gap_components = []
+        occupied_area = sum(c.width * c.height for c in level_2_components)
+        total_area = root_component.width * root_component.height
+        if total_area > 0 and (total_area - occupied_area) / total_area > self.gap_filler_threshold:
+            gap_components = self.gap_filler.fill(level_2_components, root_component, self.num_gaps_to_fill)
+
+        if stage_callback:
+            stage_callback("GapFiller", root_components + gap_components, None)
+        if geometry_filter is not None and not geometry_filter(root_component, level_2_components, gap_components, symmetry):
+            return None
+
+        return {
+            "root_components": root_components,
+            "root_component": root_component,
+            "gap_components": gap_components,
+            "final_leaf_components": level_2_components + gap_components,
+            "netlist": None,
+            "netlist_metrics": None,
+            "symmetry": symmetry
+        }
+
+    def regenerate_subtree(self, layout: Dict[str, Any], block_index: int, seed: int, in_place: bool = False) -> Dict[str, Any]:
+        """
+        增量重生：只重新產生單一 L1 區塊的 L2 分解，並局部修補 Netlist，其餘元件、引腳與邊皆保持不變。
+
+        Args:
+            layout: `generate` 或 `layout_from_dict` 回傳的佈局字典。
+            block_index: L1 區塊在根元件 `sub_components` 中的位置 (即其 L2 子元件的 relation_id)。
+            seed: 此次變體使用的種子；同一個 (佈局, 區塊, 種子) 會得到相同的結果。
+            in_place: 是否直接修改傳入的佈局；預設先深拷貝，讓同一個佈局可以重複產生多個變體。
+
+        與新的 L2 子元件重疊的 GapFiller 元件會被移除，並以 GapFiller 沿新子元件的邊緣重新填補相同數量
+        (路徑被阻擋時可能較少) 的空隙元件。生成期間使用的全域 `random` / `np.random` 狀態會在結束後還原。
+        """
+        if not in_place:
+            layout = copy.deepcopy(layout)
+        with preserved_global_rng():
+            random.seed(seed)
+            np.random.seed(seed)
+            return self._regenerate_subtree(layout, block_index)
+
+    def _regenerate_subtree(self, layout: Dict[str, Any], block_index: int) -> Dict[str, Any]:
+        root_component = layout["root_component"]
+        blocks = root_component.sub_components
+        if not 0 <= block_index < len(blocks):
+            raise IndexError(f"L1 區塊編號 {block_index} 超出範圍 (共 {len(blocks)} 個區塊)。")
+        block = blocks[block_index]
+        symmetry = layout["symmetry"]
+
+        # 1. 移除舊的 L2 子元件 (連同其對稱群組)，重新分解此區塊
+        removed_ids = {id(c) for c in block.sub_components}
+        for child in block.sub_components:
+            symmetry.break_component(child)
+        new_children = self.level_2.regenerate(block, blocks, root_component, symmetry, relation_id=block_index)
+
+        # 2. 移除與新子元件重疊的 GapFiller 元件
+        gap_components = [gap for gap in layout["gap_components"]
+                          if not any(_overlaps(gap, child) for child in new_children)]
+        removed_ids.update(id(gap) for gap in layout["gap_components"])
+        removed_ids.difference_update(id(gap) for gap in gap_components)
+
+        # 3. 新的子元件放在舊子元件原本的位置，維持葉元件的順序
+        old_leaves = layout["final_leaf_components"]
+        insert_at = next(i for i, c in enumerate(old_leaves) if id(c) in removed_ids)
+        final_leaf_components = ([c for c in old_leaves[:insert_at] if id(c) not in removed_ids] + new_children +
+                                 [c for c in old_leaves[insert_at:] if id(c) not in removed_ids])
+
+        # 4. 在新子元件周圍重新填補被移除的空隙元件 (不能與其餘葉元件重疊)，放在葉元件列表的最後
+        num_removed_gaps = len(layout["gap_components"]) - len(gap_components)
+        refilled = []
+        if num_removed_gaps:
+            others = [c for c in final_leaf_components if not any(c is child for child in new_children)]
+            refilled = self.gap_filler.refill(new_children, root_component, num_removed_gaps, others)
+        layout["gap_components"] = gap_components + refilled
+        final_leaf_components = final_leaf_components + refilled
+
+        layout["netlist"] = self.netlist_generator.patch(layout["netlist"], old_leaves, final_leaf_components, symmetry)
+        layout["netlist_metrics"] = netlist_metrics(layout["netlist"], len(final_leaf_components), self.edge_scale_param)
+        layout["final_leaf_components"] = final_leaf_components
+        return layout
+
+
+def _overlaps(a: Component, b: Component) -> bool:
+    """兩個元件是否有面積大於零的重疊。"""
+    (ax1, ay1), (ax2, ay2) = a.get_topleft(), a.get_bottomright()
+    (bx1, by1), (bx2, by2) = b.get_topleft(), b.get_bottomright()
+    return min(ax2, bx2) - max(ax1, bx1) > 1e-9 and min(ay2, by2) - max(ay1, by1) > 1e-9
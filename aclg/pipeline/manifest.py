@@ -0,0 +1,173 @@
+# aclg/pipeline/manifest.py
+import copy
+import hashlib
+import json
+import os
+import secrets
+from typing import Any, Dict, Optional
+
+MANIFEST_VERSION = 1
+
+# 不影響單一佈局內容的設定；改動它們不會讓既有的 manifest 失效
+_VOLATILE_CONFIG_KEYS = {
+    'path_settings': None,
+    'gif_settings': None,
+    'augmentation_settings': None,
+    'format_settings': None,
+    'visualization_settings': None,
+    'serving_settings': None,
+    'main_execution': ('num_layouts_to_generate', 'resume', 'master_seed', 'manifest_filename',
+                       'shard_index', 'shard_count', 'storage_mode', 'seed_store_filename')
+}
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """計算設定檔的雜湊值 (忽略輸出路徑、批次數量等不影響佈局內容的欄位)。"""
+    stable = copy.deepcopy(config)
+    for section, keys in _VOLATILE_CONFIG_KEYS.items():
+        if section not in stable:
+            continue
+        if keys is None:
+            del stable[section]
+        elif isinstance(stable[section], dict):
+            for key in keys:
+                stable[section].pop(key, None)
+    # 配額只有在啟用時才會改變每個編號產生的佈局
+    quota_settings = stable.get('quota_settings')
+    if not (isinstance(quota_settings, dict) and quota_settings.get('enabled', False)):
+        stable.pop('quota_settings', None)
+    payload = json.dumps(stable, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def derive_layout_seed(master_seed: int, layout_id: int, attempt: int = 0) -> int:
+    """
+    由主種子、佈局編號與重試次數推導出單一佈局的 32-bit 種子。
+    與生成順序無關，因此任何一個編號都能單獨重新產生。
+    """
+    digest = hashlib.blake2b(f"{master_seed}:{layout_id}:{attempt}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % (2**32)
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def atomic_write_json(path: str, data: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class RunManifest:
+    """
+    批次任務的完成紀錄。
+
+    - `<manifest>`: 表頭 (主種子、設定雜湊、版本)，以「寫入暫存檔 + os.replace」原子性更新。
+    - `<manifest>.log.jsonl`: 每完成一個佈局就追加一行並 fsync；中斷時寫到一半的最後一行會在載入時被忽略。
+      同一個編號若出現多次，以最後一筆為準。
+    """
+    def __init__(self, manifest_path: str, header: Dict[str, Any], records: Dict[int, Dict[str, Any]]):
+        self.manifest_path = manifest_path
+        self.log_path = f"{manifest_path}.log.jsonl"
+        self.header = header
+        self.records = records
+        self._log_file = None
+
+    @property
+    def master_seed(self) -> int:
+        return self.header['master_seed']
+
+    @property
+    def config_hash(self) -> str:
+        return self.header['config_hash']
+
+    @classmethod
+    def create(cls, manifest_path: str, config_hash_value: str, master_seed: Optional[int] = None, **extra) -> "RunManifest":
+        """建立新的 manifest (會清除同路徑下舊的完成紀錄)。主種子未指定時隨機產生。"""
+        if master_seed is None:
+            master_seed = secrets.randbelow(2**32)
+        directory = os.path.dirname(manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = {"version": MANIFEST_VERSION, "master_seed": int(master_seed), "config_hash": config_hash_value, **extra}
+        manifest = cls(manifest_path, header, {})
+        if os.path.exists(manifest.log_path):
+            os.remove(manifest.log_path)
+        atomic_write_json(manifest_path, header)
+        return manifest
+
+    @classmethod
+    def load(cls, manifest_path: str) -> "RunManifest":
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        records = {}
+        log_path = f"{manifest_path}.log.jsonl"
+        if os.path.exists(log_path):
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    records[int(record['layout_id'])] = record
+        return cls(manifest_path, header, records)
+
+    def update_header(self, **fields):
+        self.header.update(fields)
+        atomic_write_json(self.manifest_path, self.header)
+
+    def is_complete(self, layout_id: int, base_directory: str = '') -> bool:
+        """檢查某個編號是否已完成，且其所有輸出檔都存在、內容雜湊與紀錄相符。"""
+        record = self.records.get(layout_id)
+        if record is None or record.get('status') != 'done':
+            return False
+        for rel_path, digest in record.get('files', {}).items():
+            path = os.path.join(base_directory, rel_path)
+            if not os.path.exists(path) or file_sha256(path) != digest:
+                return False
+        return True
+
+    def mark_done(self, layout_id: int, seed: int, attempt: int, files: Dict[str, str], base_directory: str = '', **extra):
+        """
+        記錄一個完成的佈局。
+
+        Args:
+            files: {相對路徑: sha256}；若值為 None，則於此處計算檔案的 sha256。
+        """
+        files = {rel_path: digest or file_sha256(os.path.join(base_directory, rel_path))
+                 for rel_path, digest in files.items()}
+        record = {"layout_id": layout_id, "status": "done", "seed": seed, "attempt": attempt, "files": files, **extra}
+        if self._log_file is None:
+            self._log_file = self._open_log_for_append()
+        self._log_file.write(json.dumps(record) + '\n')
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+        self.records[layout_id] = record
+
+    def _open_log_for_append(self):
+        # 若上次中斷時最後一行只寫了一半，先補上換行，讓它成為一行會被忽略的損壞紀錄
+        needs_newline = False
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > 0:
+            with open(self.log_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        log_file = open(self.log_path, 'a', encoding='utf-8')
+        if needs_newline:
+            log_file.write('\n')
+        return log_file
+
+    def close(self):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,87 @@
+# aclg/pipeline/ml_format.py
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from aclg.dataclass.netlist import Netlist
+from aclg.dataclass.symmetry import SymmetryRegistry
+from aclg.netlist.graph import build_graph_block
+
+# 遵循論文方法，我們需要一個固定的基準畫布尺寸來進行正規化
+TARGET_CANVAS_DIM = 1000.0
+
+
+def format_layout_dict(data: Dict[str, Any], include_graph_block: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    將一個原始佈局字典 (與 raw JSON 相同的結構，例如 `layout_to_dict` 的輸出) 轉換為 ML-ready 格式。
+    找不到 'final_leaf_components' 時回傳 None。
+
+    1. 將所有元件內容的中心點對齊到一個固定的 1000x1000 畫布的中心。
+    2. 節點特徵 ('node') 使用元件的 [寬, 高] 尺寸，並基於 1000x1000 畫布進行正規化。
+    3. 座標 ('target') 和邊偏移 ('edge' offset) 也基於這個 1000x1000 的畫布進行正規化。
+    include_graph_block 為 True 時，額外輸出預先計算好的精簡圖區塊 (`graph`：CSR 鄰接、邊陣列、度數與引腳數)。
+    """
+    leaf_components = data.get("final_leaf_components", [])
+    if not leaf_components:
+        return None
+
+    # 新版 JSON 直接記錄引腳所屬元件；舊版 (只有座標對) 則在載入時轉換一次
+    netlist = Netlist.from_layout_dict(data)
+
+    # --- 計算所有元件的內容邊界與中心 (使用原始座標) ---
+    min_x = min(comp['x'] - comp['width'] / 2 for comp in leaf_components)
+    max_x = max(comp['x'] + comp['width'] / 2 for comp in leaf_components)
+    min_y = min(comp['y'] - comp['height'] / 2 for comp in leaf_components)
+    max_y = max(comp['y'] + comp['height'] / 2 for comp in leaf_components)
+    content_center_x = (min_x + max_x) / 2
+    content_center_y = (min_y + max_y) / 2
+
+    ml_nodes = []
+    ml_targets = []
+    ml_sub_components = []
+
+    for comp in leaf_components:
+        # 遵循論文，以 TARGET_CANVAS_DIM 為基準對元件尺寸進行正規化
+        norm_w = comp['width'] / (TARGET_CANVAS_DIM / 2)
+        norm_h = comp['height'] / (TARGET_CANVAS_DIM / 2)
+        ml_nodes.append([norm_w, norm_h])
+
+        # 座標：先計算相對於內容中心的偏移，再以 TARGET_CANVAS_DIM 正規化
+        shifted_x = comp['x'] - content_center_x
+        shifted_y = comp['y'] - content_center_y
+        norm_x = shifted_x / (TARGET_CANVAS_DIM / 2)
+        norm_y = shifted_y / (TARGET_CANVAS_DIM / 2)
+        ml_targets.append([norm_x, norm_y])
+
+        # sub_components 依然儲存原始絕對尺寸，供未來視覺化或還原使用
+        ml_sub_components.append([
+            {
+                "offset": [0.0, 0.0],
+                "dims": [comp['width'], comp['height']]
+            }
+        ])
+
+    # 處理 edges：以引腳索引直接取得所屬元件，並計算相對於元件中心的偏移量
+    # Pin的偏移量也必須基於新的目標畫布尺寸進行正規化，以保持座標系一致
+    comp_centers = np.array([[comp['x'], comp['y']] for comp in leaf_components], dtype=np.float64)
+    edge_comp_indices = netlist.component_edges()
+    edge_offsets = (netlist.edge_coordinates() - comp_centers[edge_comp_indices]) / (TARGET_CANVAS_DIM / 2)
+    basic_component_edges = [
+        [comp_pair, offsets]
+        for comp_pair, offsets in zip(edge_comp_indices.tolist(), edge_offsets.reshape(-1, 4).tolist())
+    ]
+
+    # 處理對稱群組資訊：直接沿用生成時由 SymmetryRegistry 匯出的葉元件索引對
+    ml_symmetry_groups = [entry["members"] for entry in SymmetryRegistry.layout_entries_from_dict(data)]
+
+    ml_data = {
+        "node": ml_nodes,
+        "target": ml_targets,
+        "edges": { "basic_component_edge": basic_component_edges, "align_edge": [], "group_edge": [] },
+        "sub_components": ml_sub_components,
+        "symmetry_groups": ml_symmetry_groups
+    }
+    if include_graph_block:
+        pin_counts = np.bincount(netlist.pin_to_component, minlength=len(leaf_components))
+        ml_data["graph"] = build_graph_block(len(leaf_components), edge_comp_indices, edge_offsets, pin_counts)
+    return ml_data
@@ -0,0 +1,150 @@
+# aclg/pipeline/quota.py
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.symmetry import SymmetryRegistry
+from aclg.pipeline.export import layout_from_dict
+
+
+def _fill_ratio(root_component: Component, level_2_components: List[Component], gap_components: List[Component],
+                symmetry: SymmetryRegistry) -> float:
+    root_area = root_component.width * root_component.height
+    occupied = sum(c.width * c.height for c in level_2_components) + sum(c.width * c.height for c in gap_components)
+    return occupied / root_area if root_area > 0 else 0.0
+
+
+# 生成時可用的廉價幾何特徵：只需要 Level_2 / GapFiller 的結果，在 Netlist、繪圖與匯出之前即可計算
+GEOMETRY_FEATURES: Dict[str, Callable[[Component, List[Component], List[Component], SymmetryRegistry], float]] = {
+    "leaf_count": lambda root, l2, gaps, sym: len(l2) + len(gaps),
+    "level_2_count": lambda root, l2, gaps, sym: len(l2),
+    "gap_count": lambda root, l2, gaps, sym: len(gaps),
+    "fill_ratio": _fill_ratio,
+    "symmetric_pair_count": lambda root, l2, gaps, sym: len(sym),
+    "root_aspect_ratio": lambda root, l2, gaps, sym: root.width / root.height,
+}
+
+
+def geometry_features(root_component: Component, level_2_components: List[Component],
+                      gap_components: List[Component], symmetry: SymmetryRegistry,
+                      names: Sequence[str] = None) -> Dict[str, float]:
+    """計算指定的幾何特徵 (預設為全部)。"""
+    names = GEOMETRY_FEATURES.keys() if names is None else names
+    return {name: float(GEOMETRY_FEATURES[name](root_component, level_2_components, gap_components, symmetry))
+            for name in names}
+
+
+class FeatureQuota:
+    """
+    單一特徵的目標直方圖。`bins` 為遞增的分箱邊界 [b0, ..., bK]，第 k 箱為 [b_k, b_{k+1})，最後一箱包含右端點；
+    落在所有分箱之外的值不屬於任何一箱 (一律拒絕)。
+    """
+    def __init__(self, name: str, bins: Sequence[float], targets: Sequence[int]):
+        self.name = name
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.counts = np.zeros(len(self.targets), dtype=np.int64)
+        if len(self.bins) != len(self.targets) + 1:
+            raise ValueError(f"特徵 '{name}' 的分箱邊界數量必須比目標數量多 1。")
+
+    def bin_of(self, value: float) -> int:
+        """回傳值所屬的分箱索引；不在任何分箱內時回傳 -1。"""
+        if not self.bins[0] <= value <= self.bins[-1]:
+            return -1
+        return min(int(np.searchsorted(self.bins, value, side='right')) - 1, len(self.targets) - 1)
+
+    def has_room(self, value: float) -> bool:
+        k = self.bin_of(value)
+        return k >= 0 and self.counts[k] < self.targets[k]
+
+    def record(self, value: float):
+        k = self.bin_of(value)
+        if k >= 0:
+            self.counts[k] += 1
+
+    @property
+    def total_target(self) -> int:
+        return int(self.targets.sum())
+
+    def is_full(self) -> bool:
+        return bool(np.all(self.counts >= self.targets))
+
+
+class QuotaTracker:
+    """
+    配額驅動的生成：使用者為數個幾何特徵宣告目標直方圖，佈局只有在「每個特徵的所屬分箱都尚未額滿」時才會被接受。
+    所有特徵的目標總數必須相同，因此接受的佈局數量達到總數時，所有分箱必定同時額滿。
+    """
+    def __init__(self, quotas: List[FeatureQuota]):
+        self.quotas = quotas
+        totals = {quota.total_target for quota in quotas}
+        if len(totals) > 1:
+            raise ValueError(f"所有特徵的目標總數必須相同，目前為 {sorted(totals)}。")
+        self.total_target = totals.pop() if totals else 0
+
+    @classmethod
+    def from_config(cls, quota_config) -> "QuotaTracker":
+        """由已編譯的 QuotaConfig (`aclg.pipeline.config`) 建立。"""
+        return cls([FeatureQuota(f.name, f.bins, f.targets) for f in quota_config.features])
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [quota.name for quota in self.quotas]
+
+    @property
+    def num_accepted(self) -> int:
+        return int(self.quotas[0].counts.sum()) if self.quotas else 0
+
+    def features(self, root_component: Component, level_2_components: List[Component],
+                 gap_components: List[Component], symmetry: SymmetryRegistry) -> Dict[str, float]:
+        return geometry_features(root_component, level_2_components, gap_components, symmetry, self.feature_names)
+
+    def admits(self, features: Dict[str, float]) -> bool:
+        """所有特徵的所屬分箱皆尚未額滿時回傳 True (不會記錄)。"""
+        return all(quota.has_room(features[quota.name]) for quota in self.quotas)
+
+    def geometry_filter(self, root_component: Component, level_2_components: List[Component],
+                        gap_components: List[Component], symmetry: SymmetryRegistry) -> bool:
+        """可直接傳給 `LayoutPipeline.generate(geometry_filter=...)` 的早期拒絕判斷。"""
+        return self.admits(self.features(root_component, level_2_components, gap_components, symmetry))
+
+    def record(self, features: Dict[str, float]):
+        for quota in self.quotas:
+            quota.record(features[quota.name])
+
+    def layout_features(self, layout: Dict[str, Any]) -> Dict[str, float]:
+        """`LayoutPipeline.generate` 產生的佈局的特徵值 (最終葉元件 = L2 葉元件 + GapFiller 元件)。"""
+        leaves, gaps = layout["final_leaf_components"], layout["gap_components"]
+        return self.features(layout["root_component"], leaves[:len(leaves) - len(gaps)], gaps, layout["symmetry"])
+
+    def record_layout(self, layout: Dict[str, Any]) -> Dict[str, float]:
+        """將佈局計入配額，並回傳其特徵值 (可存入 manifest 紀錄，續跑時以 `record_stored` 重建進度)。"""
+        features = self.layout_features(layout)
+        self.record(features)
+        return features
+
+    def record_stored(self, features: Optional[Mapping[str, float]]) -> bool:
+        """
+        由寫入時保存的特徵值計入配額，不需要重新產生或讀取佈局。
+        缺少任一特徵 (例如舊版 manifest 沒有記錄) 時不計入並回傳 False，呼叫端應改用 `record_layout_dict`。
+        """
+        if not features or any(name not in features for name in self.feature_names):
+            return False
+        self.record(features)
+        return True
+
+    def record_layout_dict(self, layout_data: Dict[str, Any]):
+        """由已存檔的原始佈局 JSON 計入配額 (舊版 manifest 續跑時重建進度用)。"""
+        self.record_layout(layout_from_dict(layout_data))
+
+    def is_full(self) -> bool:
+        return all(quota.is_full() for quota in self.quotas)
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for quota in self.quotas:
+            cells = [f"[{lo:g}, {hi:g}{']' if k == len(quota.targets) - 1 else ')'}: {count}/{target}"
+                     for k, (lo, hi, count, target) in enumerate(zip(quota.bins[:-1], quota.bins[1:], quota.counts, quota.targets))]
+            lines.append(f"{quota.name}: " + ", ".join(cells))
+        return lines
@@ -0,0 +1,170 @@
+# aclg/pipeline/seed_store.py
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aclg.pipeline.config import CompiledConfig, compile_config
+from aclg.pipeline.layout import GENERATOR_VERSION, LayoutPipeline
+from aclg.pipeline.ml_format import format_layout_dict
+from aclg.pipeline.stream import render_layout
+
+SEED_STORE_VERSION = 1
+# 校驗碼長度 (十六進位字元)：只用於偵測不確定性，不需要完整的 sha256
+CHECKSUM_LENGTH = 16
+
+
+def layout_checksum(layout_data: Dict[str, Any]) -> str:
+    """原始佈局字典 (`layout_to_dict` 的輸出) 的短校驗碼：以排序鍵、緊湊格式序列化後取 sha256 的前 16 個字元。"""
+    payload = json.dumps(layout_data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:CHECKSUM_LENGTH]
+
+
+class SeedStoreChecksumError(ValueError):
+    """重新產生的佈局與記錄的校驗碼不符 (程式或環境的改變造成結果不確定)。"""
+
+
+class SeedStore:
+    """
+    只記錄種子的佈局儲存格式：每個佈局只保存 (佈局編號, 種子, 設定雜湊, 產生器版本, 輸出校驗碼)，
+    讀取時以相同的設定重新產生，並以校驗碼確認結果與寫入時完全相同。
+
+    - 檔案為 JSON lines：第一行為標頭 (包含完整的設定，讓儲存檔可以獨立重新產生)，之後每行一筆佈局紀錄。
+      同一個編號的較新紀錄會覆蓋較舊的紀錄；若最後一行因中斷而不完整，載入時會直接略過。
+    - 重新產生的佈局保存在容量為 cache_size 的 LRU 快取中；回傳的字典由快取共用，請勿原地修改。
+    """
+    def __init__(self, store_path: str, header: Dict[str, Any], records: Dict[int, Dict[str, Any]],
+                 cache_size: int = 128):
+        self.store_path = store_path
+        self.header = header
+        self.records = records
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, str], Dict[str, Any]]" = OrderedDict()
+        self._config: Optional[CompiledConfig] = None
+        self._pipeline: Optional[LayoutPipeline] = None
+        self._file = open(store_path, 'a', encoding='utf-8')
+
+    @property
+    def config_hash(self) -> str:
+        return self.header['config_hash']
+
+    @classmethod
+    def create(cls, store_path: str, config: CompiledConfig, cache_size: int = 128, **extra) -> "SeedStore":
+        """建立新的儲存檔 (會覆蓋同路徑下的舊檔案)。"""
+        directory = os.path.dirname(store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = {"version": SEED_STORE_VERSION, "generator_version": GENERATOR_VERSION,
+                  "config_hash": config.config_hash, **extra, "config": config.to_raw()}
+        with open(store_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+        store = cls(store_path, header, {}, cache_size)
+        store._config = config
+        return store
+
+    @classmethod
+    def load(cls, store_path: str, cache_size: int = 128) -> "SeedStore":
+        records: Dict[int, Dict[str, Any]] = {}
+        with open(store_path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            for line in f:
+                if not line.endswith('\n'):
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[int(record['layout_id'])] = record
+        if header.get('version') != SEED_STORE_VERSION:
+            raise ValueError(f"不支援的儲存檔版本: {header.get('version')!r}")
+        return cls(store_path, header, records, cache_size)
+
+    @property
+    def config(self) -> CompiledConfig:
+        """由標頭中的設定編譯 (並確認其雜湊與記錄相符)。"""
+        if self._config is None:
+            config = compile_config(self.header['config'])
+            if config.config_hash != self.config_hash:
+                raise ValueError(f"'{self.store_path}' 標頭中的設定與其記錄的設定雜湊不符。")
+            self._config = config
+        return self._config
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, layout_id: int) -> bool:
+        return layout_id in self.records
+
+    @property
+    def layout_ids(self) -> List[int]:
+        return sorted(self.records)
+
+    def add(self, layout_id: int, seed: int, layout_data: Dict[str, Any]):
+        """記錄一個已產生的佈局 (立即寫入並 flush)。layout_data 為 `layout_to_dict` 的輸出，只用於計算校驗碼。"""
+        record = {"layout_id": layout_id, "seed": seed, "config_hash": self.config_hash,
+                  "generator_version": GENERATOR_VERSION, "checksum": layout_checksum(layout_data)}
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.records[layout_id] = record
+        for output in ('raw', 'ml'):
+            self._cache.pop((layout_id, output), None)
+
+    def _regenerate(self, layout_id: int) -> Dict[str, Any]:
+        record = self.records.get(layout_id)
+        if record is None:
+            raise KeyError(f"儲存檔中沒有佈局編號 {layout_id}。")
+        if record['config_hash'] != self.config_hash:
+            raise ValueError(f"佈局 #{layout_id} 的設定雜湊與儲存檔標頭不符。")
+        if self._pipeline is None:
+            self._pipeline = LayoutPipeline(self.config)
+        layout_data = render_layout(self._pipeline, layout_id, record['seed'], 'raw')
+        checksum = layout_checksum(layout_data)
+        if checksum != record['checksum']:
+            raise SeedStoreChecksumError(
+                f"佈局 #{layout_id} (Seed: {record['seed']}) 重新產生的校驗碼 {checksum} 與記錄的 {record['checksum']} 不符 "
+                f"(寫入時產生器版本 {record['generator_version']}，目前版本 {GENERATOR_VERSION})。")
+        return layout_data
+
+    def get(self, layout_id: int, output: str = 'raw') -> Dict[str, Any]:
+        """
+        重新產生並回傳一個佈局：'raw' 與 raw JSON 檔案的結構相同，'ml' 與 `format_for_ml.py` 的輸出相同
+        (是否包含精簡圖區塊依儲存檔設定中的 format_settings.include_graph_block)。
+        校驗碼不符時拋出 SeedStoreChecksumError。
+        """
+        key = (layout_id, output)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if output == 'raw':
+            data = self._regenerate(layout_id)
+        elif output == 'ml':
+            include_graph_block = self.config.section('format_settings').get('include_graph_block', False)
+            data = format_layout_dict(self.get(layout_id, 'raw'), include_graph_block)
+        else:
+            raise ValueError(f"output 必須是 'raw' 或 'ml'，目前為 {output!r}。")
+        if self.cache_size > 0:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def verify(self, layout_ids: Optional[List[int]] = None) -> List[int]:
+        """重新產生指定 (預設為全部) 的佈局並比對校驗碼，回傳不符的編號 (不使用也不填入快取)。"""
+        mismatched = []
+        for layout_id in (self.layout_ids if layout_ids is None else layout_ids):
+            try:
+                self._regenerate(layout_id)
+            except SeedStoreChecksumError:
+                mismatched.append(layout_id)
+        return mismatched
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,269 @@
+# aclg/pipeline/serving.py
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, TextIO
+
+from aclg.pipeline.config import CompiledConfig
+from aclg.pipeline.manifest import derive_layout_seed
+from aclg.pipeline.stream import generate_in_worker, init_worker
+
+class LayoutSampleServer:
+    """
+    常駐的佈局生成服務：以 worker 行程池產生 ML-ready 樣本 (`format_for_ml` 的結構)，供訓練程式即時取用。
+
+    - 生成一律在 worker 行程中進行 (至少一個行程)：服務行程本身 (包含每個連線的處理執行緒) 從不產生佈局，
+      只等待行程池的結果，因此各連線之間不會共用全域亂數狀態，每個樣本只取決於 (設定, 種子)。
+    - 每個 worker 行程只在啟動時編譯一次設定並建立 `LayoutPipeline`。
+    - 預取緩衝區：未指定種子的請求從「主種子 + 流水號」推導的種子串流取樣 (`derive_layout_seed`)，
+      緩衝區中隨時保持 prefetch_size 個已排入行程池的樣本，取走後立即補上。
+    - 指定種子的請求 (`seed` + `count` 或 `seeds`) 直接排入行程池，結果只取決於 (設定, 種子)。
+    - 所有方法皆為執行緒安全，多個訓練程式的連線可以共用同一個服務。
+
+    通訊協定為一行一個 JSON 物件 (請求與回應皆同)：
+        {"op": "sample", "count": 8}                  # 從預取串流取 8 個樣本
+        {"op": "sample", "count": 8, "seed": 42}      # 種子為 derive_layout_seed(42, 0..7)，可重現
+        {"op": "sample", "seeds": [1, 2, 3]}          # 直接指定每個樣本的種子
+        {"op": "stats"} / {"op": "info"}
+    回應為 {"ok": true, "samples": [{"seed": ..., "sample": {...}}, ...]} 或 {"ok": false, "error": "..."}；
+    請求中的 "id" 會原樣附在回應中。
+    """
+    def __init__(self, config: CompiledConfig, num_workers: Optional[int] = None, prefetch_size: int = 64,
+                 master_seed: Optional[int] = None, include_graph_block: bool = False,
+                 max_samples_per_request: int = 1024, verbose: bool = False):
+        if num_workers is not None and num_workers < 1:
+            raise ValueError(f"佈局服務至少需要 1 個 worker 行程，目前為 {num_workers} (None 表示使用 CPU 核心數)。")
+        self.config = config
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.prefetch_size = prefetch_size
+        self.master_seed = secrets.randbelow(2**32) if master_seed is None else int(master_seed)
+        self.max_samples_per_request = max_samples_per_request
+        self._executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=init_worker,
+                                             initargs=(config.to_raw(), 'ml', include_graph_block, verbose))
+        self._lock = threading.Lock()
+        self._prefetch: Deque[Future] = deque()
+        self._next_stream_index = 0
+        self._started_at = time.monotonic()
+        self._counters = {
+            "requests": 0,
+            "errors": 0,
+            "samples_served": 0,
+            "stream_samples": 0,
+            "seeded_samples": 0,
+            "prefetch_ready_hits": 0,
+            "generation_seconds": 0.0,
+        }
+        with self._lock:
+            self._refill()
+
+    def _submit_stream(self) -> Future:
+        seed = derive_layout_seed(self.master_seed, self._next_stream_index)
+        self._next_stream_index += 1
+        return self._executor.submit(generate_in_worker, 0, seed)
+
+    def _refill(self):
+        """(需持有鎖) 將預取緩衝區補滿。"""
+        while len(self._prefetch) < self.prefetch_size:
+            self._prefetch.append(self._submit_stream())
+
+    def _collect(self, futures: List[Future], counter: str) -> List[Dict[str, Any]]:
+        results = [future.result() for future in futures]
+        with self._lock:
+            self._counters[counter] += len(results)
+            self._counters["samples_served"] += len(results)
+            self._counters["generation_seconds"] += sum(elapsed for _, _, elapsed in results)
+        return [{"seed": seed, "sample": sample} for seed, sample, _ in results]
+
+    def _check_count(self, count: int):
+        if not 1 <= count <= self.max_samples_per_request:
+            raise ValueError(f"count 必須介於 1 到 {self.max_samples_per_request} 之間，目前為 {count}。")
+
+    def take(self, count: int = 1) -> List[Dict[str, Any]]:
+        """從預取串流取出 count 個樣本 (依串流順序)。"""
+        self._check_count(count)
+        with self._lock:
+            futures = [self._prefetch.popleft() if self._prefetch else self._submit_stream() for _ in range(count)]
+            self._counters["prefetch_ready_hits"] += sum(future.done() for future in futures)
+            self._refill()
+        return self._collect(futures, "stream_samples")
+
+    def generate(self, seeds: List[int]) -> List[Dict[str, Any]]:
+        """以指定的種子產生樣本 (不經過預取緩衝區)。"""
+        self._check_count(len(seeds))
+        futures = [self._executor.submit(generate_in_worker, 0, int(seed)) for seed in seeds]
+        return self._collect(futures, "seeded_samples")
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "config_hash": self.config.config_hash,
+            "master_seed": self.master_seed,
+            "num_workers": self.num_workers,
+            "prefetch_size": self.prefetch_size,
+            "max_samples_per_request": self.max_samples_per_request,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """吞吐量統計：服務的樣本數、預取命中數、平均生成時間與每秒樣本數。"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["prefetch_buffered"] = len(self._prefetch)
+            stats["prefetch_ready"] = sum(future.done() for future in self._prefetch)
+        uptime = time.monotonic() - self._started_at
+        stats["uptime_seconds"] = uptime
+        stats["samples_per_second"] = stats["samples_served"] / uptime if uptime > 0 else 0.0
+        served = stats["samples_served"]
+        stats["mean_generation_ms"] = 1000.0 * stats["generation_seconds"] / served if served else 0.0
+        return stats
+
+    def stats_line(self) -> str:
+        s = self.stats()
+        return (f"📈 已服務 {s['samples_served']} 個樣本 ({s['samples_per_second']:.1f} 個/秒)，"
+                f"預取就緒 {s['prefetch_ready']}/{s['prefetch_buffered']}，"
+                f"平均生成 {s['mean_generation_ms']:.1f} ms，請求 {s['requests']} 個 (錯誤 {s['errors']} 個)")
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """處理一個已解析的請求；不合法的請求拋出 ValueError。"""
+        if not isinstance(request, dict):
+            raise ValueError("請求必須是一個 JSON 物件。")
+        op = request.get("op", "sample")
+        if op == "sample":
+            if request.get("seeds") is not None:
+                samples = self.generate([int(seed) for seed in request["seeds"]])
+            elif request.get("seed") is not None:
+                count = int(request.get("count", 1))
+                self._check_count(count)
+                samples = self.generate([derive_layout_seed(int(request["seed"]), i) for i in range(count)])
+            else:
+                samples = self.take(int(request.get("count", 1)))
+            return {"ok": True, "samples": samples}
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if op == "info":
+            return {"ok": True, "info": self.info()}
+        raise ValueError(f"未知的操作: {op!r}")
+
+    def handle_line(self, line: str) -> str:
+        """處理一行 JSON 請求並回傳一行 JSON 回應 (不含換行)。"""
+        with self._lock:
+            self._counters["requests"] += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id") if isinstance(request, dict) else None
+            response = self.handle(request)
+        except Exception as e:
+            # 不合法的請求或生成失敗都只回報給此請求，服務本身繼續運作
+            with self._lock:
+                self._counters["errors"] += 1
+            response = {"ok": False, "error": str(e)}
+        if request_id is not None:
+            response["id"] = request_id
+        return json.dumps(response)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def serve_stdio(server: LayoutSampleServer, instream: TextIO, outstream: TextIO):
+    """以 stdin/stdout 提供服務：每讀入一行請求就寫出一行回應，直到輸入結束。"""
+    for line in instream:
+        if not line.strip():
+            continue
+        outstream.write(server.handle_line(line) + "\n")
+        outstream.flush()
+
+
+class _SocketRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write((self.server.sample_server.handle_line(line.decode('utf-8')) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+
+def serve_unix_socket(server: LayoutSampleServer, socket_path: str):
+    """
+    以 Unix socket 提供服務 (每個連線一個執行緒，共用同一個行程池與預取緩衝區)，直到被中斷。
+    若路徑上已有仍在服務的 socket 則拋出 RuntimeError；殘留的舊 socket 檔案會被移除。
+    """
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            raise RuntimeError(f"'{socket_path}' 已有其他服務正在使用。")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(socket_path)
+        finally:
+            probe.close()
+
+    unix_server = socketserver.ThreadingUnixStreamServer(socket_path, _SocketRequestHandler)
+    unix_server.daemon_threads = True
+    unix_server.sample_server = server
+    try:
+        unix_server.serve_forever()
+    finally:
+        unix_server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class LayoutServiceClient:
+    """
+    連線到 `serve_unix_socket` 的簡易客戶端 (供訓練程式使用)。
+
+        with LayoutServiceClient('/tmp/aclg_layouts.sock') as client:
+            batch = client.sample(32)              # [{"seed": ..., "sample": {...}}, ...]
+    """
+    def __init__(self, socket_path: str):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile('rwb')
+
+    def request(self, **fields) -> Dict[str, Any]:
+        """送出一個請求並等待回應；服務回報錯誤時拋出 RuntimeError。"""
+        self._file.write((json.dumps(fields) + "\n").encode('utf-8'))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("佈局服務已關閉連線。")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "未知的錯誤"))
+        return response
+
+    def sample(self, count: int = 1, seed: Optional[int] = None, seeds: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        fields: Dict[str, Any] = {"op": "sample", "count": count}
+        if seeds is not None:
+            fields["seeds"] = list(seeds)
+        elif seed is not None:
+            fields["seed"] = seed
+        return self.request(**fields)["samples"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request(op="stats")["stats"]
+
+    def info(self) -> Dict[str, Any]:
+        return self.request(op="info")["info"]
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,58 @@
+# aclg/pipeline/shard.py
+import os
+import glob
+import json
+import re
+from typing import List, Optional, Tuple
+
+SHARD_DIRECTORY_PREFIX = "shard_"
+
+def resolve_shard(shard_index: Optional[int], shard_count: Optional[int], main_config: dict) -> Tuple[int, int]:
+    """
+    決定本次執行的分片設定，優先序：函式參數 > 環境變數 (ACLG_SHARD_INDEX / ACLG_SHARD_COUNT) > config.yaml。
+    多台機器共用同一份 config.yaml 時，只需在各自的環境變數中指定分片編號。
+    """
+    if shard_index is None:
+        shard_index = os.environ.get('ACLG_SHARD_INDEX', main_config.get('shard_index', 0))
+    if shard_count is None:
+        shard_count = os.environ.get('ACLG_SHARD_COUNT', main_config.get('shard_count', 1))
+    shard_index, shard_count = int(shard_index), int(shard_count)
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"無效的分片設定: shard_index={shard_index}, shard_count={shard_count}")
+    return shard_index, shard_count
+
+def shard_layout_range(num_layouts: int, shard_index: int, shard_count: int) -> range:
+    """將全域佈局編號 [0, num_layouts) 切成 shard_count 段連續且互不重疊的區間，回傳第 shard_index 段。"""
+    start = num_layouts * shard_index // shard_count
+    stop = num_layouts * (shard_index + 1) // shard_count
+    return range(start, stop)
+
+def shard_directory_name(shard_index: int, shard_count: int) -> str:
+    return f"{SHARD_DIRECTORY_PREFIX}{shard_index:03d}_of_{shard_count:03d}"
+
+DATASET_INDEX_FILENAME = "dataset_index.json"
+
+def find_shard_manifests(raw_output_directory: str, manifest_filename: str = "run_manifest.json") -> List[str]:
+    """依分片編號排序，回傳 raw_output_directory 下所有分片的 manifest 路徑。"""
+    pattern = os.path.join(raw_output_directory, f"{SHARD_DIRECTORY_PREFIX}*", manifest_filename)
+    return sorted(glob.glob(pattern))
+
+def dataset_json_paths(raw_output_directory: str, json_subdirectory: str = "json_data") -> List[str]:
+    """
+    回傳資料集中所有佈局 JSON 的路徑 (依全域編號排序)。
+    若存在 merge_shards.py 建立的全域索引則以其為準，否則掃描未分片的 json 資料夾。
+    seed-only 分片的佈局沒有 JSON 檔 (需以 SeedStore 重新產生)，不會出現在結果中；
+    已被 dedup_dataset.py 移走或刪除的重複佈局也會被略過。
+    """
+    index_path = os.path.join(raw_output_directory, DATASET_INDEX_FILENAME)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            dataset_index = json.load(f)
+        return [os.path.join(raw_output_directory, entry['json']) for entry in dataset_index['layouts']
+                if 'json' in entry and os.path.exists(os.path.join(raw_output_directory, entry['json']))]
+    return sorted(glob.glob(os.path.join(raw_output_directory, json_subdirectory, '*.json')), key=_layout_id_sort_key)
+
+def _layout_id_sort_key(path: str) -> Tuple[int, int, str]:
+    """以檔名結尾的佈局編號 (`..._<id>.json`) 排序；沒有編號的檔案依檔名排在最後。"""
+    match = re.search(r'_(\d+)\.json$', path)
+    return (0, int(match.group(1)), path) if match else (1, 0, path)
@@ -0,0 +1,237 @@
+# aclg/pipeline/stream.py
+import itertools
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+from aclg.pipeline.config import CompiledConfig, compile_config, load_compiled_config
+from aclg.pipeline.export import layout_to_dict
+from aclg.pipeline.layout import LayoutPipeline, preserved_global_rng
+from aclg.pipeline.manifest import derive_layout_seed
+from aclg.pipeline.ml_format import format_layout_dict
+
+OUTPUT_FORMATS = ('raw', 'ml')
+
+
+def render_layout(pipeline: LayoutPipeline, layout_id: int, seed: int, output: str = 'raw',
+                  include_graph_block: bool = False) -> Dict[str, Any]:
+    """
+    以指定種子產生一組佈局並轉成可序列化的字典：
+    'raw' 與 raw JSON 檔案的結構相同 (`layout_to_dict`)，'ml' 與 `format_for_ml.py` 的輸出相同。
+    """
+    layout = pipeline.generate(seed)
+    layout_data = layout_to_dict(layout_id, seed, layout["root_component"], layout["gap_components"],
+                                 layout["final_leaf_components"], layout["netlist"], layout["symmetry"],
+                                 pipeline.exported_metrics(layout))
+    if output == 'raw':
+        return layout_data
+    return format_layout_dict(layout_data, include_graph_block)
+
+
+# --- worker 行程的狀態：產生器只在行程啟動時建立一次 (warm)，之後每個任務只需呼叫 generate ---
+_WORKER_PIPELINE: Optional[LayoutPipeline] = None
+_WORKER_OUTPUT = 'raw'
+_WORKER_INCLUDE_GRAPH_BLOCK = False
+
+
+def init_worker(raw_config: Dict[str, Any], output: str, include_graph_block: bool, verbose: bool):
+    """行程池的 initializer：編譯設定並建立此行程專用的 LayoutPipeline。"""
+    global _WORKER_PIPELINE, _WORKER_OUTPUT, _WORKER_INCLUDE_GRAPH_BLOCK
+    # Ctrl+C 由主行程負責處理，worker 不自行中斷
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 生成過程的訊息不寫入 stdout (避免與主行程的輸出或通訊管道交錯)
+    sys.stdout = sys.stderr if verbose else open(os.devnull, 'w')
+    _WORKER_PIPELINE = LayoutPipeline(compile_config(raw_config))
+    _WORKER_OUTPUT = output
+    _WORKER_INCLUDE_GRAPH_BLOCK = include_graph_block
+
+
+def generate_in_worker(layout_id: int, seed: int) -> Tuple[int, Dict[str, Any], float]:
+    """(worker) 產生一組佈局；回傳 (種子, 佈局字典, 生成秒數)。"""
+    start = time.perf_counter()
+    data = render_layout(_WORKER_PIPELINE, layout_id, seed, _WORKER_OUTPUT, _WORKER_INCLUDE_GRAPH_BLOCK)
+    return seed, data, time.perf_counter() - start
+
+
+def layout_seeds(master_seed: int, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    依序回傳 (佈局編號, 種子)，種子與批次生成 (`main_execution_batch_from_yaml`) 第一次嘗試所用的相同。
+    stop 為 None 時無限延續。
+    """
+    layout_ids = itertools.count(start) if stop is None else range(start, stop)
+    for layout_id in layout_ids:
+        yield layout_id, derive_layout_seed(master_seed, layout_id)
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
+
+
+class LayoutStream:
+    """
+    惰性產生佈局的迭代器，不經過磁碟。
+
+    - prefetch == 0 且 num_workers == 0：每次取值時才在呼叫端的執行緒中產生 (完全同步)。
+    - 其餘情況：實際生成一律在 worker 行程中進行 (每個行程只建立一次產生器；num_workers == 0 時使用 1 個行程)，
+      背景執行緒只負責把結果依序放進大小為 prefetch 的有界佇列，消費端取用時生成仍持續進行。
+      生成不會在呼叫端的行程中背景執行，因此不會與訓練迴圈共用 (或推進) `random` / `np.random` 的全域狀態。
+
+    結果永遠依照種子的順序回傳，且只取決於 (設定, 種子)。
+    """
+    def __init__(self, config: CompiledConfig, seeds: Iterable[Tuple[int, int]], output: str = 'raw',
+                 prefetch: int = 0, num_workers: int = 0, include_graph_block: Optional[bool] = None,
+                 with_seeds: bool = False):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"output 必須是 {OUTPUT_FORMATS} 之一，目前為 {output!r}。")
+        if prefetch < 0 or num_workers < 0:
+            raise ValueError("prefetch 與 num_workers 不能為負數。")
+        if include_graph_block is None:
+            include_graph_block = config.section('format_settings').get('include_graph_block', False)
+        self.config = config
+        self.output = output
+        self.prefetch = prefetch
+        # 背景預取不能在本行程的執行緒中生成 (會與呼叫端共用全域亂數狀態)，至少使用一個 worker 行程
+        self.num_workers = max(num_workers, 1) if prefetch > 0 else num_workers
+        self.include_graph_block = include_graph_block
+        self.with_seeds = with_seeds
+        self._seeds = iter(seeds)
+        self._pipeline: Optional[LayoutPipeline] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._closed = False
+
+    def _local_pipeline(self) -> LayoutPipeline:
+        if self._pipeline is None:
+            self._pipeline = LayoutPipeline(self.config)
+        return self._pipeline
+
+    def _generate_local(self, layout_id: int, seed: int) -> Dict[str, Any]:
+        # 同步模式在呼叫端的執行緒中產生：生成後還原全域亂數，呼叫端的亂數序列不受影響
+        with preserved_global_rng():
+            return render_layout(self._local_pipeline(), layout_id, seed, self.output, self.include_graph_block)
+
+    def _item(self, layout_id: int, seed: int, data: Dict[str, Any]):
+        return (layout_id, seed, data) if self.with_seeds else data
+
+    def _put(self, item) -> bool:
+        """放入佇列；佇列已滿時等待，串流關閉時放棄並回傳 False。"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        """背景執行緒：把種子交給行程池，並依提交順序把結果放進有界佇列 (本執行緒不使用任何亂數)。"""
+        try:
+            # 行程池中同時進行的任務數量有上限
+            in_flight = deque()
+            window = 2 * self.num_workers
+            while not self._stop.is_set():
+                for layout_id, seed in itertools.islice(self._seeds, window - len(in_flight)):
+                    in_flight.append((layout_id, self._executor.submit(generate_in_worker, layout_id, seed)))
+                if not in_flight:
+                    break
+                layout_id, future = in_flight.popleft()
+                seed, data, _ = future.result()
+                if not self._put(self._item(layout_id, seed, data)):
+                    return
+            self._put(_END)
+        except BaseException as e:
+            self._put(_Failure(e))
+
+    def _start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=init_worker,
+                                             initargs=(self.config.to_raw(), self.output, self.include_graph_block, False))
+        # 只使用行程池 (prefetch == 0) 時，佇列只保留一個已完成的結果
+        self._queue = queue.Queue(maxsize=max(self.prefetch, 1))
+        self._thread = threading.Thread(target=self._produce, name="aclg-layout-prefetch", daemon=True)
+        self._thread.start()
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._closed:
+            raise RuntimeError("LayoutStream 已關閉。")
+        if self.prefetch == 0 and self.num_workers == 0:
+            try:
+                for layout_id, seed in self._seeds:
+                    yield self._item(layout_id, seed, self._generate_local(layout_id, seed))
+            finally:
+                self.close()
+            return
+
+        if self._thread is None:
+            self._start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """停止背景生成並釋放行程池 (迭代結束或中途離開時會自動呼叫)。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_layouts(config: Union[CompiledConfig, str], seeds: Optional[Sequence[int]] = None, *,
+                 master_seed: Optional[int] = None, start: int = 0, stop: Optional[int] = None,
+                 output: str = 'raw', prefetch: int = 0, num_workers: int = 0,
+                 include_graph_block: Optional[bool] = None, with_seeds: bool = False) -> LayoutStream:
+    """
+    由設定與種子範圍惰性產生佈局，回傳可迭代的 `LayoutStream`。
+
+    Args:
+        config: 已編譯的設定或設定檔路徑。
+        seeds: 直接指定每個佈局的種子 (佈局編號為 start, start + 1, ...)。
+        master_seed: 未指定 seeds 時，佈局 [start, stop) 的種子由主種子推導，與同一個主種子的批次生成相同；
+            stop 為 None 時無限產生。
+        output: 'raw' (raw JSON 結構) 或 'ml' (`format_for_ml.py` 結構)。
+        prefetch: 有界預取佇列的大小；0 表示不使用背景預取。
+        num_workers: 背景生成所使用的 worker 行程數量；0 且 prefetch > 0 時使用 1 個行程。
+        include_graph_block: 'ml' 輸出是否包含精簡圖區塊；預設依 format_settings.include_graph_block。
+        with_seeds: 為 True 時每個項目為 (佈局編號, 種子, 資料)。
+
+        for sample in iter_layouts('config.yaml', master_seed=1234, stop=1000, output='ml', prefetch=32, num_workers=4):
+            ...
+    """
+    if isinstance(config, str):
+        config = load_compiled_config(config)
+    if seeds is not None:
+        seed_pairs = ((start + i, int(seed)) for i, seed in enumerate(seeds))
+    elif master_seed is not None:
+        seed_pairs = layout_seeds(int(master_seed), start, stop)
+    else:
+        raise ValueError("必須指定 seeds 或 master_seed。")
+    return LayoutStream(config, seed_pairs, output=output, prefetch=prefetch, num_workers=num_workers,
+                        include_graph_block=include_graph_block, with_seeds=with_seeds)
@@ -1,9 +1,11 @@
 # aclg/post_processing/padding.py
 
 from aclg.dataclass.component import Component
-from typing import List, Tuple, Union
+from typing import List, Sequence, Tuple, Union
 import random
 
+import numpy as np
+
 def add_padding(
         components: List[Component], 
         padding: float
@@ -172,4 +174,122 @@ def add_padding_based_on_alignment(
             # Padding 過大，優雅地跳過
             pass
 
-    return components
\ No newline at end of file
+    return components
+
+# --- 批次版本：以 (M, 4) 幾何陣列 [x, y, width, height] 一次處理整個層級 ---
+# 批次版本不修改輸入，而是回傳列順序不變的新陣列；隨機版本使用 NumPy 相容的 rng (預設為 np.random 全域狀態)。
+_SIDES = ('top', 'bottom', 'left', 'right')
+
+def _apply_padding(geometry: np.ndarray, top, bottom, left, right) -> Tuple[np.ndarray, np.ndarray]:
+    """回傳套用非對稱 Padding 後的新幾何陣列，以及每一列的 Padding 是否放得下。"""
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+    top, bottom, left, right = (np.broadcast_to(np.asarray(v, dtype=np.float64), (len(geometry),))
+                                for v in (top, bottom, left, right))
+    padding_h = left + right
+    padding_v = top + bottom
+    fits = (geometry[:, 2] - padding_h >= 0) & (geometry[:, 3] - padding_v >= 0)
+
+    padded = np.empty_like(geometry)
+    padded[:, 0] = geometry[:, 0] + (left - right) / 2
+    padded[:, 1] = geometry[:, 1] + (top - bottom) / 2
+    padded[:, 2] = geometry[:, 2] - padding_h
+    padded[:, 3] = geometry[:, 3] - padding_v
+    return padded, fits
+
+def add_padding_batch(geometry: np.ndarray, padding: Union[float, np.ndarray]) -> np.ndarray:
+    """add_padding 的批次版本，padding 可為單一數值或每列各自的 (M,) 陣列。"""
+    padding = np.asarray(padding, dtype=np.float64)
+    if np.any(padding < 0):
+        raise ValueError("Padding 值不能為負數。")
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+    padding = np.broadcast_to(padding, (len(geometry),))
+    too_large = (geometry[:, 2] - 2 * padding < 0) | (geometry[:, 3] - 2 * padding < 0)
+    if np.any(too_large):
+        i = int(np.argmax(too_large))
+        raise ValueError(f"Padding ({padding[i]}) 對於元件尺寸 ({geometry[i, 2]}x{geometry[i, 3]}) 而言太大了。")
+
+    padded = geometry.copy()
+    padded[:, 2] -= 2 * padding
+    padded[:, 3] -= 2 * padding
+    return padded
+
+def add_padding_advanced_batch(
+        geometry: np.ndarray,
+        top: Union[float, np.ndarray] = 0,
+        bottom: Union[float, np.ndarray] = 0,
+        left: Union[float, np.ndarray] = 0,
+        right: Union[float, np.ndarray] = 0
+) -> np.ndarray:
+    """add_padding_advanced 的批次版本，四個方向的 Padding 皆可為單一數值或每列各自的 (M,) 陣列。"""
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+    padded, fits = _apply_padding(geometry, top, bottom, left, right)
+    if not np.all(fits):
+        i = int(np.argmin(fits))
+        raise ValueError(f"Padding 對於元件尺寸 ({geometry[i, 2]}x{geometry[i, 3]}) 而言太大了。")
+    return padded
+
+def add_padding_random_oneside_batch(
+        geometry: np.ndarray,
+        padding_value: Union[float, Tuple[float, float], np.ndarray],
+        rng=np.random
+) -> np.ndarray:
+    """
+    add_padding_random_oneside 的批次版本：每列隨機選一個邊施加 Padding，放不下的列保持原樣
+    (取代純量版本中逐一呼叫的 try/except)。
+
+    Args:
+        padding_value: 固定值、(min, max) 範圍 (每列各自抽樣)，或每列各自的 (M,) 陣列。
+        rng: np.random 模組、np.random.RandomState 或 np.random.Generator。
+    """
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+    if isinstance(padding_value, tuple):
+        min_pad, max_pad = padding_value
+        if min_pad < 0 or max_pad < 0 or max_pad < min_pad:
+            raise ValueError("無效的 padding 範圍。")
+        current_padding = rng.uniform(min_pad, max_pad, size=len(geometry))
+    else:
+        current_padding = np.broadcast_to(np.asarray(padding_value, dtype=np.float64), (len(geometry),))
+        if np.any(current_padding < 0):
+            raise ValueError("Padding 值不能為負數。")
+
+    chosen_side = rng.choice(len(_SIDES), size=len(geometry))
+    sides = {side: np.where(chosen_side == i, current_padding, 0.0) for i, side in enumerate(_SIDES)}
+    padded, fits = _apply_padding(geometry, **sides)
+    return np.where(fits[:, None], padded, geometry)
+
+def add_padding_based_on_alignment_batch(
+    geometry: np.ndarray,
+    generate_rules: Sequence[str],
+    padding_range: Tuple[float, float],
+    vertical_align_side: str = 'both',
+    horizontal_align_side: str = 'both',
+    rng=np.random
+) -> np.ndarray:
+    """
+    add_padding_based_on_alignment 的批次版本：依每列的 generate_rule 判斷排列軸，
+    一次為所有列施加 Padding，放不下的列保持原樣。
+    """
+    geometry = np.asarray(geometry, dtype=np.float64).reshape(-1, 4)
+    rules = np.asarray(generate_rules, dtype=str).reshape(-1)
+    if len(rules) != len(geometry):
+        raise ValueError(f"元件數量 ({len(geometry)}) 與規則數量 ({len(rules)}) 必須相同。")
+    current_padding = rng.uniform(*padding_range, size=len(geometry))
+
+    def matches_any(align_rules):
+        return np.logical_or.reduce([np.char.find(rules, r) >= 0 for r in align_rules] + [np.zeros(len(rules), dtype=bool)])
+
+    # 與純量版本相同，先判斷垂直排列，再判斷水平排列
+    is_vertical = matches_any(('align_left', 'align_right', 'align_center_vertical'))
+    is_horizontal = ~is_vertical & matches_any(('align_top', 'align_bottom', 'align_center_horizontal'))
+
+    def side_padding(mask, side, align_side):
+        return np.where(mask & (align_side in (side, 'both')), current_padding, 0.0)
+
+    padded, fits = _apply_padding(
+        geometry,
+        top=side_padding(is_horizontal, 'top', horizontal_align_side),
+        bottom=side_padding(is_horizontal, 'bottom', horizontal_align_side),
+        left=side_padding(is_vertical, 'left', vertical_align_side),
+        right=side_padding(is_vertical, 'right', vertical_align_side)
+    )
+    return np.where(fits[:, None], padded, geometry)
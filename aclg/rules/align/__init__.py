@@ -1,8 +1,10 @@
 # aclg/rules/align/__init__.py (修改後)
 from aclg.dataclass.component import Component
-from typing import List
+from typing import List, Sequence, Union
 from enum import Enum
 
+import numpy as np
+
 class AlignmentMode(str, Enum):
     """定義對齊模式的列舉"""
     TOP = "top"
@@ -62,4 +64,49 @@ def align_components(
         
         comp.generate_rule = f"align_{mode.value}"
 
-    return components
\ No newline at end of file
+    return components
+
+# --- 批次版本：一次處理整個層級的元件 ---
+_HEIGHT_MODES = (AlignmentMode.TOP, AlignmentMode.BOTTOM, AlignmentMode.CENTER_H)
+
+def align_components_batch(
+        geometry: np.ndarray,
+        scale_factors: np.ndarray,
+        modes: Union[AlignmentMode, Sequence[AlignmentMode]]
+) -> np.ndarray:
+    """
+    align_components 的批次版本：每一列可有各自的縮放比例與對齊模式，結果與逐一呼叫 align_components 逐位元相同。
+    與純量版本不同，此函式不修改輸入，而是回傳新的幾何陣列 (列順序不變，因此沿用呼叫端的父元件索引)。
+
+    Args:
+        geometry: (M, 4) 的元件幾何陣列 [x, y, width, height]。
+        scale_factors: (M,) 的縮放比例。
+        modes: 單一對齊模式 (套用到所有列) 或長度為 M 的對齊模式序列。
+    """
+    geometry = np.array(geometry, dtype=np.float64).reshape(-1, 4)
+    scale_factors = np.asarray(scale_factors, dtype=np.float64)
+    if len(geometry) != len(scale_factors):
+        raise ValueError(f"元件數量 ({len(geometry)}) 與比例因子數量 ({len(scale_factors)}) 必須相同。")
+
+    mode_values = np.broadcast_to(
+        np.asarray([AlignmentMode(modes).value] if isinstance(modes, str) else [AlignmentMode(m).value for m in modes]),
+        (len(geometry),))
+    scales_height = np.isin(mode_values, [m.value for m in _HEIGHT_MODES])
+    axis = np.where(scales_height, 1, 0)  # 縮放高度時移動 y，縮放寬度時移動 x
+    rows = np.arange(len(geometry))
+
+    original_size = geometry[rows, 2 + axis]
+    new_size = original_size * scale_factors
+    if np.any(new_size < 0):
+        raise ValueError("計算出的新尺寸不能為負數。")
+    center = geometry[rows, axis]
+
+    # TOP/LEFT 固定起始邊，BOTTOM/RIGHT 固定結束邊，置中模式的中心點不變
+    leading = np.isin(mode_values, [AlignmentMode.TOP.value, AlignmentMode.LEFT.value])
+    trailing = np.isin(mode_values, [AlignmentMode.BOTTOM.value, AlignmentMode.RIGHT.value])
+    center = np.where(leading, (center - original_size / 2) + new_size / 2, center)
+    center = np.where(trailing, (center + original_size / 2) - new_size / 2, center)
+
+    geometry[rows, 2 + axis] = new_size
+    geometry[rows, axis] = center
+    return geometry
@@ -1,4 +1,8 @@
 # aclg/rules/spacing_grid.py
+from typing import Tuple, Union
+
+import numpy as np
+
 from aclg.dataclass.component import Component
 
 def spacing_grid(
@@ -84,4 +88,46 @@ def spacing_vertical(
     for comp in components:
         comp.generate_rule = "spacing_vertical"
         
-    return components
\ No newline at end of file
+    return components
+
+# --- 批次版本：一次處理整個層級的父元件 ---
+def spacing_grid_batch(
+        parents: np.ndarray,
+        rows: Union[int, np.ndarray] = 1,
+        cols: Union[int, np.ndarray] = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    spacing_grid 的批次版本：每個父元件可有各自的行列數，結果與逐一呼叫 spacing_grid 逐位元相同。
+
+    Args:
+        parents: (N, 4) 的父元件幾何陣列 [x, y, width, height]。
+        rows: 每個父元件的行數，整數或 (N,) 陣列。
+        cols: 每個父元件的列數，整數或 (N,) 陣列。
+
+    Returns:
+        (children, parent_index)：(M, 4) 的子元件幾何陣列 (依父元件、再依列優先順序排列) 與 (M,) 的父元件索引。
+    """
+    parents = np.asarray(parents, dtype=np.float64).reshape(-1, 4)
+    rows = np.broadcast_to(np.asarray(rows, dtype=np.int64), (len(parents),))
+    cols = np.broadcast_to(np.asarray(cols, dtype=np.int64), (len(parents),))
+    if np.any(rows <= 0) or np.any(cols <= 0):
+        raise ValueError("行數和列數必須是大於 0 的整數。")
+
+    counts = rows * cols
+    parent_index = np.repeat(np.arange(len(parents)), counts)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    local_index = np.arange(len(parent_index)) - offsets[parent_index]
+    r, c = np.divmod(local_index, cols[parent_index])
+
+    x, y, width, height = parents[parent_index].T
+    sub_width = width / cols[parent_index]
+    sub_height = height / rows[parent_index]
+    start_x = x - width / 2
+    start_y = y - height / 2
+    children = np.column_stack((
+        start_x + (c * sub_width) + (sub_width / 2),
+        start_y + (r * sub_height) + (sub_height / 2),
+        sub_width,
+        sub_height
+    ))
+    return children, parent_index
@@ -1,6 +1,8 @@
 # aclg/rules/split_ratio.py
-from typing import List
+from typing import List, Sequence, Tuple, Union
 from enum import Enum
+
+import numpy as np
 from aclg.dataclass.component import Component
 
 class SplitOrientation(str, Enum):
@@ -107,4 +109,91 @@ def split_by_ratio_grid(
     for comp in final_components:
         comp.generate_rule = "split_by_ratio_grid"
         
-    return final_components
\ No newline at end of file
+    return final_components
+
+# --- 批次版本：一次處理整個層級的父元件 ---
+def _ratios_to_padded(ratios: Union[np.ndarray, Sequence[Sequence[float]]], num_parents: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    將每個父元件的比例列表轉成右側補零的 (N, K) 矩陣，並回傳每列的實際長度。
+    ratios 可以是 (N, K) 陣列 (每個父元件子元件數相同)，或長度為 N 的不等長序列。
+    """
+    if isinstance(ratios, np.ndarray) and ratios.ndim == 2:
+        padded = ratios.astype(np.float64, copy=False)
+        counts = np.full(padded.shape[0], padded.shape[1], dtype=np.int64)
+    else:
+        counts = np.array([len(r) for r in ratios], dtype=np.int64)
+        padded = np.zeros((len(counts), int(counts.max(initial=0))), dtype=np.float64)
+        padded[np.arange(padded.shape[1]) < counts[:, None]] = np.concatenate(
+            [np.asarray(r, dtype=np.float64) for r in ratios]) if len(counts) else []
+    if padded.shape[0] != num_parents:
+        raise ValueError(f"比例列表數量 ({padded.shape[0]}) 與父元件數量 ({num_parents}) 必須相同。")
+    return padded, counts
+
+def split_by_ratio_batch(
+        parents: np.ndarray,
+        ratios: Union[np.ndarray, Sequence[Sequence[float]]],
+        orientation: SplitOrientation = SplitOrientation.HORIZONTAL
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    split_by_ratio 的批次版本：以單次 NumPy 運算分割 N 個父元件，結果與逐一呼叫 split_by_ratio 逐位元相同。
+
+    Args:
+        parents: (N, 4) 的父元件幾何陣列 [x, y, width, height]。
+        ratios: 每個父元件的比例列表，(N, K) 陣列或長度為 N 的不等長序列。
+        orientation: 分割的方向 (所有父元件相同)。
+
+    Returns:
+        (children, parent_index)：(M, 4) 的子元件幾何陣列 (依父元件、再依比例順序排列) 與 (M,) 的父元件索引。
+    """
+    parents = np.asarray(parents, dtype=np.float64).reshape(-1, 4)
+    padded, counts = _ratios_to_padded(ratios, len(parents))
+    return _split_padded(parents, padded, counts, orientation)
+
+def split_by_ratio_grid_batch(
+        parents: np.ndarray,
+        h_ratios: Union[np.ndarray, Sequence[Sequence[float]]],
+        v_ratios: Union[np.ndarray, Sequence[Sequence[float]]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    split_by_ratio_grid 的批次版本：每個父元件先依 h_ratios 切成水平長條，再依 v_ratios 切成網格。
+
+    Returns:
+        (children, parent_index)：子元件依父元件、列、行的順序排列，與逐一呼叫 split_by_ratio_grid 相同。
+    """
+    parents = np.asarray(parents, dtype=np.float64).reshape(-1, 4)
+    h_padded, h_counts = _ratios_to_padded(h_ratios, len(parents))
+    v_padded, v_counts = _ratios_to_padded(v_ratios, len(parents))
+    strips, strip_parent = _split_padded(parents, h_padded, h_counts, SplitOrientation.HORIZONTAL)
+    # 每個長條沿用其父元件的垂直比例
+    cells, cell_strip = _split_padded(strips, v_padded[strip_parent], v_counts[strip_parent], SplitOrientation.VERTICAL)
+    return cells, strip_parent[cell_strip]
+
+def _split_padded(parents: np.ndarray, padded: np.ndarray, counts: np.ndarray,
+                  orientation: SplitOrientation) -> Tuple[np.ndarray, np.ndarray]:
+    num_parents, max_children = padded.shape
+    if num_parents == 0 or max_children == 0:
+        return np.empty((0, 4), dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    # 沿列方向循序累加，與純量版本 sum(ratios) 的加總順序相同 (補上的 0 不影響結果)
+    totals = np.cumsum(padded, axis=1)[:, -1]
+    if np.any((totals <= 0) & (counts > 0)):
+        raise ValueError("比例總和必須大於 0。")
+
+    axis = 1 if orientation == SplitOrientation.HORIZONTAL else 0  # 水平分割沿 Y 軸，垂直分割沿 X 軸
+    extent = parents[:, 2 + axis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sub_sizes = extent[:, None] * (padded / totals[:, None])
+
+    # 第 0 欄放起點，循序累加後即為每個子元件的起始座標 (current += sub_size)
+    steps = np.empty((num_parents, max_children + 1), dtype=np.float64)
+    steps[:, 0] = parents[:, axis] - extent / 2
+    steps[:, 1:] = sub_sizes
+    starts = np.cumsum(steps, axis=1)[:, :-1]
+    centers = starts + sub_sizes / 2
+
+    valid = np.arange(max_children) < counts[:, None]
+    parent_index = np.nonzero(valid)[0]
+    children = np.repeat(parents, counts, axis=0)
+    children[:, axis] = centers[valid]
+    children[:, 2 + axis] = sub_sizes[valid]
+    return children, parent_index
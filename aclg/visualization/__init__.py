@@ -0,0 +1,4 @@
+from aclg.visualization.gif_stream import StreamingGifWriter
+from aclg.visualization.plotter import ComponentPlotter
+from aclg.visualization.formatted import draw_formatted_layout, plot_contact_sheet, plot_formatted_layout
+from aclg.visualization.render_cache import RenderCache, render_key
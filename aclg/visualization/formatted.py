@@ -0,0 +1,133 @@
+# aclg/visualization/formatted.py
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+# 對稱群組的顏色 (依群組順序循環使用)
+SYMMETRY_COLORS = ['#ff796c', '#6cff79', '#796cff', '#ffc56c', '#6cffc5', '#c56cff']
+
+
+def draw_formatted_layout(ax, data: Dict[str, Any], canvas_size: Tuple[int, int] = (1000, 1000),
+                          show_labels: bool = True, pin_marker_size: float = 3) -> bool:
+    """
+    在指定的 Axes 上繪製單一 formatted JSON (`format_for_ml` 的輸出) 的佈局。
+    缺少 'node' 或 'target' 資料時不繪製並回傳 False。
+    """
+    canvas_w, canvas_h = canvas_size
+    nodes = data.get("node", [])
+    targets = data.get("target", [])
+    edges = data.get("edges", {}).get("basic_component_edge", [])
+    symmetry_groups = data.get("symmetry_groups", [])
+
+    if not nodes or not targets:
+        return False
+
+    ax.set_facecolor('#f0f0f0')
+
+    component_colors = {}
+    for i, pair in enumerate(symmetry_groups):
+        color = SYMMETRY_COLORS[i % len(SYMMETRY_COLORS)]
+        if len(pair) == 2:
+            component_colors[pair[0]] = color
+            component_colors[pair[1]] = color
+
+    # 1. 繪製元件 (Nodes)
+    components = []
+    for i in range(len(nodes)):
+        norm_w, norm_h = nodes[i]
+        norm_x, norm_y = targets[i]
+
+        abs_w = norm_w * canvas_w
+        abs_h = norm_h * canvas_h
+        abs_x = norm_x * (canvas_w / 2)
+        abs_y = norm_y * (canvas_h / 2)
+
+        components.append({'x': abs_x, 'y': abs_y, 'w': abs_w, 'h': abs_h})
+
+        # 對稱元件使用群組顏色，其餘為 skyblue
+        face_color = component_colors.get(i, 'skyblue')
+        ax.add_patch(Rectangle(
+            (abs_x - abs_w / 2, abs_y - abs_h / 2), abs_w, abs_h,
+            linewidth=1, edgecolor='black', facecolor=face_color, alpha=0.7
+        ))
+        if show_labels:
+            ax.text(abs_x, abs_y, str(i), ha='center', va='center', fontsize=8, color='black')
+
+    # 2. 繪製網路線 (Edges)
+    all_pins = set()
+    for edge_info in edges:
+        indices, offsets = edge_info
+        src_idx, dest_idx = indices
+        src_off_x, src_off_y, dest_off_x, dest_off_y = offsets
+
+        if src_idx < len(components) and dest_idx < len(components):
+            src_comp = components[src_idx]
+            dest_comp = components[dest_idx]
+
+            src_pin_x = src_comp['x'] + src_off_x * (canvas_w / 2)
+            src_pin_y = src_comp['y'] + src_off_y * (canvas_h / 2)
+            dest_pin_x = dest_comp['x'] + dest_off_x * (canvas_w / 2)
+            dest_pin_y = dest_comp['y'] + dest_off_y * (canvas_h / 2)
+
+            ax.plot([src_pin_x, dest_pin_x], [src_pin_y, dest_pin_y], color='#555555', linestyle='-', linewidth=0.8, alpha=0.7)
+            all_pins.add((src_pin_x, src_pin_y))
+            all_pins.add((dest_pin_x, dest_pin_y))
+
+    # 3. 繪製 Pin 點
+    for px, py in all_pins:
+        ax.plot(px, py, 'o', color='black', markersize=pin_marker_size)
+
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_xlim(-canvas_w / 2 - 50, canvas_w / 2 + 50)
+    ax.set_ylim(-canvas_h / 2 - 50, canvas_h / 2 + 50)
+    ax.grid(True, linestyle='--', alpha=0.5)
+    return True
+
+
+def plot_formatted_layout(data: Dict[str, Any], output_path: str, canvas_size: Tuple[int, int] = (1000, 1000),
+                          figure_size: Tuple[float, float] = (12, 12), dpi: int = 150) -> bool:
+    """
+    繪製單一 formatted JSON 並存成圖片；缺少 'node' 或 'target' 資料而無法繪圖時回傳 False。
+    使用獨立的 Figure (不經過 pyplot 的全域狀態)，因此可以安全地在多個行程中同時呼叫。
+    """
+    fig = Figure(figsize=figure_size)
+    ax = fig.subplots()
+    if not draw_formatted_layout(ax, data, canvas_size):
+        return False
+    ax.set_title(f"視覺化: {os.path.basename(output_path)}", fontsize=16)
+    ax.set_xlabel("X 座標")
+    ax.set_ylabel("Y 座標")
+    fig.savefig(output_path, dpi=dpi)
+    return True
+
+
+def plot_contact_sheet(layouts: Sequence[Tuple[str, Dict[str, Any]]], output_path: str,
+                       canvas_size: Tuple[int, int] = (1000, 1000), columns: Optional[int] = None,
+                       tile_size: float = 4, dpi: int = 100) -> int:
+    """
+    將多個 (名稱, formatted 資料) 以網格排列在同一張圖片中，方便快速檢視資料集。
+    columns 預設為 ceil(sqrt(N))；回傳實際繪製的佈局數量。
+    """
+    num_layouts = len(layouts)
+    if num_layouts == 0:
+        return 0
+    columns = columns or math.ceil(math.sqrt(num_layouts))
+    rows = math.ceil(num_layouts / columns)
+
+    fig = Figure(figsize=(columns * tile_size, rows * tile_size))
+    axes: List = list(fig.subplots(rows, columns, squeeze=False).ravel())
+    num_drawn = 0
+    for ax, (name, data) in zip(axes, layouts):
+        if draw_formatted_layout(ax, data, canvas_size, show_labels=False, pin_marker_size=1):
+            num_drawn += 1
+        ax.set_title(name, fontsize=8)
+        ax.set_xticks([])
+        ax.set_yticks([])
+    for ax in axes[num_layouts:]:
+        ax.set_axis_off()
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi)
+    return num_drawn
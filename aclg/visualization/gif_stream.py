@@ -0,0 +1,78 @@
+# aclg/visualization/gif_stream.py
+import os
+from typing import Optional
+
+from PIL import Image, GifImagePlugin
+
+
+class StreamingGifWriter:
+    """
+    逐幀串流寫入的 GIF 編碼器。
+
+    - 每一幀直接從 matplotlib 的 Agg 畫布緩衝區取出 (不經過 PNG 編碼)，量化為 256 色後立即寫入 GIF 檔，
+      記憶體中不會累積任何幀。
+    - 只有在指定 frame_directory 時才會另外把每一幀存成 PNG (對應 gif_settings.cleanup_frames: false)。
+    - 所有幀會被縮放成第一幀的尺寸 (GIF 的邏輯畫面尺寸)。
+    """
+    def __init__(self, gif_path: str, frame_duration_seconds: float = 1.0,
+                 frame_directory: Optional[str] = None, loop: int = 0):
+        self.gif_path = gif_path
+        self.frame_duration_ms = int(round(frame_duration_seconds * 1000))
+        self.frame_directory = frame_directory
+        self.loop = loop
+        self.num_frames = 0
+        self._size = None
+
+        directory = os.path.dirname(gif_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if frame_directory:
+            os.makedirs(frame_directory, exist_ok=True)
+        self._file = open(gif_path, 'wb')
+
+    def add_figure(self, fig, frame_name: Optional[str] = None):
+        """將一個 matplotlib Figure 渲染到記憶體中並寫入為下一幀。"""
+        fig.canvas.draw()
+        image = Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+        self.add_image(image.convert('RGB'), frame_name)
+
+    def add_image(self, image: Image.Image, frame_name: Optional[str] = None):
+        """將一張 PIL 影像寫入為下一幀。"""
+        if self._file.closed:
+            raise ValueError(f"GIF '{self.gif_path}' 已關閉，無法再寫入新的幀。")
+        if self._size is None:
+            self._size = image.size
+        elif image.size != self._size:
+            image = image.resize(self._size)
+
+        if self.frame_directory:
+            image.save(os.path.join(self.frame_directory, f"{frame_name or f'frame_{self.num_frames:03d}'}.png"))
+
+        frame = image.convert('RGB').quantize(colors=256, dither=Image.Dither.NONE)
+        if self.num_frames == 0:
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': self.loop, 'duration': self.frame_duration_ms})
+            for chunk in header:
+                self._file.write(chunk)
+        # 每一幀帶有自己的調色盤，避免後續幀被第一幀的顏色限制
+        for chunk in GifImagePlugin.getdata(frame, offset=(0, 0), duration=self.frame_duration_ms,
+                                            include_color_table=True, disposal=1):
+            self._file.write(chunk)
+        self._file.flush()
+        self.num_frames += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.num_frames == 0:
+            # 沒有任何幀的 GIF 不是合法檔案，直接移除
+            self._file.close()
+            os.remove(self.gif_path)
+            return
+        self._file.write(b';')  # GIF trailer
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
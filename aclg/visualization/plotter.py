@@ -0,0 +1,98 @@
+# aclg/visualization/plotter.py
+from typing import List, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from aclg.dataclass.component import Component
+from aclg.dataclass.netlist import Netlist
+
+# 請使用這個更新版的 ComponentPlotter 來確保 GapFiller 元件能被繪製
+class ComponentPlotter:
+    """
+    視覺化工具，可以繪製元件、邊(edges)，以及僅繪製被連接的引腳(pins)。
+    新版支援繪製非階層性新增的元件 (如 GapFiller)。
+    """
+    def _draw_recursive(self, ax, component: Component):
+        # (此函式不變)
+        top_left_x, top_left_y = component.get_topleft()
+        width, height, level = component.width, component.height, component.level
+        # 擴充顏色列表以支援更多層級，確保 Level 4 有獨特顏色
+        LEVEL_COLORS = ['#FFB3BA', '#FFDFBA', '#FFFFBA', '#BAFFC9', '#BAE1FF', '#E0BBE4', '#FFD1DC', '#B2DFDB']
+        color = LEVEL_COLORS[level % len(LEVEL_COLORS)]
+        rect = plt.Rectangle((top_left_x, top_left_y), width, height,
+                             linewidth=1.2, edgecolor='black', facecolor=color, alpha=0.8)
+        ax.add_patch(rect)
+        # --- << 以下是修改的部分 >> ---
+        
+        # 1. 產生基礎標籤 (層級 和 關係ID)
+        label = f"L{level}\nID:{component.relation_id}"
+
+        # 2. 如果元件屬於一個對稱群組，則附加對稱 ID
+        if component.symmetric_group_id != -1:
+            label += f"\nS:{component.symmetric_group_id}" # 在新的一行加上對稱 ID
+            
+        # 3. 將最終的標籤文字繪製到圖上
+        ax.text(component.x, component.y, label, ha='center', va='center', fontsize=8, color='black')
+        
+        # --- << 修改結束 >> ---
+        if component.sub_components:
+            for sub_comp in component.sub_components:
+                self._draw_recursive(ax, sub_comp)
+
+    def _draw_netlist(self, ax, netlist: Netlist):
+        if netlist is None or netlist.num_edges == 0:
+            return
+
+        connected_pins = netlist.pin_coords[np.unique(netlist.edges)]
+        
+        print(f"[*] 正在繪製 {netlist.num_edges} 條邊...")
+        for (x1, y1), (x2, y2) in netlist.edge_coordinates():
+            ax.plot([x1, x2], [y1, y2], color='#555555', linestyle='-', linewidth=0.7, alpha=0.6)
+            
+        print(f"[*] 正在繪製 {len(connected_pins)} 個已連接的引腳...")
+        ax.plot(connected_pins[:, 0], connected_pins[:, 1], 'o', linestyle='none', color='black', markersize=2.5, alpha=0.8)
+
+    def render(self, components_to_plot: List[Component], title: str = "Component Layout",
+               netlist: Netlist = None, figsize: Tuple[float, float] = (14, 14)):
+        """
+        將元件和 Netlist 繪製到一個新的 Figure 上並回傳 (不儲存、不關閉)，供存檔或串流成 GIF 幀使用。
+        """
+        fig, ax = plt.subplots(1, figsize=figsize)
+
+        for comp in components_to_plot:
+            self._draw_recursive(ax, comp)
+        
+        if netlist is not None:
+            self._draw_netlist(ax, netlist)
+        
+        ax.autoscale_view()
+        ax.set_aspect('equal', adjustable='box')
+        ax.set_title(title, fontsize=16)
+        ax.set_xlabel("X-axis")
+        ax.set_ylabel("Y-axis")
+        ax.grid(True, linestyle='--', alpha=0.5)
+        return fig
+
+    def plot(self, components_to_plot: List[Component], title: str = "Component Layout",
+             netlist: Netlist = None,
+             output_filename: str = "component_visualization.png"): # << 修改點
+        """
+        繪製元件和 Netlist (邊與已連接的引腳)。
+        """
+        # plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei'] 
+        # plt.rcParams['axes.unicode_minus'] = False
+        if not components_to_plot:
+            fig, ax = plt.subplots(1, figsize=(14, 14))
+            ax.set_title("元件列表為空")
+            plt.show()
+            return
+
+        fig = self.render(components_to_plot, title, netlist)
+        
+        # << 修改點 >> 使用傳入的 output_filename 參數
+        fig.savefig(output_filename, dpi=150)
+        print(f"✅ 繪圖完成！圖片已儲存至 {output_filename}")
+        # 在批次產生時，我們通常不希望立即顯示圖片，因此將 plt.show() 註解掉
+        # plt.show() 
+        plt.close(fig) # 畫完後關閉圖形，釋放記憶體，非常重要！
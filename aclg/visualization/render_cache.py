@@ -0,0 +1,83 @@
+# aclg/visualization/render_cache.py
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+# 繪圖程式改變 (輸出外觀不同) 時遞增，讓所有既有的快取項目失效
+RENDER_VERSION = 1
+
+
+def render_key(content: bytes, settings: Dict[str, Any]) -> str:
+    """以輸入檔案內容與繪圖設定 (尺寸、dpi 等) 計算圖片的快取鍵。"""
+    h = hashlib.sha256()
+    h.update(json.dumps({"render_version": RENDER_VERSION, **settings}, sort_keys=True).encode('utf-8'))
+    h.update(b'\0')
+    h.update(content)
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    以追加寫入的文字檔記錄每張圖片最後一次渲染所使用的快取鍵，每行格式為 `<image_name>\\t<key>`。
+
+    - 同一張圖片的較新紀錄會覆蓋較舊的紀錄；過時的行數超過有效項目時，開啟時會重寫一次檔案。
+    - 圖片只有在「快取鍵相同且檔案仍存在」時才視為最新。
+    - 若最後一行因中斷而不完整，載入時會直接略過。
+    """
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self._entries: Dict[str, str] = {}
+
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        num_lines = 0
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        continue
+                    parts = line.rstrip('\n').split('\t', 1)
+                    if len(parts) == 2 and parts[0]:
+                        self._entries[parts[0]] = parts[1]
+                        num_lines += 1
+
+        if num_lines > 2 * len(self._entries):
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{name}\t{key}\n" for name, key in self._entries.items())
+            os.replace(tmp_path, cache_path)
+        self._file = open(cache_path, 'a', encoding='utf-8')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, image_name: str) -> Optional[str]:
+        return self._entries.get(image_name)
+
+    def is_fresh(self, image_path: str, key: str) -> bool:
+        """圖片存在且上次以相同的快取鍵渲染時回傳 True。"""
+        return self._entries.get(os.path.basename(image_path)) == key and os.path.exists(image_path)
+
+    def record(self, image_path: str, key: str):
+        """記錄一張剛完成渲染的圖片 (立即寫入並 flush)。"""
+        image_name = os.path.basename(image_path)
+        if '\t' in image_name or '\n' in image_name:
+            raise ValueError(f"圖片名稱不能包含 tab 或換行字元: {image_name!r}")
+        if self._entries.get(image_name) == key:
+            return
+        self._entries[image_name] = key
+        self._file.write(f"{image_name}\t{key}\n")
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
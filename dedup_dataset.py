@@ -0,0 +1,102 @@
+# dedup_dataset.py
+
+# -*- coding: utf-8 -*-
+"""
+此腳本以單次串流掃描的方式，為既有的原始佈局資料集 (`raw_layouts/json_data`，或 merge_shards.py 合併後的分片資料集) 去除重複佈局。
+
+1. 逐一讀取每個 JSON 檔，計算其正規化指紋 (平移正規化、量化後的葉元件幾何 + 元件連接圖)。
+2. 指紋與 `production.ipynb` 使用同一份磁碟索引，因此去重結果可直接供之後的生成任務沿用。
+3. 預設僅回報重複項；可選擇將重複的 JSON (及對應的 PNG) 移到其他資料夾或直接刪除。
+"""
+
+import os
+import json
+import shutil
+import argparse
+import yaml
+from typing import Dict, Any
+
+from aclg.dedup import LayoutHashIndex, fingerprint_from_layout_dict
+from aclg.pipeline.shard import dataset_json_paths
+
+def load_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
+    """從指定的路徑載入 YAML 設定檔。"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f)
+    except FileNotFoundError:
+        print(f"❌ 錯誤：找不到設定檔 '{config_path}'。")
+        return None
+    except yaml.YAMLError as e:
+        print(f"❌ 錯誤：解析 YAML 檔案 '{config_path}' 失敗: {e}")
+        return None
+
+def main():
+    """主執行函式"""
+    parser = argparse.ArgumentParser(description="以正規化指紋為既有的原始佈局資料集去重。")
+    parser.add_argument("--config", default="config.yaml", help="設定檔路徑。(預設值: config.yaml)")
+    parser.add_argument("--index", default=None, help="指紋索引檔路徑。(預設值: 依 config.yaml 的 dedup_settings)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--move-to", default=None, help="將重複的 JSON 與 PNG 移動到此資料夾。")
+    group.add_argument("--delete", action="store_true", help="直接刪除重複的 JSON 與 PNG。")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config:
+        return
+
+    path_cfg = config.get('path_settings', {})
+    dedup_cfg = config.get('dedup_settings', {})
+    raw_dir = path_cfg.get('raw_output_directory', 'raw_layouts')
+    json_subdir = path_cfg.get('json_subdirectory', 'json_data')
+    image_subdir = path_cfg.get('image_subdirectory', 'images')
+    index_path = args.index or os.path.join(raw_dir, dedup_cfg.get('index_filename', 'layout_hash_index.tsv'))
+    quantization_step = dedup_cfg.get('quantization_step', 0.01)
+
+    # 分片產生的資料集以 merge_shards.py 建立的全域索引為準
+    input_files = dataset_json_paths(raw_dir, json_subdir)
+    if not input_files:
+        print(f"⚠️ 在 '{os.path.join(raw_dir, json_subdir)}' 中找不到任何 .json 檔案。")
+        return
+
+    if args.move_to:
+        os.makedirs(args.move_to, exist_ok=True)
+
+    print(f"🔍 發現 {len(input_files)} 個檔案，量化步長: {quantization_step}")
+    num_duplicates = 0
+    with LayoutHashIndex(index_path) as hash_index:
+        print(f"🧬 去重索引: '{index_path}' (已記錄 {len(hash_index)} 個指紋)")
+        for input_path in input_files:
+            json_filename = os.path.basename(input_path)
+            try:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    fingerprint = fingerprint_from_layout_dict(json.load(f), quantization_step)
+            except json.JSONDecodeError:
+                print(f"⚠️ 警告：無法解析 {json_filename}，檔案可能已損壞。")
+                continue
+
+            owner = hash_index.get(fingerprint)
+            if owner is None or owner == json_filename:
+                hash_index.add(fingerprint, json_filename)
+                continue
+
+            num_duplicates += 1
+            # PNG 與 JSON 位於同一個 (分片) 輸出資料夾下
+            output_dir = os.path.dirname(os.path.dirname(input_path))
+            image_path = os.path.join(output_dir, image_subdir, json_filename.replace('.json', '.png'))
+            related_paths = [p for p in (input_path, image_path) if os.path.exists(p)]
+            if args.move_to:
+                for path in related_paths:
+                    shutil.move(path, os.path.join(args.move_to, os.path.basename(path)))
+                print(f"📦 {json_filename} 與 {owner} 重複，已移至 '{args.move_to}'。")
+            elif args.delete:
+                for path in related_paths:
+                    os.remove(path)
+                print(f"🗑️  {json_filename} 與 {owner} 重複，已刪除。")
+            else:
+                print(f"♻️  {json_filename} 與 {owner} 重複。")
+
+    print(f"✨ 掃描完畢！共發現 {num_duplicates} 個重複佈局。 ✨")
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,23 @@
 此腳本用於視覺化 `format_for_ml.py` 產生的 ML-ready JSON 檔案，
 以驗證資料轉換的正確性。
 (新版：增加了對稱群組的視覺化功能，以不同顏色標示)
+
+- 增量模式 (visualization_settings.incremental)：每張圖片以 (formatted 內容, 繪圖設定) 的雜湊作為快取鍵，
+  內容與設定皆未改變的圖片直接略過，其餘以多個行程平行渲染。
+- 總覽圖 (--contact-sheet N)：隨機抽樣 N 個佈局排成一張圖片，方便快速檢視資料集。
 """
 
 import os
 import json
 import glob
+import random
+import argparse
 import yaml
-import matplotlib.pyplot as plt
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Any, Optional, Tuple
+
+from aclg.visualization import RenderCache, plot_contact_sheet, plot_formatted_layout, render_key
 
 def load_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
     """從指定的路徑載入 YAML 設定檔。"""
@@ -24,145 +33,168 @@ def load_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
         print(f"❌ 錯誤：解析 YAML 檔案 '{config_path}' 失敗: {e}")
         return None
 
-def plot_formatted_layout(data: Dict[str, Any], output_path: str, canvas_size: Tuple[int, int] = (1000, 1000)):
+def render_formatted_file(input_path: str, output_path: str, settings: Dict[str, Any]) -> Tuple[Optional[str], str]:
     """
-    根據單一 formatted JSON 檔案的資料繪製佈局圖。
+    (可在子行程中執行) 讀取並繪製單一 formatted JSON。
+    回傳 (快取鍵, 訊息)；失敗時快取鍵為 None。快取鍵以實際渲染的檔案內容計算。
     """
-    canvas_w, canvas_h = canvas_size
-    nodes = data.get("node", [])
-    targets = data.get("target", [])
-    edges = data.get("edges", {}).get("basic_component_edge", [])
-    # --- [新增] 讀取對稱群組資訊 ---
-    symmetry_groups = data.get("symmetry_groups", [])
-
-    if not nodes or not targets:
-        print(f"⚠️ 警告：檔案缺少 'node' 或 'target' 資料，無法繪圖。")
-        return
+    file_name = os.path.basename(input_path)
+    try:
+        with open(input_path, 'rb') as f:
+            content = f.read()
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return None, f"⚠️ 警告：無法解析 {file_name}，檔案可能已損壞。"
+    except OSError as e:
+        return None, f"❌ 讀取 {file_name} 時發生錯誤: {e}"
 
-    fig, ax = plt.subplots(figsize=(12, 12))
-    ax.set_facecolor('#f0f0f0')
-
-    # --- [新增] 為對稱群組準備顏色 ---
-    SYMMETRY_COLORS = ['#ff796c', '#6cff79', '#796cff', '#ffc56c', '#6cffc5', '#c56cff']
-    component_colors = {}
-    for i, pair in enumerate(symmetry_groups):
-        color = SYMMETRY_COLORS[i % len(SYMMETRY_COLORS)]
-        if len(pair) == 2:
-            component_colors[pair[0]] = color
-            component_colors[pair[1]] = color
-
-    # 1. 繪製元件 (Nodes)
-    components = []
-    for i in range(len(nodes)):
-        norm_w, norm_h = nodes[i]
-        norm_x, norm_y = targets[i]
-        
-        abs_w = norm_w * canvas_w
-        abs_h = norm_h * canvas_h
-        abs_x = norm_x * (canvas_w / 2)
-        abs_y = norm_y * (canvas_h / 2)
-        
-        top_left_x = abs_x - abs_w / 2
-        top_left_y = abs_y - abs_h / 2
-        
-        components.append({'x': abs_x, 'y': abs_y, 'w': abs_w, 'h': abs_h})
-
-        # --- [修改] 根據是否為對稱元件，決定顏色 ---
-        face_color = component_colors.get(i, 'skyblue') # 預設為 skyblue，對稱則使用指定顏色
-
-        rect = plt.Rectangle(
-            (top_left_x, top_left_y), abs_w, abs_h,
-            linewidth=1, edgecolor='black', facecolor=face_color, alpha=0.7
-        )
-        ax.add_patch(rect)
-        ax.text(abs_x, abs_y, str(i), ha='center', va='center', fontsize=8, color='black')
-
-    # 2. 繪製網路線 (Edges)
-    all_pins = set()
-    for edge_info in edges:
-        indices, offsets = edge_info
-        src_idx, dest_idx = indices
-        src_off_x, src_off_y, dest_off_x, dest_off_y = offsets
-
-        if src_idx < len(components) and dest_idx < len(components):
-            src_comp = components[src_idx]
-            dest_comp = components[dest_idx]
-
-            src_pin_x = src_comp['x'] + src_off_x * (canvas_w / 2)
-            src_pin_y = src_comp['y'] + src_off_y * (canvas_h / 2)
-            dest_pin_x = dest_comp['x'] + dest_off_x * (canvas_w / 2)
-            dest_pin_y = dest_comp['y'] + dest_off_y * (canvas_h / 2)
-
-            ax.plot([src_pin_x, dest_pin_x], [src_pin_y, dest_pin_y], color='#555555', linestyle='-', linewidth=0.8, alpha=0.7)
-            all_pins.add((src_pin_x, src_pin_y))
-            all_pins.add((dest_pin_x, dest_pin_y))
-
-    # 3. 繪製 Pin 點
-    for px, py in all_pins:
-        ax.plot(px, py, 'o', color='black', markersize=3)
-    
-    # 設定圖表外觀
-    ax.set_aspect('equal', adjustable='box')
-    ax.set_xlim(-canvas_w/2 - 50, canvas_w/2 + 50)
-    ax.set_ylim(-canvas_h/2 - 50, canvas_h/2 + 50)
-    ax.grid(True, linestyle='--', alpha=0.5)
-    plt.title(f"視覺化: {os.path.basename(output_path)}", fontsize=16)
-    plt.xlabel("X 座標")
-    plt.ylabel("Y 座標")
-    
-    # 儲存圖片
     try:
-        plt.savefig(output_path, dpi=150)
-        print(f"🖼️  視覺化圖片已儲存至: {os.path.basename(output_path)}")
+        plotted = plot_formatted_layout(data, output_path, tuple(settings['canvas_size']),
+                                        tuple(settings['figure_size']), settings['dpi'])
     except Exception as e:
-        print(f"❌ 寫入圖片 {output_path} 時發生錯誤: {e}")
-    finally:
-        plt.close(fig)
+        return None, f"❌ 寫入圖片 {output_path} 時發生錯誤: {e}"
+    if not plotted:
+        return None, f"⚠️ 警告：{file_name} 缺少 'node' 或 'target' 資料，無法繪圖。"
+    return render_key(content, settings), f"🖼️  視覺化圖片已儲存至: {os.path.basename(output_path)}"
+
+def file_render_key(input_path: str, settings: Dict[str, Any]) -> Optional[str]:
+    """計算輸入檔案目前的快取鍵；無法讀取時回傳 None (一律重新渲染)。"""
+    try:
+        with open(input_path, 'rb') as f:
+            return render_key(f.read(), settings)
+    except OSError:
+        return None
+
+def make_contact_sheet(input_files: List[str], viz_dir: str, vis_cfg: Dict[str, Any], settings: Dict[str, Any],
+                       num_samples: int, seed: Optional[int], cache: Optional[RenderCache], force: bool):
+    """隨機抽樣 num_samples 個佈局，排成一張總覽圖。"""
+    sheet_cfg = vis_cfg.get('contact_sheet', {})
+    output_path = os.path.join(viz_dir, sheet_cfg.get('filename', 'contact_sheet.png'))
+    sheet_settings = {
+        **settings,
+        'columns': sheet_cfg.get('columns', 0),
+        'tile_size': sheet_cfg.get('tile_size', 4),
+        'dpi': sheet_cfg.get('dpi', 100)
+    }
+
+    samples = sorted(random.Random(seed).sample(input_files, min(num_samples, len(input_files))))
+    layouts, contents = [], []
+    for input_file in samples:
+        name = os.path.basename(input_file).replace('.json', '')
+        try:
+            with open(input_file, 'rb') as f:
+                content = f.read()
+            layouts.append((name, json.loads(content)))
+            contents.append(name.encode('utf-8') + b'\0' + content)
+        except (OSError, json.JSONDecodeError):
+            print(f"⚠️ 警告：無法讀取 {os.path.basename(input_file)}，已從總覽圖中略過。")
+
+    key = render_key(b'\0'.join(contents), sheet_settings)
+    if cache is not None and not force and cache.is_fresh(output_path, key):
+        print(f"♻️  總覽圖未變更，略過: {os.path.basename(output_path)}")
+        return
+
+    num_drawn = plot_contact_sheet(layouts, output_path, tuple(settings['canvas_size']), sheet_settings['columns'] or None,
+                                   sheet_settings['tile_size'], sheet_settings['dpi'])
+    if cache is not None:
+        cache.record(output_path, key)
+    print(f"🗂️  總覽圖已儲存至: {os.path.basename(output_path)} (共 {num_drawn} 個佈局)")
 
 def main():
     """主執行函式"""
+    parser = argparse.ArgumentParser(description="視覺化 format_for_ml.py 產生的 formatted JSON 檔案。")
+    parser.add_argument("--config", default="config.yaml", help="設定檔路徑。(預設值: config.yaml)")
+    parser.add_argument("--workers", type=int, default=None, help="平行渲染的行程數量。(預設值: 依 visualization_settings.num_workers)")
+    parser.add_argument("--force", action="store_true", help="忽略快取，重新渲染所有圖片。")
+    parser.add_argument("--contact-sheet", type=int, default=None, metavar="N",
+                        help="只產生一張由 N 個隨機抽樣佈局組成的總覽圖，不輸出個別圖片。")
+    parser.add_argument("--seed", type=int, default=None, help="總覽圖的抽樣種子。(預設值: 每次隨機)")
+    args = parser.parse_args()
+
     print("--- 開始執行 ML-ready 資料視覺化任務 ---")
-    config = load_config()
+    config = load_config(args.config)
     if not config:
         return
 
     path_cfg = config.get('path_settings', {})
+    vis_cfg = config.get('visualization_settings', {})
     ml_dir = path_cfg.get('ml_ready_output_directory')
     viz_dir = path_cfg.get('visualization_output_directory')
 
     if not ml_dir or not viz_dir:
         print("❌ 錯誤：config.yaml 中缺少 'ml_ready_output_directory' 或 'visualization_output_directory' 設定。")
         return
-        
+
     os.makedirs(viz_dir, exist_ok=True)
-    
-    input_files = glob.glob(os.path.join(ml_dir, 'formatted_*.json'))
+
+    input_files = sorted(glob.glob(os.path.join(ml_dir, 'formatted_*.json')))
 
     if not input_files:
         print(f"⚠️ 在 '{ml_dir}' 中找不到任何 'formatted_*.json' 檔案。")
         return
-        
-    print(f"🔍 發現 {len(input_files)} 個已格式化的 JSON 檔案，準備進行視覺化...")
-    print("-" * 40)
-    
-    for input_file in input_files:
-        try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-            
+
+    # 會影響輸出圖片的繪圖設定 (同時作為快取鍵的一部分)
+    settings = {
+        'figure_size': list(vis_cfg.get('figure_size', [12, 12])),
+        'dpi': vis_cfg.get('dpi', 150),
+        'canvas_size': list(vis_cfg.get('canvas_size', [1000, 1000]))
+    }
+    incremental = vis_cfg.get('incremental', True)
+    num_workers = args.workers if args.workers is not None else vis_cfg.get('num_workers', 0)
+    num_workers = num_workers or os.cpu_count() or 1
+    cache = RenderCache(os.path.join(viz_dir, vis_cfg.get('cache_filename', 'render_cache.tsv'))) if incremental else None
+
+    try:
+        if args.contact_sheet is not None:
+            if args.contact_sheet < 1:
+                print("❌ 錯誤：--contact-sheet 的數量必須至少為 1。")
+                return
+            make_contact_sheet(input_files, viz_dir, vis_cfg, settings, args.contact_sheet, args.seed, cache, args.force)
+            return
+
+        print(f"🔍 發現 {len(input_files)} 個已格式化的 JSON 檔案，準備進行視覺化...")
+        pending_inputs, pending_outputs = [], []
+        for input_file in input_files:
             base_name = os.path.basename(input_file).replace('.json', '')
             output_image_path = os.path.join(viz_dir, f"{base_name}_visualization.png")
-            
-            plot_formatted_layout(content, output_image_path)
-            
-        except json.JSONDecodeError:
-            print(f"⚠️ 警告：無法解析 {os.path.basename(input_file)}，檔案可能已損壞。")
-        except Exception as e:
-            print(f"處理 {os.path.basename(input_file)} 時發生未知錯誤: {e}")
-        finally:
-            print("-" * 20)
-
-    print("✨ 所有視覺化任務執行完畢！ ✨")
+            if cache is not None and not args.force:
+                key = file_render_key(input_file, settings)
+                if key is not None and cache.is_fresh(output_image_path, key):
+                    continue
+            pending_inputs.append(input_file)
+            pending_outputs.append(output_image_path)
+
+        num_skipped = len(input_files) - len(pending_inputs)
+        num_workers = max(1, min(num_workers, len(pending_inputs)))
+        print(f"♻️  {num_skipped} 張圖片未變更，已略過；{len(pending_inputs)} 張需要渲染 (使用 {num_workers} 個行程)。")
+        print("-" * 40)
+
+        num_rendered = 0
+        if num_workers == 1:
+            results = map(render_formatted_file, pending_inputs, pending_outputs, repeat(settings))
+            num_rendered = _collect_results(results, pending_outputs, cache)
+        elif pending_inputs:
+            chunksize = max(1, len(pending_inputs) // (num_workers * 4))
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = executor.map(render_formatted_file, pending_inputs, pending_outputs, repeat(settings), chunksize=chunksize)
+                num_rendered = _collect_results(results, pending_outputs, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    print(f"✨ 所有視覺化任務執行完畢！共渲染 {num_rendered} 張、略過 {num_skipped} 張。 ✨")
+
+def _collect_results(results, output_paths: List[str], cache: Optional[RenderCache]) -> int:
+    """依序輸出每張圖片的結果訊息，並記錄成功渲染的快取鍵；回傳成功的數量。"""
+    num_rendered = 0
+    for output_path, (key, message) in zip(output_paths, results):
+        print(message)
+        if key is None:
+            continue
+        num_rendered += 1
+        if cache is not None:
+            cache.record(output_path, key)
+    return num_rendered
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
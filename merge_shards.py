@@ -0,0 +1,163 @@
+# merge_shards.py
+
+# -*- coding: utf-8 -*-
+"""
+此腳本將多台機器分片產生的原始佈局 (`raw_layouts/shard_XXX_of_YYY/`) 合併為單一的全域索引。
+
+1. 讀取每個分片的 manifest，確認所有分片共用同一個主種子、設定雜湊與分片數。
+2. 收集所有已完成的佈局，依全域編號寫入 `raw_layouts/dataset_index.json`；檔案本身不會被複製或移動。
+   seed-only 分片 (storage_mode: seed_only) 沒有 JSON 檔，改以各分片 seed store 中的紀錄 (種子與校驗碼) 建立索引。
+3. 回報缺少的編號；可選擇重新計算 sha256 以驗證檔案完整性。
+4. 若分片啟用了去重索引，將各分片的指紋合併為全域索引，並回報跨分片的重複佈局。
+"""
+
+import os
+import argparse
+import yaml
+from typing import Dict, Any
+
+from aclg.dedup import LayoutHashIndex
+from aclg.pipeline.manifest import RunManifest, atomic_write_json
+from aclg.pipeline.seed_store import SeedStore
+from aclg.pipeline.shard import DATASET_INDEX_FILENAME, find_shard_manifests
+
+def load_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
+    """從指定的路徑載入 YAML 設定檔。"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f)
+    except FileNotFoundError:
+        print(f"❌ 錯誤：找不到設定檔 '{config_path}'。")
+        return None
+    except yaml.YAMLError as e:
+        print(f"❌ 錯誤：解析 YAML 檔案 '{config_path}' 失敗: {e}")
+        return None
+
+def main():
+    """主執行函式"""
+    parser = argparse.ArgumentParser(description="合併各分片的執行紀錄，建立全域資料集索引。")
+    parser.add_argument("--config", default="config.yaml", help="設定檔路徑。(預設值: config.yaml)")
+    parser.add_argument("--verify", action="store_true", help="重新計算每個檔案的 sha256 並與紀錄比對。")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config:
+        return
+
+    path_cfg = config.get('path_settings', {})
+    main_cfg = config.get('main_execution', {})
+    dedup_cfg = config.get('dedup_settings', {})
+    raw_dir = path_cfg.get('raw_output_directory', 'raw_layouts')
+    manifest_filename = main_cfg.get('manifest_filename', 'run_manifest.json')
+    index_filename = dedup_cfg.get('index_filename', 'layout_hash_index.tsv')
+    seed_store_filename = main_cfg.get('seed_store_filename', 'seed_store.jsonl')
+
+    manifest_paths = find_shard_manifests(raw_dir, manifest_filename)
+    if not manifest_paths:
+        print(f"⚠️ 在 '{raw_dir}' 中找不到任何分片的執行紀錄。")
+        return
+
+    manifests = [RunManifest.load(path) for path in manifest_paths]
+    reference = manifests[0].header
+    for path, manifest in zip(manifest_paths, manifests):
+        for key in ('master_seed', 'config_hash', 'shard_count', 'num_layouts'):
+            if manifest.header.get(key) != reference.get(key):
+                print(f"❌ 錯誤：'{path}' 的 {key} 與 '{manifest_paths[0]}' 不一致，無法合併。")
+                return
+        if manifest.header.get('storage_mode', 'full') != reference.get('storage_mode', 'full'):
+            print(f"❌ 錯誤：'{path}' 的 storage_mode 與 '{manifest_paths[0]}' 不一致，無法合併。")
+            return
+    seed_only = reference.get('storage_mode', 'full') == 'seed_only'
+
+    num_layouts = reference.get('num_layouts', 0)
+    shard_count = reference.get('shard_count', len(manifests))
+    print(f"🔍 發現 {len(manifests)}/{shard_count} 個分片，主種子 {reference['master_seed']}，共 {num_layouts} 個編號。")
+
+    layouts = {}
+    num_corrupted = 0
+    for path, manifest in zip(manifest_paths, manifests):
+        shard_dir = os.path.dirname(path)
+        shard_name = os.path.basename(shard_dir)
+        seed_records = {}
+        if seed_only:
+            seed_store_path = os.path.join(shard_dir, seed_store_filename)
+            if not os.path.exists(seed_store_path):
+                print(f"❌ 錯誤：seed-only 分片 '{shard_dir}' 中找不到 '{seed_store_filename}'，無法合併。")
+                return
+            seed_store = SeedStore.load(seed_store_path)
+            seed_records = seed_store.records
+            seed_store.close()
+        for layout_id, record in manifest.records.items():
+            if record.get('status') != 'done':
+                continue
+            if seed_only:
+                # seed-only 佈局沒有輸出檔：以 seed store 的紀錄 (種子須與 manifest 相同) 作為完成的依據
+                seed_record = seed_records.get(layout_id)
+                if seed_record is None or seed_record['seed'] != record['seed']:
+                    num_corrupted += 1
+                    print(f"⚠️ 警告：{shard_name} 中編號 #{layout_id} 不在 seed store 中或種子不符。")
+                    continue
+                layouts[layout_id] = {
+                    "layout_id": layout_id,
+                    "seed": record['seed'],
+                    "attempt": record['attempt'],
+                    "shard": shard_name,
+                    "seed_store": os.path.join(shard_name, seed_store_filename),
+                    "checksum": seed_record['checksum']
+                }
+                continue
+            if args.verify and not manifest.is_complete(layout_id, shard_dir):
+                num_corrupted += 1
+                print(f"⚠️ 警告：{shard_name} 中編號 #{layout_id} 的檔案遺失或內容雜湊不符。")
+                continue
+            files = {os.path.join(shard_name, rel_path): digest for rel_path, digest in record['files'].items()}
+            json_path = next(p for p in files if p.endswith('.json'))
+            layouts[layout_id] = {
+                "layout_id": layout_id,
+                "seed": record['seed'],
+                "attempt": record['attempt'],
+                "shard": shard_name,
+                "json": json_path,
+                "files": files
+            }
+
+    missing_ids = [i for i in range(num_layouts) if i not in layouts]
+    dataset_index = {
+        "version": 1,
+        "master_seed": reference['master_seed'],
+        "config_hash": reference['config_hash'],
+        "num_layouts": num_layouts,
+        "shard_count": shard_count,
+        "storage_mode": reference.get('storage_mode', 'full'),
+        "missing_layout_ids": missing_ids,
+        "layouts": [layouts[i] for i in sorted(layouts)]
+    }
+    dataset_index_path = os.path.join(raw_dir, DATASET_INDEX_FILENAME)
+    atomic_write_json(dataset_index_path, dataset_index)
+    print(f"📝 全域索引已寫入: '{dataset_index_path}' ({len(layouts)} 個佈局)")
+
+    # --- 合併各分片的去重索引，重新建立全域索引並回報跨分片重複 ---
+    shard_index_paths = [os.path.join(os.path.dirname(p), index_filename) for p in manifest_paths]
+    shard_index_paths = [p for p in shard_index_paths if os.path.exists(p)]
+    if shard_index_paths:
+        global_index_path = os.path.join(raw_dir, index_filename)
+        if os.path.exists(global_index_path):
+            os.remove(global_index_path)
+        num_duplicates = 0
+        with LayoutHashIndex(global_index_path) as global_index:
+            for shard_index_path in shard_index_paths:
+                with LayoutHashIndex(shard_index_path) as shard_index:
+                    for fingerprint, key in shard_index.items():
+                        if not global_index.add(fingerprint, key):
+                            num_duplicates += 1
+                            print(f"♻️  {key} 與 {global_index.get(fingerprint)} 跨分片重複。")
+        print(f"🧬 全域去重索引: '{global_index_path}' (跨分片重複 {num_duplicates} 個)")
+
+    if missing_ids:
+        print(f"⚠️ 尚缺 {len(missing_ids)} 個編號，可於對應分片以 resume 模式補齊: {missing_ids[:20]}{' ...' if len(missing_ids) > 20 else ''}")
+    if num_corrupted:
+        print(f"⚠️ 共 {num_corrupted} 個佈局的檔案未通過驗證，已排除於索引之外。")
+    print("✨ 分片合併完畢！ ✨")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# serve_layouts.py
+
+# -*- coding: utf-8 -*-
+"""
+此腳本啟動一個常駐的佈局生成服務，讓訓練程式即時取得新產生的 ML-ready 樣本，
+不必先以 `production.ipynb` 離線產生並寫入磁碟。
+
+1. worker 行程池中的每個行程只在啟動時編譯一次 config.yaml 並建立產生器。
+2. 預取緩衝區持續在背景產生樣本；請求也可以指定種子以取得可重現的樣本。
+3. 以 Unix socket (多個訓練程式可同時連線共用) 或 stdin/stdout 提供一行一個 JSON 的通訊協定，
+   詳見 `aclg.pipeline.serving.LayoutSampleServer`。
+"""
+
+import sys
+import signal
+import argparse
+import threading
+
+from aclg.pipeline.config import CompiledConfig, ConfigError, load_compiled_config
+from aclg.pipeline.serving import LayoutSampleServer, serve_stdio, serve_unix_socket
+
+def load_config(config_path: str = 'config.yaml') -> CompiledConfig:
+    """載入並編譯 YAML 設定檔；失敗時列出所有問題並回傳 None。"""
+    try:
+        return load_compiled_config(config_path)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return None
+
+def _report_stats_periodically(server: LayoutSampleServer, interval_seconds: float, stop_event: threading.Event):
+    while not stop_event.wait(interval_seconds):
+        print(server.stats_line(), flush=True)
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    """主執行函式"""
+    parser = argparse.ArgumentParser(description="啟動常駐的佈局生成服務，提供 ML-ready 樣本。")
+    parser.add_argument("--config", default="config.yaml", help="設定檔路徑。(預設值: config.yaml)")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument("--socket", default=None, help="Unix socket 路徑。(預設值: 依 serving_settings.socket_path)")
+    transport.add_argument("--stdio", action="store_true", help="改以 stdin/stdout 通訊 (訊息輸出到 stderr)。")
+    parser.add_argument("--workers", type=int, default=None, help="worker 行程數量，0 表示使用 CPU 核心數。(預設值: 依 serving_settings.num_workers)")
+    parser.add_argument("--prefetch", type=int, default=None, help="預取緩衝區大小。(預設值: 依 serving_settings.prefetch_size)")
+    parser.add_argument("--master-seed", type=int, default=None, help="預取串流的主種子。(預設值: 依 serving_settings.master_seed)")
+    parser.add_argument("--verbose", action="store_true", help="將 worker 的生成訊息輸出到 stderr。")
+    args = parser.parse_args()
+
+    protocol_out = sys.stdout
+    if args.stdio:
+        # stdout 保留給通訊協定，其餘訊息一律改寫到 stderr
+        sys.stdout = sys.stderr
+
+    print("--- 啟動佈局生成服務 ---")
+    config = load_config(args.config)
+    if not config:
+        return
+
+    serving_cfg = config.section('serving_settings')
+    include_graph_block = config.section('format_settings').get('include_graph_block', False)
+    master_seed = args.master_seed if args.master_seed is not None else serving_cfg.get('master_seed', 'random')
+    if master_seed == 'random':
+        master_seed = None
+    elif not isinstance(master_seed, int):
+        print(f"❌ 錯誤：serving_settings.master_seed 必須是整數或 \"random\"，目前為 {master_seed!r}。")
+        return
+    num_workers = args.workers if args.workers is not None else serving_cfg.get('num_workers', 0)
+    prefetch_size = args.prefetch if args.prefetch is not None else serving_cfg.get('prefetch_size', 64)
+    stats_interval = serving_cfg.get('stats_interval_seconds', 60)
+    if not isinstance(num_workers, int) or num_workers < 0:
+        print(f"❌ 錯誤：worker 行程數量必須是非負整數 (0 表示使用 CPU 核心數)，目前為 {num_workers!r}。")
+        return
+
+    server = LayoutSampleServer(config, num_workers=num_workers or None, prefetch_size=prefetch_size,
+                                master_seed=master_seed, include_graph_block=include_graph_block,
+                                max_samples_per_request=serving_cfg.get('max_samples_per_request', 1024),
+                                verbose=args.verbose)
+    print(f"⚙️  worker 行程: {server.num_workers}，預取緩衝區: {server.prefetch_size}，"
+          f"主種子: {server.master_seed}，設定雜湊: {config.config_hash[:12]}")
+
+    # SIGTERM (例如由行程管理工具停止服務) 與 Ctrl+C 相同，正常關閉並輸出最終統計
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    stop_event = threading.Event()
+    if stats_interval:
+        threading.Thread(target=_report_stats_periodically, args=(server, stats_interval, stop_event), daemon=True).start()
+
+    try:
+        if args.stdio:
+            print("🔌 以 stdin/stdout 提供服務 (輸入結束時停止)。")
+            serve_stdio(server, sys.stdin, protocol_out)
+        else:
+            socket_path = args.socket or serving_cfg.get('socket_path', '/tmp/aclg_layouts.sock')
+            print(f"🔌 以 Unix socket 提供服務: '{socket_path}' (Ctrl+C 停止)。")
+            serve_unix_socket(server, socket_path)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        print(server.stats_line())
+        server.close()
+
+    print("✨ 佈局生成服務已停止。 ✨")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# tests/test_batch_equivalence.py
+import os
+
+import numpy as np
+import pytest
+
+from aclg.pipeline.config import load_compiled_config
+from aclg.pipeline.export import layout_to_dict
+from aclg.pipeline.layout import LayoutPipeline
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+SEEDS = [0, 1, 7, 1234, 98765]
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return LayoutPipeline(load_compiled_config(CONFIG_PATH))
+
+
+def _as_dict(layout_id, seed, layout):
+    return layout_to_dict(layout_id, seed, layout["root_component"], layout["gap_components"],
+                          layout["final_leaf_components"], layout["netlist"], layout["symmetry"],
+                          layout["netlist_metrics"])
+
+
+def test_generate_batch_matches_generate(pipeline):
+    batch = pipeline.generate_batch(SEEDS)
+    assert len(batch) == len(SEEDS)
+    for layout_id, (seed, batched) in enumerate(zip(SEEDS, batch)):
+        single = pipeline.generate(seed)
+        assert _as_dict(layout_id, seed, batched) == _as_dict(layout_id, seed, single)
+        np.testing.assert_array_equal(batched["netlist"].edges, single["netlist"].edges)
+
+
+def test_generate_batch_keeps_rejected_seeds_as_none(pipeline):
+    # 依葉元件數量的奇偶拒絕部分種子：被拒絕的位置為 None，其餘結果不受影響
+    def geometry_filter(root, level_2_components, gap_components, symmetry):
+        return len(level_2_components) % 2 == 0
+
+    batch = pipeline.generate_batch(SEEDS, geometry_filter)
+    for layout_id, (seed, batched) in enumerate(zip(SEEDS, batch)):
+        single = pipeline.generate(seed, geometry_filter=geometry_filter)
+        if single is None:
+            assert batched is None
+        else:
+            assert _as_dict(layout_id, seed, batched) == _as_dict(layout_id, seed, single)
@@ -0,0 +1,90 @@
+# tests/test_resume_determinism.py
+import os
+
+import pytest
+
+from aclg.pipeline.config import load_compiled_config
+from aclg.pipeline.export import export_layout_to_json
+from aclg.pipeline.layout import LayoutPipeline
+from aclg.pipeline.manifest import RunManifest, derive_layout_seed
+from aclg.pipeline.seed_store import SeedStore
+from aclg.pipeline.stream import render_layout
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+MASTER_SEED = 20240601
+LAYOUT_IDS = range(5)
+
+
+@pytest.fixture(scope="module")
+def config():
+    return load_compiled_config(CONFIG_PATH)
+
+
+@pytest.fixture(scope="module")
+def pipeline(config):
+    return LayoutPipeline(config)
+
+
+def _write_layout(pipeline, directory, layout_id, attempt=0):
+    """與批次流程相同：由主種子推導種子、產生並匯出 JSON，回傳 (種子, 相對路徑)。"""
+    seed = derive_layout_seed(MASTER_SEED, layout_id, attempt)
+    layout = pipeline.generate(seed)
+    rel_path = f"raw_layouts_{layout_id}.json"
+    export_layout_to_json(layout_id, seed, layout["root_component"], layout["gap_components"],
+                          layout["final_leaf_components"], layout["netlist"], layout["symmetry"],
+                          os.path.join(directory, rel_path), pipeline.exported_metrics(layout))
+    return seed, rel_path
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_resume_regenerates_only_incomplete_ids_with_identical_bytes(pipeline, tmp_path):
+    directory = str(tmp_path)
+    manifest_path = os.path.join(directory, "run_manifest.json")
+    with RunManifest.create(manifest_path, "config-hash", master_seed=MASTER_SEED) as manifest:
+        for layout_id in LAYOUT_IDS:
+            seed, rel_path = _write_layout(pipeline, directory, layout_id)
+            manifest.mark_done(layout_id, seed, 0, {rel_path: None}, directory)
+    original = {i: _read_bytes(os.path.join(directory, f"raw_layouts_{i}.json")) for i in LAYOUT_IDS}
+
+    # 模擬中斷與損壞：刪除一個 JSON、竄改另一個，並截斷 log 的最後一行 (最後完成的編號)
+    os.remove(os.path.join(directory, "raw_layouts_1.json"))
+    with open(os.path.join(directory, "raw_layouts_3.json"), 'r+b') as f:
+        f.seek(10)
+        f.write(b'#')
+    log_path = f"{manifest_path}.log.jsonl"
+    with open(log_path, 'rb') as f:
+        log = f.read()
+    last_line = log.splitlines(keepends=True)[-1]
+    with open(log_path, 'wb') as f:
+        f.write(log[:-len(last_line)] + last_line[:len(last_line) // 2])
+
+    manifest = RunManifest.load(manifest_path)
+    assert manifest.master_seed == MASTER_SEED
+    incomplete = [i for i in LAYOUT_IDS if not manifest.is_complete(i, directory)]
+    assert incomplete == [1, 3, 4]
+
+    with manifest:
+        for layout_id in incomplete:
+            seed, rel_path = _write_layout(pipeline, directory, layout_id)
+            manifest.mark_done(layout_id, seed, 0, {rel_path: None}, directory)
+
+    resumed = RunManifest.load(manifest_path)
+    assert all(resumed.is_complete(i, directory) for i in LAYOUT_IDS)
+    for layout_id in LAYOUT_IDS:
+        assert _read_bytes(os.path.join(directory, f"raw_layouts_{layout_id}.json")) == original[layout_id]
+
+
+def test_seed_store_regenerates_recorded_layouts(config, pipeline, tmp_path):
+    store_path = str(tmp_path / "seed_store.jsonl")
+    with SeedStore.create(store_path, config) as store:
+        for layout_id in LAYOUT_IDS:
+            seed = derive_layout_seed(MASTER_SEED, layout_id)
+            store.add(layout_id, seed, render_layout(pipeline, layout_id, seed))
+
+    with SeedStore.load(store_path) as store:
+        assert store.layout_ids == list(LAYOUT_IDS)
+        assert store.verify() == []
@@ -0,0 +1,150 @@
+# tests/test_rule_batch_kernels.py
+import numpy as np
+import pytest
+
+from aclg.dataclass.component import Component
+from aclg.post_processing.padding import (
+    add_padding, add_padding_advanced, add_padding_advanced_batch, add_padding_based_on_alignment_batch,
+    add_padding_batch, add_padding_random_oneside_batch
+)
+from aclg.rules.align import AlignmentMode, align_components, align_components_batch
+from aclg.rules.spacing import spacing_grid, spacing_grid_batch
+from aclg.rules.split.split_ratio import (
+    SplitOrientation, split_by_ratio, split_by_ratio_batch, split_by_ratio_grid, split_by_ratio_grid_batch
+)
+
+SEEDS = [0, 1, 2, 3, 4]
+
+
+def _random_geometry(rng, n):
+    return np.column_stack((rng.uniform(-50, 50, n), rng.uniform(-50, 50, n),
+                            rng.uniform(5, 40, n), rng.uniform(5, 40, n)))
+
+
+def _random_ratios(rng, n):
+    return [rng.uniform(0.1, 3.0, rng.integers(1, 6)).tolist() for _ in range(n)]
+
+
+def _components(geometry):
+    return [Component(x=x, y=y, width=w, height=h) for x, y, w, h in geometry.tolist()]
+
+
+def _geometry(components):
+    return np.array([[c.x, c.y, c.width, c.height] for c in components], dtype=np.float64).reshape(-1, 4)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("orientation", list(SplitOrientation))
+def test_split_by_ratio_batch_matches_scalar(seed, orientation):
+    rng = np.random.default_rng(seed)
+    parents = _random_geometry(rng, 6)
+    ratios = _random_ratios(rng, 6)
+
+    children, parent_index = split_by_ratio_batch(parents, ratios, orientation)
+
+    expected = [split_by_ratio(parent, r, orientation) for parent, r in zip(_components(parents), ratios)]
+    np.testing.assert_array_equal(children, _geometry([c for group in expected for c in group]))
+    np.testing.assert_array_equal(parent_index, np.repeat(np.arange(6), [len(r) for r in ratios]))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_split_by_ratio_grid_batch_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    parents = _random_geometry(rng, 5)
+    h_ratios, v_ratios = _random_ratios(rng, 5), _random_ratios(rng, 5)
+
+    children, parent_index = split_by_ratio_grid_batch(parents, h_ratios, v_ratios)
+
+    expected = [split_by_ratio_grid(parent, h, v) for parent, h, v in zip(_components(parents), h_ratios, v_ratios)]
+    np.testing.assert_array_equal(children, _geometry([c for group in expected for c in group]))
+    np.testing.assert_array_equal(parent_index, np.repeat(np.arange(5), [len(g) for g in expected]))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spacing_grid_batch_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    parents = _random_geometry(rng, 6)
+    rows, cols = rng.integers(1, 5, 6), rng.integers(1, 5, 6)
+
+    children, parent_index = spacing_grid_batch(parents, rows, cols)
+
+    expected = [spacing_grid(parent, int(r), int(c)) for parent, r, c in zip(_components(parents), rows, cols)]
+    np.testing.assert_array_equal(children, _geometry([c for group in expected for c in group]))
+    np.testing.assert_array_equal(parent_index, np.repeat(np.arange(6), rows * cols))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_align_components_batch_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    geometry = _random_geometry(rng, 12)
+    scale_factors = rng.uniform(0.2, 1.0, 12)
+    modes = [list(AlignmentMode)[i] for i in rng.integers(0, len(AlignmentMode), 12)]
+
+    aligned = align_components_batch(geometry, scale_factors, modes)
+
+    expected = [align_components([comp], [factor], mode)[0]
+                for comp, factor, mode in zip(_components(geometry), scale_factors.tolist(), modes)]
+    np.testing.assert_array_equal(aligned, _geometry(expected))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_padding_batch_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    geometry = _random_geometry(rng, 8)
+    padding = float(rng.uniform(0, 2.5))
+    top, bottom, left, right = (rng.uniform(0, 2.5, 8) for _ in range(4))
+
+    np.testing.assert_array_equal(add_padding_batch(geometry, padding),
+                                  _geometry(add_padding(_components(geometry), padding)))
+
+    expected = [add_padding_advanced([comp], top=t, bottom=b, left=l, right=r)[0]
+                for comp, t, b, l, r in zip(_components(geometry), top.tolist(), bottom.tolist(),
+                                            left.tolist(), right.tolist())]
+    np.testing.assert_array_equal(add_padding_advanced_batch(geometry, top, bottom, left, right), _geometry(expected))
+
+
+# 隨機 Padding 核心同時支援 np.random.Generator 與 np.random.RandomState
+RNG_FACTORIES = [np.random.default_rng, np.random.RandomState]
+
+
+def _fitting_and_tiny_geometry(rng, n):
+    """前 n 列放得下任何 Padding (邊長 >= 10)，後 n 列邊長為 1，放不下至少 2 的 Padding。"""
+    fitting = _random_geometry(rng, n)
+    fitting[:, 2:] += 10
+    tiny = np.column_stack((rng.uniform(-50, 50, n), rng.uniform(-50, 50, n), np.ones(n), np.ones(n)))
+    return np.vstack((fitting, tiny))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("make_rng", RNG_FACTORIES)
+def test_padding_random_oneside_batch_pads_one_side_by_drawn_amount(seed, make_rng):
+    geometry = _fitting_and_tiny_geometry(np.random.default_rng(seed), 6)
+
+    padded = add_padding_random_oneside_batch(geometry, (2.0, 5.0), rng=make_rng(seed))
+
+    drawn = make_rng(seed).uniform(2.0, 5.0, size=len(geometry))
+    shrink = geometry[:, 2:] - padded[:, 2:]
+    shift = padded[:, :2] - geometry[:, :2]
+    fitting = slice(0, 6)
+    # 只有一個方向縮小，縮小量等於抽到的 Padding，中心往反方向移動一半
+    assert np.all(np.count_nonzero(shrink[fitting], axis=1) == 1)
+    np.testing.assert_allclose(shrink[fitting].sum(axis=1), drawn[fitting])
+    np.testing.assert_allclose(np.abs(shift[fitting]), shrink[fitting] / 2)
+    np.testing.assert_array_equal(padded[6:], geometry[6:])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("make_rng", RNG_FACTORIES)
+def test_padding_based_on_alignment_batch_pads_alignment_axis(seed, make_rng):
+    geometry = _fitting_and_tiny_geometry(np.random.default_rng(seed), 3)
+    rules = ['align_left', 'align_top', 'spacing_grid'] * 2
+
+    padded = add_padding_based_on_alignment_batch(geometry, rules, (2.0, 5.0), rng=make_rng(seed))
+
+    drawn = make_rng(seed).uniform(2.0, 5.0, size=len(geometry))
+    # 垂直排列 (align_left) 左右各縮小 Padding，水平排列 (align_top) 上下各縮小，其他規則不變；中心不變
+    np.testing.assert_allclose(padded[0, 2:], geometry[0, 2:] - [2 * drawn[0], 0])
+    np.testing.assert_allclose(padded[1, 2:], geometry[1, 2:] - [0, 2 * drawn[1]])
+    np.testing.assert_array_equal(padded[2], geometry[2])
+    np.testing.assert_allclose(padded[:3, :2], geometry[:3, :2])
+    np.testing.assert_array_equal(padded[3:], geometry[3:])